@@ -0,0 +1,67 @@
+from pathlib import Path
+import pytest
+from truco.cbr import CONFIGURACAO_PADRAO, Cbr
+from truco.desempenho import TOLERANCIA, carregar_referencia, comparar, medir, salvar_referencia
+
+REFERENCIA_PADRAO = Path(__file__).resolve().parent / 'referencia_desempenho.json'
+
+
+def pytest_addoption(parser):
+    grupo = parser.getgroup('desempenho')
+    grupo.addoption('--desempenho', action='store_true', help='roda os benchmarks (ignorados por padrão)')
+    grupo.addoption('--referencia', default=str(REFERENCIA_PADRAO), help='arquivo JSON com os tempos de referência')
+    grupo.addoption('--salvar-referencia', action='store_true', help='grava os tempos medidos como nova referência')
+    grupo.addoption('--tolerancia', type=float, default=TOLERANCIA, help='razão máxima entre o tempo medido e a referência')
+
+
+def pytest_configure(config):
+    config.desempenho = {}
+
+
+@pytest.fixture(scope='module')
+def cbr():
+    """Cbr com a configuração padrão do índice (sem ler configuracao_indice.json), um por módulo de testes."""
+    return Cbr(configuracao=CONFIGURACAO_PADRAO)
+
+
+@pytest.fixture
+def desempenho(request):
+    """Mede uma função com `truco.desempenho.medir` e falha se ela ficou mais lenta que a referência."""
+    config = request.config
+    if not (config.getoption('desempenho')):
+        pytest.skip('benchmarks só rodam com --desempenho')
+
+    referencia = carregar_referencia(config.getoption('referencia'))
+
+    def executar(nome, funcao, **opcoes):
+        resultado = medir(funcao, **opcoes)
+        config.desempenho[nome] = resultado
+        if (config.getoption('salvar_referencia')):
+            return resultado
+
+        razao, regressao = comparar(resultado, referencia.get(nome), config.getoption('tolerancia'))
+        if (regressao):
+            pytest.fail('%s: %.1f us contra %.1f us da referência (%.2fx)' % (nome, resultado['minimo'] * 1e6, referencia[nome]['minimo'] * 1e6, razao))
+
+        return resultado
+
+    return executar
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    if (config.desempenho and config.getoption('salvar_referencia')):
+        salvar_referencia(config.getoption('referencia'), config.desempenho)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not (config.desempenho):
+        return
+
+    # ao salvar, o arquivo já contém os tempos desta execução e a comparação não diria nada
+    referencia = {} if config.getoption('salvar_referencia') else carregar_referencia(config.getoption('referencia'))
+    terminalreporter.section('desempenho')
+    for nome, resultado in sorted(config.desempenho.items()):
+        razao, _ = comparar(resultado, referencia.get(nome))
+        comparacao = '' if razao is None else '  %.2fx da referência' % razao
+        terminalreporter.write_line('%-32s %12.1f us  mediana %12.1f us  (%d x %d chamadas)%s' % (nome, resultado['minimo'] * 1e6, resultado['mediana'] * 1e6, resultado['repeticoes'], resultado['chamadas'], comparacao))
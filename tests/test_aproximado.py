@@ -0,0 +1,32 @@
+import numpy as np
+from truco.aproximado import IndiceIVF, base_sintetica, relatorio_recall
+from truco.cbr import Cbr
+from truco.dados import Dados
+
+def test_todas_as_listas_sondadas_equivale_a_busca_exata():
+    sorteio = np.random.default_rng(1)
+    casos = sorteio.integers(-5, 50, size=(800, 10)).astype(np.int16)
+    ivf = IndiceIVF(n_neighbors=15, listas=20, sondas=20).fit(casos)
+    distancias, indices = ivf.kneighbors(casos[:30])
+    for linha, consulta in enumerate(casos[:30].astype(np.float64)):
+        esperadas = np.sqrt(((casos - consulta) ** 2).sum(axis=1))
+        ordem = np.lexsort((np.arange(len(casos)), esperadas))[:15]
+        assert np.allclose(distancias[linha], esperadas[ordem], atol=1e-3)
+        assert indices[linha][0] == linha
+
+def test_sondas_insuficientes_ampliam_ate_k_candidatos():
+    casos = np.arange(200, dtype=np.int16).reshape(100, 2)
+    ivf = IndiceIVF(n_neighbors=40, listas=10, sondas=1).fit(casos)
+    _, indices = ivf.kneighbors(casos[:3])
+    assert indices.shape == (3, 40) and len(set(indices[0])) == 40
+
+def test_relatorio_de_recall_e_backend_do_cbr():
+    dados = Dados()
+    casos = base_sintetica(dados.retornar_casos(), 2)
+    assert len(casos) == 2 * len(dados.retornar_casos())
+    relatorio = relatorio_recall(casos, n_neighbors=20, sondas=(1, 1000), consultas=30)
+    poucas, todas = relatorio['ivf']
+    assert 0 < poucas['recall'] <= todas['recall'] == 1.0
+    cbr = Cbr(dados, configuracao={'backend': 'ivf', 'sondas': 4})
+    assert isinstance(cbr.nbrs, IndiceIVF)
+    assert cbr.vizinhos(cbr.dataset.iloc[[7]])[0] == 7
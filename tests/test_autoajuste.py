@@ -0,0 +1,46 @@
+import json
+import pytest
+from truco.autoajuste import autoajustar, configuracoes, escolher, fronteira_pareto, salvar_configuracao
+from truco.cbr import CONFIGURACAO_PADRAO, Cbr, IndiceKDTree, carregar_configuracao
+
+def test_fronteira_e_escolha_pelo_orcamento():
+    medicoes = [{'nome': 'a', 'p50_ms': 0.1, 'p99_ms': 0.2, 'concordancia': 0.8},
+                {'nome': 'b', 'p50_ms': 0.3, 'p99_ms': 0.5, 'concordancia': 1.0},
+                {'nome': 'c', 'p50_ms': 0.4, 'p99_ms': 0.6, 'concordancia': 0.9},
+                {'nome': 'd', 'p50_ms': 0.9, 'p99_ms': 1.5, 'concordancia': 1.0}]
+    fronteira = fronteira_pareto(medicoes)
+    assert [medicao['nome'] for medicao in fronteira] == ['a', 'b']
+    assert escolher(fronteira, 1.0)['nome'] == 'b'
+    assert escolher(fronteira, 0.3)['nome'] == 'a'
+    assert escolher(fronteira, 0.01)['nome'] == 'a'
+    assert len(configuracoes({'n_neighbors': [100], 'algorithm': ['ball_tree', 'brute'], 'leaf_size': [10, 30], 'backend': ['sklearn', 'scipy']})) == 5
+
+def test_autoajuste_grava_configuracao_lida_pelo_cbr(cbr, tmp_path):
+    grade = {'n_neighbors': [100], 'algorithm': ['ball_tree'], 'leaf_size': [30], 'backend': ['sklearn', 'scipy']}
+    resultado = autoajustar(cbr, grade, orcamento_ms=1000, casos=30)
+    # mesmos k e métrica: os dois índices encontram os mesmos vizinhos que a configuração atual
+    assert all(medicao['concordancia'] == 1.0 for medicao in resultado['medicoes'])
+    caminho = tmp_path / 'configuracao_indice.json'
+    salvar_configuracao(resultado, caminho)
+    assert json.loads(caminho.read_text(encoding='utf-8'))['indice'] == resultado['escolhida']['configuracao']
+    configuracao = carregar_configuracao(caminho)
+    assert configuracao == resultado['escolhida']['configuracao']
+    if (configuracao['backend'] == 'scipy'):
+        assert isinstance(Cbr(cbr.dados, configuracao=configuracao).nbrs, IndiceKDTree)
+
+def test_configuracao_sem_arquivo_e_padrao(tmp_path):
+    assert carregar_configuracao(tmp_path / 'inexistente.json') == CONFIGURACAO_PADRAO
+
+def test_arquivo_so_e_lido_quando_pedido(tmp_path, monkeypatch):
+    caminho = tmp_path / 'configuracao_indice.json'
+    caminho.write_text(json.dumps({'indice': {'n_neighbors': 7, 'backend': 'scipy'}}), encoding='utf-8')
+    monkeypatch.delenv('TRUCO_CONFIGURACAO_INDICE', raising=False)
+    assert carregar_configuracao() == CONFIGURACAO_PADRAO
+    monkeypatch.setenv('TRUCO_CONFIGURACAO_INDICE', str(caminho))
+    assert carregar_configuracao()['n_neighbors'] == 7
+
+def test_kdtree_recusa_k_maior_que_a_base(cbr):
+    indice = IndiceKDTree(5).fit(cbr.dataset.iloc[:3])
+    with pytest.raises(ValueError):
+        indice.kneighbors(cbr.dataset.iloc[:1])
+    assert indice.kneighbors(cbr.dataset.iloc[:1], n_neighbors=3)[1].shape == (1, 3)
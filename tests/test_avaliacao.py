@@ -0,0 +1,20 @@
+import numpy as np
+from truco.avaliacao import ALVOS, grade, validacao_cruzada, votar
+
+def test_votar_pondera_e_desempata_pela_primeira_ocorrencia():
+    valores = np.array([[3, 5, 5, 3], [7, 1, 1, 7], [2, 9, 9, 9]])
+    pesos = np.array([[1, 1, 1, 1], [1, 1, 1, 1], [5, 1, 1, 1]])
+    assert votar(valores, pesos).tolist() == [3, 7, 2]
+
+def test_validacao_cruzada(cbr):
+    configuracoes = grade(ks=(5, 20), metricas=('euclidean',), escalas=('nenhuma', 'padrao'), atributos=('robo',))
+    tabela = validacao_cruzada(configuracoes, cbr, folds=3, processos=0)
+    assert len(tabela) == 4
+    assert tabela['acuracia_media'].is_monotonic_decreasing
+    for alvo in ALVOS:
+        assert tabela[f'acuracia_{alvo}'].between(0, 1).all()
+
+    assert (tabela[['latencia_lote_us', 'latencia_unitaria_us', 'ajuste_ms']] > 0).all().all()
+    paralela = validacao_cruzada(configuracoes, cbr, folds=3, processos=2)
+    colunas = ['k', 'escala', 'acuracia_media']
+    assert paralela[colunas].sort_values(['k', 'escala']).reset_index(drop=True).equals(tabela[colunas].sort_values(['k', 'escala']).reset_index(drop=True))
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from pathlib import Path
+from truco.banco import BancoCasos
+from truco.colunas import COLUNAS_CASO
+from truco.dados import Dados
+from truco.fontes import ler_casos_csv
+
+BASE = Path(__file__).resolve().parent.parent / 'dbaprendizadoativo_maos.csv'
+
+@pytest.fixture
+def banco(tmp_path):
+    banco = BancoCasos(tmp_path / 'casos.db')
+    yield banco
+    banco.fechar()
+
+def test_banco_usa_wal_e_cria_indices(banco):
+    assert banco.conexao.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    indices = {linha[1] for linha in banco.conexao.execute("PRAGMA index_list('casos')")}
+    assert {'idx_casos_rodadas', 'idx_casos_truco', 'idx_casos_envido'} <= indices
+
+def test_importar_e_carregar_matriz(banco):
+    df = ler_casos_csv(BASE)
+    assert banco.importar_df(df) == len(df)
+    ids, matriz = banco.carregar_matriz()
+    assert matriz.dtype == np.int16
+    assert matriz.shape == (len(df), len(COLUNAS_CASO))
+    assert np.array_equal(matriz, df[COLUNAS_CASO].to_numpy())
+
+def test_dados_retem_registros_no_banco(banco):
+    banco.inserir([[1] * len(COLUNAS_CASO)])
+    dados = Dados(banco=banco)
+    assert len(dados.retornar_casos()) == 1
+    dados.registro.cartaAltaRobo = 52
+    dados.finalizar_partida()
+    dados.gravador.descarregar()
+    assert banco.carregar_casos().cartaAltaRobo.iloc[-1] == 52
+    assert len(banco.carregar_casos()) == 2
+    dados.fechar()
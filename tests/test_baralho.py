@@ -1,5 +1,6 @@
 import pytest
 import copy 
+import random
 from truco.baralho import Baralho
 from truco.carta import Carta
 
@@ -31,4 +32,10 @@ def test_baralho_embaralhar():
     baralho_original_ordenado = [str(c) for c in baralho.cartas]
     baralho.embaralhar()
     baralho_apos_embaralhar = [str(c) for c in baralho.cartas]
-    assert baralho_original_ordenado != baralho_apos_embaralhar
\ No newline at end of file
+    assert baralho_original_ordenado != baralho_apos_embaralhar
+
+def test_baralho_com_sorteio_reproduz_o_embaralhamento():
+    baralhos = [Baralho(random.Random(7)), Baralho(random.Random(7))]
+    for baralho in baralhos:
+        baralho.embaralhar()
+    assert [carta.retornar_carta() for carta in baralhos[0].cartas] == [carta.retornar_carta() for carta in baralhos[1].cartas]
@@ -10,4 +10,11 @@ def test_criacao_carta():
 
 def test_representacao_str_carta():
     carta = Carta(12, 'Espadas')
-    assert str(carta) == '12 de Espadas'
\ No newline at end of file
+    assert str(carta) == '12 de Espadas'
+
+def test_classificar_cartas_de_mesma_forca():
+    cartas = [Carta(3, 'ESPADAS'), Carta(3, 'OUROS'), Carta(4, 'COPAS')]
+    pontos, ranks = cartas[0].classificar_carta(cartas)
+    assert sorted(ranks) == ['Alta', 'Baixa', 'Media']
+    assert ranks[2] == 'Baixa'
+    assert pontos == [cartas[0].retornar_pontos_carta(c) for c in cartas]
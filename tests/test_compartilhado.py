@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from truco.compartilhado import BaseCompartilhada, anexar, cbr_trabalhador
+
+@pytest.fixture
+def base(cbr):
+    base = BaseCompartilhada(cbr)
+    yield base
+    base.fechar()
+
+def decidir(i):
+    cbr = cbr_trabalhador()
+    registro = cbr.dataset.iloc[[i]]
+    return cbr.jogar_carta(1, [52, 24, 12], registro), cbr.truco('truco', 1, 30, registro), cbr.envido(6, 1, 27, False, registro)
+
+def test_anexar_usa_o_bloco_sem_copiar(cbr, base):
+    anexado = anexar(base.descritor)
+    bloco = np.ndarray(base.tamanho(), dtype=np.uint8, buffer=anexado.memoria.buf)
+    arvore = anexado.nbrs._tree.get_arrays()[0]
+    assert np.shares_memory(arvore, bloco) and not arvore.flags.writeable
+    assert np.shares_memory(anexado.dataset.to_numpy(), bloco)
+    assert anexado.dataset.equals(cbr.dataset)
+    registro = cbr.dataset.iloc[[42]]
+    assert np.array_equal(anexado.vizinhos(registro), cbr.vizinhos(registro))
+
+def test_trabalhadores_decidem_igual_ao_processo_pai(cbr, base):
+    posicoes = list(range(0, 3000, 300))
+    with base.criar_pool(2) as pool:
+        respostas = list(pool.map(decidir, posicoes))
+
+    for i, resposta in zip(posicoes, respostas):
+        registro = cbr.dataset.iloc[[i]]
+        assert resposta == (cbr.jogar_carta(1, [52, 24, 12], registro), cbr.truco('truco', 1, 30, registro), cbr.envido(6, 1, 27, False, registro))
@@ -0,0 +1,39 @@
+import threading
+import numpy as np
+import pytest
+from truco.corretor import CorretorDecisoes
+
+def test_lote_responde_igual_a_consultas_individuais(cbr):
+    corretor = CorretorDecisoes(cbr, tamanho_lote=8, espera=0.05)
+    registros = [cbr.dataset.iloc[[i * 97]] for i in range(8)]
+    respostas = [None] * len(registros)
+    largada = threading.Barrier(len(registros))
+
+    def consultar(i):
+        largada.wait()
+        respostas[i] = corretor.vizinhos(registros[i])
+
+    threads = [threading.Thread(target=consultar, args=(i,)) for i in range(len(registros))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    corretor.fechar()
+
+    for registro, resposta in zip(registros, respostas):
+        assert np.array_equal(resposta, cbr.vizinhos(registro))
+
+    metricas = corretor.metricas()
+    assert metricas['consultas'] == 8
+    assert max(metricas['tamanhos']) > 1
+    assert metricas['espera_max'] >= metricas['espera_p50'] >= 0
+
+def test_decisoes_pelo_corretor(cbr):
+    corretor = CorretorDecisoes(cbr, tamanho_lote=4, espera=0.0001)
+    registro = cbr.dataset.iloc[[10]]
+    assert corretor.jogar_carta(1, [52, 24, 12], registro) == cbr.jogar_carta(1, [52, 24, 12], registro)
+    assert corretor.truco('truco', 1, 30, registro) == cbr.truco('truco', 1, 30, registro)
+    assert corretor.envido(6, 1, 27, False, registro) == cbr.envido(6, 1, 27, False, registro)
+    corretor.fechar()
+    with pytest.raises(RuntimeError):
+        corretor.vizinhos(registro)
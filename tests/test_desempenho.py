@@ -0,0 +1,84 @@
+import itertools
+import random
+import pytest
+from truco.baralho import Baralho
+from truco.dados import Dados
+from truco.desempenho import comparar, medir, tempo_importacao
+from truco.fontes import fontes_padrao
+from truco.jogador import Jogador
+from truco.jogo import Jogo
+
+# Mãos fixas (sem depender do embaralhamento) usadas nos benchmarks das regras do jogo
+MAOS = [mao for mao in itertools.islice(itertools.combinations(Baralho().cartas, 3), 0, 9880, 40)]
+
+
+def test_medir_calibra_as_chamadas():
+    contador = []
+    resultado = medir(lambda: contador.append(1), repeticoes=3, chamadas=10)
+    assert len(contador) == 1 + 3 * 10
+    assert resultado['minimo'] <= resultado['mediana'] <= resultado['maximo']
+
+
+def test_comparar_com_a_referencia():
+    assert comparar({'minimo': 2.0}, None) == (None, False)
+    assert comparar({'minimo': 2.0}, {'minimo': 1.0}, tolerancia=1.5) == (2.0, True)
+    assert comparar({'minimo': 1.2}, {'minimo': 1.0}, tolerancia=1.5)[1] is False
+
+
+@pytest.mark.parametrize('modulo', ['truco.jogo', 'truco.sessao', 'truco.dados', 'truco.cbr'])
+def test_importacao_nao_carrega_dependencias_pesadas(modulo):
+    assert tempo_importacao(modulo)['pesadas'] == []
+
+
+def test_carga_da_base_de_casos(desempenho):
+    dados = Dados(fontes=fontes_padrao(), somente_registro=True)
+    desempenho('dados.tratamento_inicial_df', dados.tratamento_inicial_df, repeticoes=3, chamadas=1)
+
+
+def test_ajuste_do_indice(desempenho, cbr):
+    desempenho('cbr.vizinhos_proximos', cbr.vizinhos_proximos, repeticoes=3, chamadas=1)
+
+
+def test_decisoes_individuais(desempenho, cbr):
+    registro = cbr.dataset.iloc[[7]]
+    desempenho('cbr.jogar_carta', lambda: cbr.jogar_carta(1, [52, 24, 12], registro))
+    desempenho('cbr.truco', lambda: cbr.truco('truco', 1, 30, registro))
+    desempenho('cbr.envido', lambda: cbr.envido(6, 1, 27, False, registro))
+
+
+def test_decisoes_em_lote(desempenho, cbr):
+    matriz = cbr.dataset.iloc[::100].to_numpy()[:64]
+
+    def decidir():
+        _, indices = cbr.consultar(matriz)
+        for vizinhos in indices:
+            cbr.truco('truco', 1, 30, vizinhos=vizinhos)
+
+    desempenho('cbr.consultar', lambda: cbr.consultar(matriz))
+    desempenho('cbr.truco_lote_64', decidir, repeticoes=3)
+
+
+def test_carta_vencedora(desempenho):
+    jogo = Jogo()
+    pares = list(itertools.product(Baralho().cartas, repeat=2))
+    desempenho('jogo.verificar_carta_vencedora', lambda: [jogo.verificar_carta_vencedora(a, b) for a, b in pares])
+
+
+def test_classificar_carta(desempenho):
+    desempenho('carta.classificar_carta', lambda: [mao[0].classificar_carta(list(mao)) for mao in MAOS])
+
+
+def test_calcula_envido(desempenho):
+    jogador = Jogador('Jogador')
+    desempenho('jogador.calcula_envido', lambda: [jogador.calcula_envido(list(mao)) for mao in MAOS])
+
+
+def test_baralho_distribuir(desempenho):
+    random.seed(0)
+
+    def distribuir():
+        baralho = Baralho()
+        baralho.embaralhar()
+        return [baralho.retirar_carta() for _ in range(6)]
+
+    desempenho('baralho.distribuir', distribuir)
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from truco.cbr import Cbr
+from truco.distancia import DistanciaSentinela
+
+def _distancias_diretas(indice, casos, consulta, penalidade):
+    presentes = ~np.isin(casos, (-100, -66))
+    presente_consulta = ~np.isin(consulta, (-100, -66))
+    escalados = (casos - indice.centro) / indice.largura
+    escalada = (consulta - indice.centro) / indice.largura
+    ambos = presentes & presente_consulta
+    um = presentes ^ presente_consulta
+    return np.sqrt((indice.pesos * (np.where(ambos, (escalados - escalada) ** 2, 0) + um * penalidade ** 2)).sum(axis=1))
+
+def test_vizinhos_iguais_ao_calculo_direto_em_blocos():
+    sorteio = np.random.default_rng(0)
+    casos = sorteio.integers(0, 40, size=(500, 6)).astype(np.float64)
+    casos[sorteio.random(casos.shape) < 0.2] = -100
+    casos[:, 5][sorteio.random(500) < 0.3] = -66
+    colunas = ['a', 'b', 'c', 'd', 'e', 'naipe']
+    indice = DistanciaSentinela(n_neighbors=7, penalidade=1.5, pesos_colunas={'b': 4}, bloco=64).fit(pd.DataFrame(casos, columns=colunas))
+    distancias, indices = indice.kneighbors(casos[:10])
+    for linha in range(10):
+        esperadas = _distancias_diretas(indice, casos, casos[linha], 1.5)
+        ordem = np.lexsort((np.arange(len(esperadas)), esperadas))[:7]
+        assert indices[linha].tolist() == ordem.tolist()
+        assert np.allclose(distancias[linha], esperadas[ordem], atol=1e-6)
+
+def test_sentinela_vale_a_penalidade_e_nao_a_diferenca_bruta():
+    casos = pd.DataFrame({'x': [1.0, 3.0, 1.0, 1.0], 'y': [2.0, 2.0, -100.0, 4.0]})
+    indice = DistanciaSentinela(n_neighbors=4, escala='nenhuma', penalidade=0.5).fit(casos)
+    distancias, indices = indice.kneighbors(np.array([[1.0, 2.0], [1.0, -100.0]]))
+    # ausente de um lado só custa a penalidade; o -100 não entra na diferença
+    assert indices[0].tolist() == [0, 2, 1, 3]
+    assert np.allclose(distancias[0], [0, 0.5, 2, 2])
+    # ausente dos dois lados não contribui
+    assert indices[1][0] == 2 and distancias[1][0] == pytest.approx(0, abs=1e-6)
+
+def test_cbr_com_backend_sentinela():
+    cbr = Cbr(configuracao={'backend': 'sentinela', 'penalidade': 2.0})
+    assert isinstance(cbr.nbrs, DistanciaSentinela)
+    registro = cbr.dataset.iloc[[10]]
+    vizinhos = cbr.vizinhos(registro)
+    assert len(vizinhos) == 100 and vizinhos[0] == 10
+    assert cbr.jogar_carta(1, [52, 24, 7], registro=registro) in (-1, 0, 1, 2)
+    assert cbr.truco('truco', 1, 40, registro=registro) in (0, 1, 2)
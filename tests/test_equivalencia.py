@@ -0,0 +1,33 @@
+from truco.cbr import Cbr
+from truco.equivalencia import simular_partidas, verificar_equivalencia
+
+class SempreFugir():
+    """Candidato que concorda com o Cbr em tudo, menos no truco."""
+    def __init__(self, cbr):
+        self.cbr = cbr
+
+    def jogar_carta(self, *args, **kwargs):
+        return self.cbr.jogar_carta(*args, **kwargs)
+
+    def truco(self, tipo, quem_pediu, qualidade_mao_bot, registro=None):
+        return 0
+
+    def envido(self, *args, **kwargs):
+        return self.cbr.envido(*args, **kwargs)
+
+def test_referencia_concorda_consigo_mesma(cbr):
+    relatorio = verificar_equivalencia(cbr=cbr, casos=40, partidas=3, processos=0)
+    assert relatorio['origens']['base'] == 120 and relatorio['origens']['simulacao'] > 0
+    assert relatorio['geral']['concordancia'] == 1.0 and relatorio['divergencias'] == []
+
+def test_divergencias_em_processos_trabalhadores(cbr):
+    relatorio = verificar_equivalencia(f'{__name__}:SempreFugir', cbr=cbr, casos=60, partidas=0, processos=2)
+    decisoes = relatorio['decisoes']
+    assert decisoes['jogar_carta']['concordancia'] == 1.0 and decisoes['envido']['concordancia'] == 1.0
+    assert decisoes['truco']['total'] == 60 and decisoes['truco']['concordancia'] < 1.0
+    assert all(divergencia['decisao'] == 'truco' and divergencia['candidato'] == 0 for divergencia in relatorio['divergencias'])
+
+def test_simulacao_reproduzivel_pela_semente(cbr):
+    primeiro = simular_partidas(cbr, 3, semente=5)
+    assert len(primeiro) > 0
+    assert simular_partidas(cbr, 3, semente=5) == primeiro
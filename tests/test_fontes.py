@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+from truco.colunas import COLUNAS_CASO
+from truco.dados import Dados
+from truco.fontes import EspacoInsuficiente, FonteCasos, carregar_fontes, contar_linhas, deduplicar_casos, ler_casos_csv, ler_casos_em
+
+def test_deduplicar_soma_pesos_e_mantem_ordem():
+    casos = pd.DataFrame({'a': [3, 1, 3, 2, 1], 'b': [0, 0, 0, 5, 0]}, dtype='int16')
+    unicos, pesos = deduplicar_casos(casos, np.array([1, 1, 2, 1, 1]))
+    assert unicos.values.tolist() == [[3, 0], [1, 0], [2, 5]]
+    assert pesos.tolist() == [3, 2, 1]
+    assert unicos.index.name == 'idMao'
+    assert deduplicar_casos(casos, com_inverso=True)[2].tolist() == [0, 1, 0, 2, 1]
+
+def test_fonte_com_dialeto_e_mapeamento(tmp_path):
+    caminho = tmp_path / 'casos.csv'
+    caminho.write_text('mao;altaRobo;naipeCartaAltaRobo\n1;52;ESPADAS\n2;NULL;OURO\n')
+    fonte = FonteCasos(caminho, sep=';', mapeamento={'mao': 'jogadorMao', 'altaRobo': 'cartaAltaRobo'}, peso=3)
+    casos, pesos = carregar_fontes([fonte])
+    assert list(casos.columns) == COLUNAS_CASO
+    assert casos.cartaAltaRobo.tolist() == [52, -100]
+    assert casos.naipeCartaAltaRobo.tolist() == [1, 2]
+    assert casos.quemTruco.tolist() == [-100, -100]
+    assert pesos.tolist() == [3, 3]
+
+def test_dados_unifica_fontes_padrao():
+    dados = Dados()
+    casos = dados.retornar_casos()
+    pesos = dados.retornar_pesos()
+    assert all(casos.dtypes == 'int16')
+    assert len(pesos) == len(casos)
+    assert not casos.duplicated().any()
+    assert pesos.sum() > len(casos)
+
+def test_leitura_em_blocos_pequenos_igual_a_leitura_unica(tmp_path):
+    caminho = tmp_path / 'casos.csv'
+    caminho.write_text('idMao\tcartaAltaRobo\tnaipeCartaAltaRobo\n' + '\n'.join(f'{i}\t{i % 50}\t{["ESPADAS", "COPAS", "NULL"][i % 3]}' for i in range(1, 101)))
+    assert contar_linhas(caminho) == 100
+    inteiro = ler_casos_csv(caminho)
+    blocos = ler_casos_csv(caminho, tamanho_bloco=7)
+    assert inteiro.equals(blocos)
+    assert blocos.naipeCartaAltaRobo.tolist()[:3] == [4, -100, 1]
+
+def test_carregar_fontes_em_arquivo_binario(tmp_path):
+    caminho = tmp_path / 'casos.csv'
+    caminho.write_text('cartaAltaRobo,cartaMediaRobo\n52,24\n12,NULL\n')
+    destino = tmp_path / 'casos.npy'
+    casos, _ = carregar_fontes([FonteCasos(caminho, sep=','), FonteCasos(caminho, sep=',')], destino=destino)
+    matriz = np.load(destino, mmap_mode='r')
+    assert matriz.dtype == np.int16
+    assert matriz.shape == (4, len(COLUNAS_CASO))
+    assert casos.cartaMediaRobo.tolist() == [24, -100, 24, -100]
+
+def test_arquivo_binario_sem_linhas_em_branco_e_erro_de_espaco(tmp_path):
+    caminho = tmp_path / 'casos.csv'
+    caminho.write_text('cartaAltaRobo,cartaMediaRobo\n52,24\n12,NULL\n\n\n')
+    destino = tmp_path / 'casos.npy'
+    casos, pesos = carregar_fontes([FonteCasos(caminho, sep=',')], destino=destino)
+    assert len(casos) == 2 and len(pesos) == 2
+    assert np.load(destino, mmap_mode='r').shape == (2, len(COLUNAS_CASO))
+    assert casos.cartaAltaRobo.tolist() == [52, 12]
+    with pytest.raises(EspacoInsuficiente):
+        ler_casos_em(np.empty((1, len(COLUNAS_CASO)), dtype=np.int16), caminho, sep=',')
+
+def test_pesos_lidos_na_mesma_passada_dos_casos(tmp_path):
+    caminho = tmp_path / 'condensada.csv'
+    caminho.write_text('cartaAltaRobo\tpeso\n52\t3\n\n12\tNULL\n7\t2\n')
+    casos, pesos = carregar_fontes([FonteCasos(caminho, coluna_peso='peso', peso=2), FonteCasos(caminho)], tamanho_bloco=2)
+    assert casos.cartaAltaRobo.tolist() == [52, 12, 7, 52, 12, 7]
+    assert pesos.tolist() == [6, 2, 4, 1, 1, 1]
+
+def test_pesos_fracionarios(tmp_path):
+    caminho = tmp_path / 'condensada.csv'
+    caminho.write_text('cartaAltaRobo\tpeso\n52\t1.5\n12\t3\n')
+    casos, pesos = carregar_fontes([FonteCasos(caminho, coluna_peso='peso', peso=0.5), FonteCasos(caminho, peso=0.5)])
+    assert pesos.dtype == np.float64
+    assert pesos.tolist() == [0.75, 1.5, 0.5, 0.5]
+    _, somados = deduplicar_casos(casos, pesos)
+    assert somados.tolist() == [1.25, 2.0]
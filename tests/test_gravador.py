@@ -0,0 +1,76 @@
+import pandas as pd
+import pytest
+from truco.gravador import DestinoCsv, ErroGravacao, GravadorCasos
+
+def criar_registro(valor):
+    registro = pd.DataFrame({'idMao': [0], 'jogadorMao': [1], 'cartaAltaRobo': [valor]}).set_index('idMao')
+    return registro
+
+def test_gravador_escreve_em_lotes_com_cabecalho(tmp_path):
+    caminho = tmp_path / 'jogadas.csv'
+    gravador = GravadorCasos(DestinoCsv(caminho), intervalo=60, tamanho_lote=2)
+    for valor in [52, 24, 12]:
+        gravador.adicionar(criar_registro(valor))
+    gravador.fechar()
+
+    df = pd.read_csv(caminho, index_col='idMao')
+    assert df.cartaAltaRobo.tolist() == [52, 24, 12]
+    assert caminho.read_text().startswith('idMao,jogadorMao,cartaAltaRobo\n')
+
+def test_gravador_mantem_arquivo_existente(tmp_path):
+    caminho = tmp_path / 'jogadas.csv'
+    criar_registro(7).to_csv(caminho)
+    gravador = GravadorCasos(DestinoCsv(caminho), fsync='nunca')
+    gravador.adicionar(criar_registro(8))
+    gravador.descarregar()
+    assert pd.read_csv(caminho).cartaAltaRobo.tolist() == [7, 8]
+    gravador.fechar()
+
+def test_gravador_fechado_recusa_registros(tmp_path):
+    gravador = GravadorCasos(DestinoCsv(tmp_path / 'jogadas.csv'))
+    gravador.fechar()
+    with pytest.raises(RuntimeError):
+        gravador.adicionar(criar_registro(1))
+
+def test_politica_fsync_invalida(tmp_path):
+    with pytest.raises(ValueError):
+        GravadorCasos(DestinoCsv(tmp_path / 'jogadas.csv'), fsync='sempre')
+
+class DestinoInstavel():
+    """Destino que falha nas primeiras `falhas` escritas."""
+    def __init__(self, falhas):
+        self.falhas = falhas
+        self.linhas = []
+
+    def escrever(self, colunas, linhas):
+        if (self.falhas > 0):
+            self.falhas -= 1
+            raise OSError('disco cheio')
+
+        self.linhas.extend(linhas)
+
+    def sincronizar(self):
+        pass
+
+    def fechar(self):
+        pass
+
+def test_gravador_mantem_lotes_que_falharam_e_junta_os_erros():
+    destino = DestinoInstavel(falhas=2)
+    gravador = GravadorCasos(destino, intervalo=60, tamanho_lote=1)
+    for valor in [52, 24, 12]:
+        gravador.adicionar(criar_registro(valor))
+    with pytest.raises(ErroGravacao) as erro:
+        gravador.descarregar()
+    assert len(erro.value.erros) == 2 and erro.value.pendentes == []
+    assert [linha[-1] for linha in destino.linhas] == [52, 24, 12]
+    gravador.fechar()
+
+def test_gravador_informa_linhas_pendentes_no_fechamento():
+    gravador = GravadorCasos(DestinoInstavel(falhas=10), intervalo=60, tamanho_lote=1)
+    gravador.adicionar(criar_registro(7))
+    gravador.adicionar(criar_registro(8))
+    with pytest.raises(ErroGravacao) as erro:
+        gravador.fechar()
+    assert len(erro.value.erros) == 3
+    assert [linha[-1] for linha in erro.value.pendentes] == [7, 8]
@@ -0,0 +1,40 @@
+import random
+import numpy as np
+from truco.equivalencia import Descartar
+from truco.incremental import ConsultaIncremental
+from truco.sessao import SessaoJogo
+
+def _exatos(cbr, registro):
+    casos = cbr.dataset.to_numpy(dtype=np.float64)
+    distancias = ((casos - registro.to_numpy(dtype=np.float64)) ** 2).sum(axis=1)
+    return np.lexsort((np.arange(len(casos)), distancias))[:100]
+
+def test_rodadas_da_mesma_mao_usam_os_candidatos_e_continuam_exatas(cbr):
+    consulta = ConsultaIncremental(cbr)
+    registro = cbr.dataset.iloc[[42]].copy()
+    assert consulta.vizinhos(registro).tolist() == _exatos(cbr, registro).tolist()
+    for coluna, valor in [('primeiraCartaRobo', 7), ('ganhadorPrimeiraRodada', 1), ('segundaCartaHumano', 12), ('quemTruco', 2)]:
+        registro[coluna] = valor
+        assert consulta.vizinhos(registro).tolist() == _exatos(cbr, registro).tolist()
+
+    assert consulta.contagem['completas'] == 1
+    assert consulta.contagem['incrementais'] + consulta.contagem['refeitas'] == 4
+    assert consulta.contagem['incrementais'] >= 1
+
+def test_outra_mao_refaz_a_busca(cbr):
+    consulta = ConsultaIncremental(cbr)
+    consulta.vizinhos(cbr.dataset.iloc[[1]])
+    outra = cbr.dataset.iloc[[2]].copy()
+    outra['cartaAltaRobo'] = cbr.dataset.iloc[1]['cartaAltaRobo'] + 1
+    assert consulta.vizinhos(outra).tolist() == _exatos(cbr, outra).tolist()
+    assert consulta.contagem['completas'] == 2
+
+def test_sessao_incremental_joga_ate_o_fim(cbr):
+    sorteio = random.Random(3)
+    sessao = SessaoJogo(cbr, gravador=Descartar(), incremental=True, sorteio=random.Random(3))
+    pendente = sessao.iniciar()
+    while not (sessao.terminada):
+        pendente = sessao.jogar(sorteio.choice(pendente.opcoes))
+
+    contagem = sessao.cbr.cbr.contagem
+    assert contagem['completas'] >= 1 and sum(contagem.values()) > contagem['completas']
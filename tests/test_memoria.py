@@ -0,0 +1,34 @@
+import json
+import tracemalloc
+from truco.memoria import medir_alocacao, relatorio_memoria
+
+def test_medir_alocacao_conta_o_que_continua_alocado():
+    tracemalloc.start()
+    try:
+        lista, alocado, linhas = medir_alocacao(lambda: [bytearray(1000) for _ in range(100)], top=1)
+        _, liberado, _ = medir_alocacao(lambda: len([bytearray(1000) for _ in range(100)]))
+    finally:
+        tracemalloc.stop()
+
+    assert alocado >= 100 * 1000 and len(linhas) == 1
+    assert liberado < 10000
+
+def test_relatorio_memoria():
+    relatorio = relatorio_memoria(sessoes=3, partidas=5)
+    base = relatorio['base']
+    assert base['colunas'] == 52 and base['array'] == base['casos'] * 52 * 2
+    # a árvore guarda os casos em float64: pelo menos 4 vezes o array int16
+    assert base['arvore'] >= 4 * base['array']
+    assert relatorio['sessao']['quantidade'] == 3 and relatorio['sessao']['bytes_por_registro'] > 0
+    assert relatorio['jogo']['bytes_por_carta'] > 0
+    assert not tracemalloc.is_tracing()
+
+def test_relatorio_memoria_com_outro_backend(tmp_path, monkeypatch):
+    caminho = tmp_path / 'configuracao_indice.json'
+    caminho.write_text(json.dumps({'indice': {'backend': 'scipy'}}), encoding='utf-8')
+    monkeypatch.setenv('TRUCO_CONFIGURACAO_INDICE', str(caminho))
+    relatorio = relatorio_memoria(sessoes=1, partidas=1)
+    base = relatorio['base']
+    # a cópia float64 dos casos feita pelo cKDTree aparece no snapshot
+    assert base['indice'] >= 4 * base['array']
+    assert base['arvore'] is None and base['fit_x_compartilhado'] is None
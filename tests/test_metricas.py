@@ -0,0 +1,51 @@
+import json
+from truco.metricas import Histograma, Metricas
+
+def test_histograma_percentis_com_erro_relativo_pequeno():
+    histograma = Histograma()
+    for valor in range(1, 100001):
+        histograma.registrar(valor * 1000)
+
+    assert histograma.quantidade == 100000 and histograma.maximo == 100000000
+    for q in (0.5, 0.9, 0.99):
+        assert abs(histograma.percentil(q) - q * 100000000) / (q * 100000000) < 0.04
+
+    assert histograma.percentil(1.0) == 100000000
+    assert Histograma().percentil(0.5) == 0
+
+def test_decisoes_registram_fases_e_contadores(cbr):
+    metricas = Metricas(ativo=True)
+    cbr.metricas = metricas
+    try:
+        registro = cbr.dataset.iloc[[7]]
+        cbr.truco('truco', 1, 30, registro)
+        cbr.envido(6, 1, 27, False, registro)
+        _, indices = cbr.consultar(registro.to_numpy())
+        cbr.jogar_carta(1, [52, 24, 12], vizinhos=indices[0])
+    finally:
+        cbr.metricas = Metricas()
+
+    instantaneo = json.loads(metricas.exportar_json())
+    contadores = {c['rotulos']['decisao']: c['valor'] for c in instantaneo['contadores'] if c['nome'] == 'decisoes_total'}
+    assert contadores == {'truco': 1, 'envido': 1, 'jogar_carta': 1}
+    fases = {(h['rotulos']['decisao'], h['rotulos']['fase']) for h in instantaneo['histogramas'] if h['nome'] == 'decisao_fase_segundos'}
+    assert ('truco', 'consulta') in fases and ('envido', 'agregacao') in fases
+    # com os vizinhos já calculados não há fase de consulta
+    assert ('jogar_carta', 'consulta') not in fases and ('jogar_carta', 'recorte') in fases
+
+    texto = metricas.exportar_prometheus()
+    assert '# TYPE truco_decisao_segundos summary' in texto
+    assert 'truco_decisoes_total{decisao="truco"} 1' in texto
+    assert 'truco_decisao_segundos_count{decisao="envido"} 1' in texto
+
+def test_desativadas_nao_registram_nada(cbr, tmp_path):
+    metricas = Metricas()
+    cbr.metricas = metricas
+    cbr.truco('truco', 1, 30, cbr.dataset.iloc[[3]])
+    metricas.incrementar('vizinhos_vazios_total', coluna='x')
+    assert metricas.instantaneo() == {'contadores': [], 'histogramas': []}
+
+    metricas.ativar()
+    metricas.incrementar('cache_total', cache='modelo_registro', resultado='acerto')
+    metricas.salvar(tmp_path / 'metricas.prom')
+    assert (tmp_path / 'metricas.prom').read_text() == '# TYPE truco_cache_total counter\ntruco_cache_total{cache="modelo_registro",resultado="acerto"} 1\n'
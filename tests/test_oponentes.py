@@ -0,0 +1,68 @@
+import random
+from unittest.mock import MagicMock
+from truco.bot import Bot
+from truco.carta import Carta
+from truco.dados import Dados
+from truco.equivalencia import Descartar
+from truco.oponentes import HUMANO, ROBO, CacheOponentes, PerfilOponente
+from truco.sessao import SessaoJogo
+
+def _registro(**valores):
+    registro = Dados(somente_registro=True).retornar_registro()
+    for coluna, valor in valores.items():
+        registro[coluna] = valor
+
+    return registro
+
+def test_perfil_soma_as_maos_do_registro():
+    perfil = PerfilOponente()
+    assert perfil.resumo()['taxa_blefe_truco'] is None
+    perfil.atualizar(_registro(quemTruco=HUMANO, quemGanhouTruco=ROBO, primeiraCartaHumano=10))
+    perfil.atualizar(_registro(quemTruco=HUMANO, quemGanhouTruco=HUMANO, quemPediuEnvido=ROBO, quemNegouEnvido=HUMANO))
+    perfil.atualizar(_registro(quemPediuEnvido=ROBO, primeiraCartaHumano=4))
+    # força de truco das cartas 10 (6) e 4 (1), não o número
+    assert perfil.resumo() == {'maos': 3, 'taxa_blefe_truco': 0.5, 'taxa_aceite_envido': 0.5, 'forca_primeira_carta': 3.5}
+    assert not perfil.blefa_no_truco()
+    bot = Bot('Bot')
+    cbr = MagicMock(oponente=PerfilOponente(trucos=5, blefes=4))
+    cbr.truco.return_value = 0
+    assert bot.avaliar_truco(cbr, 'truco', 1) == 1
+
+def test_cache_lru_limitado_e_gravado_em_disco(tmp_path):
+    caminho = tmp_path / 'perfis.json'
+    cache = CacheOponentes(caminho, capacidade=2)
+    cache.atualizar('ana', _registro(quemTruco=HUMANO))
+    cache.atualizar('bia', _registro())
+    cache.perfil('ana')
+    cache.atualizar('caio', _registro())
+    assert list(cache.perfis) == ['ana', 'caio']
+    cache.salvar()
+    lido = CacheOponentes(caminho, capacidade=2)
+    assert list(lido.perfis) == ['ana', 'caio']
+    assert lido.perfil('ana').contadores() == cache.perfil('ana').contadores()
+    assert lido.perfil('ana').trucos == 1
+
+def test_forca_da_primeira_carta_jogada():
+    dados = Dados(somente_registro=True)
+    espadao = Carta(1, 'ESPADAS')
+    dados.segunda_rodada(espadao, Carta(4, 'COPAS'), 2)
+    perfil = PerfilOponente()
+    perfil.atualizar(dados.retornar_registro())
+    dados.resetar_registro()
+    dados.segunda_rodada(Carta(1, 'OUROS'), Carta(4, 'COPAS'), 1)
+    perfil.atualizar(dados.retornar_registro())
+    assert perfil.forca_primeira_carta() == (espadao.retornar_pontos_carta(espadao) + 12) / 2
+
+def test_sessao_atualiza_o_perfil_a_cada_mao(cbr):
+    cache = CacheOponentes()
+    sorteio = random.Random(5)
+    sessao = SessaoJogo(cbr, 'ana', gravador=Descartar(), oponentes=cache, sorteio=random.Random(5))
+    pendente = sessao.iniciar()
+    while not (sessao.terminada):
+        pendente = sessao.jogar(sorteio.choice(pendente.opcoes))
+
+    perfil = cache.perfil('ana')
+    assert perfil.maos >= 1
+    assert sessao.cbr.oponente is perfil
+    assert perfil.blefes <= perfil.trucos and perfil.envidos_aceitos <= perfil.envidos_recebidos
+    assert perfil.primeiras_cartas == 0 or 1 <= perfil.forca_primeira_carta() <= 52
@@ -0,0 +1,79 @@
+import math
+from unittest.mock import MagicMock
+from truco.bot import Bot
+from truco.dados import Dados
+from truco.fontes import FonteCasos
+from truco.oponentes import PerfilOponente
+from truco.sessao import SessaoJogo
+
+CABECALHO = 'idMao\tidPartida\ttentosPosterioresRobo\ttentosPosterioresHumano\tquemTruco\tquemNegouTruco\tquemPediuEnvido\tquemNegouEnvido\n'
+
+def _dados(tmp_path):
+    caminho = tmp_path / 'maos.csv'
+    # mãos das partidas intercaladas no arquivo, como nas bases do projeto; a última repete os atributos da primeira
+    caminho.write_text(CABECALHO + '1\ta\t1\t0\t2\t2\t0\t0\n2\tb\t0\t3\t1\t0\t2\t0\n3\ta\t3\t1\t1\t2\t2\t0\n'
+                       '4\tb\t2\t4\t2\t0\tNULL\t0\n5\ta\t3\t4\t2\t0\t1\t2\n6\tb\t2\t5\t2\t2\t0\t0\n')
+    return Dados(fontes=[FonteCasos(caminho)])
+
+def test_maos_de_cada_partida_ficam_contiguas_e_ligadas_aos_casos(tmp_path):
+    dados = _dados(tmp_path)
+    indice = dados.retornar_partidas()
+    assert len(indice) == 2 and 'a' in indice
+    assert indice.intervalo('a') == (0, 3)
+    assert indice.maos_da_partida('a').idMao.tolist() == [1, 3, 5]
+    assert indice.maos_da_partida('b').linha.tolist() == [1, 3, 5]
+    assert indice.trajetoria('a').tolist() == [[1, 0], [3, 1], [3, 4]]
+    # a mão 6 virou o mesmo caso da mão 1 na deduplicação
+    assert len(dados.retornar_casos()) == 5
+    assert indice.casos_da_partida('b').tolist() == [1, 3, 0]
+    assert dados.retornar_casos().quemTruco.iloc[indice.casos_da_partida('a')].tolist() == [2, 1, 2]
+
+def test_agregados_e_contexto_da_partida(tmp_path):
+    indice = _dados(tmp_path).retornar_partidas()
+    resumo = indice.resumo('a')
+    assert resumo['maos'] == 3
+    assert (resumo['placarRobo'], resumo['placarHumano'], resumo['saldo']) == (3, 4, -1)
+    assert resumo['taxaTrucoHumano'] == 2 / 3
+    assert resumo['taxaEnvidoHumano'] == 1 / 3
+    # recusas só contam nas mãos em que o bot pediu: a da mão 1 foi depois de um truco do humano
+    assert resumo['taxaNegouTrucoHumano'] == 1.0
+    assert resumo['taxaNegouEnvidoHumano'] == 1.0
+    assert indice.resumo('b')['taxaNegouTrucoHumano'] == 0.0
+    assert math.isnan(indice.resumo('b')['taxaNegouEnvidoHumano'])
+    # o caso 0 vem de uma mão de cada partida
+    contexto = indice.contexto([0])
+    assert (contexto['trucosRobo'], contexto['negouTrucoHumano']) == (2, 1)
+    assert contexto['taxaNegouEnvidoHumano'] == 1.0
+
+def test_dados_indexa_as_partidas_das_fontes_padrao():
+    dados = Dados()
+    partidas = dados.retornar_partidas()
+    assert len(partidas) > 100
+    for id_partida in list(partidas.agregados.index[:10]):
+        maos = partidas.maos_da_partida(id_partida)
+        assert (maos.idPartida == id_partida).all()
+        assert len(maos) == partidas.resumo(id_partida)['maos']
+        casos = dados.retornar_casos().iloc[partidas.casos_da_partida(id_partida)]
+        assert (casos.quemTruco.to_numpy() == maos.quemTruco.to_numpy()).all()
+
+def test_bot_pede_envido_pelo_contexto_das_partidas_vizinhas(cbr):
+    contexto = SessaoJogo(cbr).cbr.contexto_partidas()
+    assert contexto['envidosRobo'] > 0 and 0 <= contexto['taxaNegouEnvidoHumano'] <= 1
+    bot = Bot('Bot')
+    sessao = MagicMock(oponente=None)
+    sessao.envido.return_value = 0
+    sessao.contexto_partidas.return_value = {'envidosRobo': 10, 'taxaNegouEnvidoHumano': 0.8}
+    assert bot.avaliar_envido(sessao, 'Envido', 2, 0) == 6
+    # com observações suficientes do próprio oponente, que aceita o envido, o contexto não muda a escolha
+    sessao.oponente = PerfilOponente(envidos_recebidos=6, envidos_aceitos=6)
+    assert bot.avaliar_envido(sessao, 'Envido', 2, 0) == 0
+
+def test_contexto_reaproveita_os_vizinhos_do_envido(cbr, monkeypatch):
+    sessao = SessaoJogo(cbr).cbr
+    consultas = []
+    vizinhos = cbr.vizinhos
+    monkeypatch.setattr(cbr, 'vizinhos', lambda registro: consultas.append(1) or vizinhos(registro))
+    sessao.envido(6, 2, 7, False)
+    contexto = sessao.contexto_partidas()
+    assert len(consultas) == 1
+    assert contexto == cbr.dados.retornar_partidas().contexto(vizinhos(sessao.dados.retornar_registro()))
@@ -0,0 +1,40 @@
+import pickle
+import numpy as np
+import pytest
+from truco.cbr import CONFIGURACAO_PADRAO, Cbr, criar_indice
+from truco.projecao import IndiceProjetado, ajustar_projecao, avaliar_projecoes, salvar_projecao
+
+def test_pca_completa_preserva_os_vizinhos(cbr):
+    projetado = Cbr(cbr.dados, configuracao={'projecao': 'pca', 'componentes': cbr.dataset.shape[1]})
+    assert isinstance(projetado.nbrs, IndiceProjetado)
+    matriz = cbr.dataset.to_numpy()[:20]
+    distancias, indices = cbr.consultar(matriz)
+    projetadas, indices_projetados = projetado.consultar(matriz)
+    assert np.allclose(distancias, projetadas, atol=1e-6)
+    assert (indices[:, 0] == indices_projetados[:, 0]).all()
+
+def test_mapa_gravado_e_serializado_com_o_indice(cbr, tmp_path):
+    caminho = tmp_path / 'pca_8.npz'
+    centro, mapa = ajustar_projecao(cbr.dataset, 'pca', 8)
+    assert mapa.shape == (cbr.dataset.shape[1], 8)
+    salvar_projecao(caminho, centro, mapa)
+    projetado = Cbr(cbr.dados, configuracao={'projecao': str(caminho), 'componentes': 8})
+    copia = pickle.loads(pickle.dumps(projetado.nbrs))
+    matriz = cbr.dataset.to_numpy()[:5]
+    assert np.allclose(copia.projetar(matriz), (matriz - centro) @ mapa)
+    assert (copia.kneighbors(matriz)[1] == projetado.consultar(matriz)[1]).all()
+
+def test_relatorio_de_aceleracao_e_decisoes_alteradas(cbr):
+    relatorio = avaliar_projecoes(cbr, componentes=(4, cbr.dataset.shape[1]), casos=20)
+    reduzida, completa = relatorio['projecoes']
+    assert relatorio['itens'] == 60
+    assert 0 <= reduzida['decisoes_alteradas'] <= 1 and reduzida['aceleracao'] > 0
+    assert completa['decisoes_alteradas'] < 0.05
+
+def test_projecao_recusa_backends_e_nca_sem_mapa():
+    for backend in ('sentinela', 'sequencia'):
+        with pytest.raises(ValueError):
+            criar_indice(dict(CONFIGURACAO_PADRAO, backend=backend, projecao='pca'))
+    with pytest.raises(ValueError):
+        criar_indice(dict(CONFIGURACAO_PADRAO, projecao='nca'))
+    assert isinstance(criar_indice(dict(CONFIGURACAO_PADRAO, backend='scipy', projecao='pca')), IndiceProjetado)
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+from truco.dados import Dados
+from truco.fontes import FonteCasos
+from truco.prototipos import avaliar_condensacao, cbr_condensado, condensar, condensar_cnn, salvar_base
+
+def test_cnn_mantem_um_prototipo_por_regiao_e_soma_os_pesos():
+    casos = pd.DataFrame({'x': [0, 1, 2, 10, 11, 12], 'primeiraCartaRobo': [1, 1, 1, 2, 2, 2], 'quemGanhouTruco': 1, 'quemGanhouEnvido': 1})
+    posicoes, pesos = condensar_cnn(casos, np.array([1, 2, 3, 1, 1, 1]))
+    assert len(posicoes) == 2
+    assert sorted(casos.primeiraCartaRobo.iloc[posicoes]) == [1, 2]
+    assert sorted(pesos.tolist()) == [3, 6]
+
+def test_agrupamento_preserva_o_peso_total(cbr):
+    casos, pesos = condensar(cbr, 'agrupamento', fracao=0.2)
+    assert len(casos) == pytest.approx(0.2 * len(cbr.dataset), rel=0.05)
+    assert pesos.sum() == cbr.pesos.sum()
+    assert list(casos.columns) == list(cbr.dataset.columns)
+
+def test_base_condensada_gravada_e_avaliada(cbr, tmp_path):
+    casos, pesos = condensar(cbr, 'agrupamento', fracao=0.5)
+    caminho = tmp_path / 'base_condensada.csv'
+    salvar_base(caminho, casos, pesos)
+    dados = Dados(fontes=[FonteCasos(caminho, coluna_peso='peso')])
+    assert dados.retornar_casos().to_numpy().tolist() == casos.to_numpy().tolist()
+    assert dados.retornar_pesos().tolist() == pesos.tolist()
+    condensado = cbr_condensado(cbr, casos, pesos)
+    assert condensado.configuracao['n_neighbors'] == round(100 * len(casos) / len(cbr.dataset))
+    relatorio = avaliar_condensacao(cbr, condensado, casos=50, partidas=0)
+    assert relatorio['fracao'] == pytest.approx(0.5, abs=0.03)
+    assert relatorio['memoria']['condensada'] < relatorio['memoria']['completa']
+    # medido: 134 de 150 decisões iguais (0.89), com todas as de truco iguais
+    assert relatorio['geral']['concordancia'] >= 0.85
+    assert relatorio['decisoes']['truco']['concordancia'] == 1.0
@@ -0,0 +1,58 @@
+import pytest
+from truco.carta import Carta
+from truco.interface import Interface
+from truco.saida import Saida, SaidaBuffer, SaidaConsole, SaidaEventos, SaidaNula
+from truco.truco import Truco
+
+def test_console_mantem_formato_original(capsys):
+    interface = Interface(SaidaConsole())
+    interface.mostrar_carta_jogada('João', Carta(7, 'OUROS'))
+    interface.mostrar_placar_total('João', 3, 'Bot', 5)
+    saida = capsys.readouterr().out
+    assert saida.startswith('João jogou a carta: 7 de OUROS\n╔')
+    assert '║ Pontuação Total' in saida
+    assert 'Jogador 2 - Bot: 5 Pontos Acumulados' in saida
+
+def test_saida_nula_nao_escreve(capsys):
+    interface = Interface(SaidaNula())
+    interface.mostrar_mao([Carta(1, 'ESPADAS'), Carta(3, 'COPAS')])
+    interface.mostrar_ganhador_jogo('João')
+    assert capsys.readouterr().out == ''
+
+def test_saida_sem_emitir_nao_pode_ser_criada():
+    with pytest.raises(TypeError):
+        Saida()
+
+def test_buffer_respeita_capacidade():
+    buffer = SaidaBuffer(capacidade=2)
+    interface = Interface(buffer)
+    interface.mostrar_ganhador_rodada('A')
+    interface.mostrar_ganhador_rodada('B')
+    interface.mostrar_ganhador_rodada('C')
+    assert buffer.retornar_texto() == 'B ganhou a rodada\n\nC ganhou a rodada\n'
+
+def test_eventos_gravados_podem_ser_reproduzidos(tmp_path):
+    eventos = SaidaEventos()
+    truco = Truco(eventos)
+    truco.saida.emitir('aposta_aceita', quem_pediu=2)
+    Interface(eventos).mostrar_vencedor_flor(1, 'João', 'Bot', 3)
+    assert [tipo for tipo, _ in eventos.eventos] == ['aposta_aceita', 'vencedor_flor']
+
+    caminho = tmp_path / 'eventos.jsonl'
+    eventos.salvar(caminho)
+    buffer = SaidaBuffer()
+    SaidaEventos.carregar(caminho).reproduzir(buffer)
+    assert buffer.retornar_texto().startswith('Jogador 2 aceitou o pedido.\n╔')
+
+def test_baralho_e_jogo_escrevem_na_saida(capsys):
+    from truco.baralho import Baralho
+    from truco.jogador import Jogador
+    from truco.jogo import Jogo
+
+    buffer = SaidaBuffer()
+    baralho = Baralho()
+    baralho.cartas = [Carta(1, 'ESPADAS')]
+    baralho.printar_baralho(buffer)
+    Jogo(buffer).jogador_fugiu(None, Jogador('A'), Jogador('B'), 1)
+    assert buffer.retornar_texto() == '[] 1 de ESPADAS\nJogador fugiu!'
+    assert capsys.readouterr().out == ''
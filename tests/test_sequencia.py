@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from truco.cbr import CONFIGURACAO_PADRAO, Cbr
+from truco.sequencia import COLUNAS_SEQUENCIA, IndiceSequencial, TrieJogadas, prefixo_conhecido
+
+@pytest.fixture(scope='module')
+def indice(cbr):
+    return IndiceSequencial(100).fit(cbr.dataset)
+
+def test_nos_da_trie_guardam_os_casos_do_prefixo():
+    sequencias = np.array([[1, 2, 0], [1, 3, 0], [1, 2, 5], [4, 2, 0], [1, 2, 0]])
+    trie = TrieJogadas(sequencias)
+    nos = trie.caminho([1, 2, 7])
+    assert len(nos) == 3
+    assert sorted(trie.casos(nos[1]).tolist()) == [0, 1, 2, 4]
+    assert sorted(trie.casos(nos[2]).tolist()) == [0, 2, 4]
+
+def test_vizinhos_com_o_mesmo_prefixo_vem_primeiro(cbr, indice):
+    casos = cbr.dataset.to_numpy(dtype=np.float64)
+    sequencias = cbr.dataset[COLUNAS_SEQUENCIA].to_numpy()
+    consulta = casos[7].copy()
+    consulta[[cbr.dataset.columns.get_loc(coluna) for coluna in COLUNAS_SEQUENCIA[3:]]] = 0
+    mesmo_prefixo = np.flatnonzero((sequencias[:, :3] == sequencias[7, :3]).all(axis=1))
+    distancias, indices = indice.kneighbors(consulta.reshape(1, -1))
+    quantidade = min(len(mesmo_prefixo), 100)
+    assert set(indices[0][:quantidade].tolist()) <= set(mesmo_prefixo.tolist())
+    assert len(set(indices[0].tolist())) == 100
+    assert (np.diff(distancias[0][:quantidade]) >= 0).all()
+
+def test_rodada_empatada_continua_o_prefixo():
+    # empate na primeira rodada (ganhador 0) seguido da segunda carta do bot
+    assert prefixo_conhecido([40, 40, 0, 12, 0, 0, 0, 0, 0]) == [40, 40, 0, 12]
+    # sem a carta seguinte, o zero do ganhador pode ser a rodada em andamento
+    assert prefixo_conhecido([40, 40, 0, 0, 0, 0, 0, 0, 0]) == [40, 40]
+    assert prefixo_conhecido([40, 30, 1, -100, 0, 0, 0, 0, 0]) == [40, 30, 1]
+
+def test_sem_jogadas_a_busca_e_exata_e_o_cbr_decide(cbr, indice):
+    registro = cbr.dataset.iloc[[11]].copy()
+    registro[COLUNAS_SEQUENCIA] = 0
+    _, esperados = cbr.consultar(registro.to_numpy(dtype=np.float64))
+    _, obtidos = indice.kneighbors(registro.to_numpy(dtype=np.float64))
+    assert sorted(obtidos[0].tolist()) == sorted(esperados[0].tolist())
+    sequencial = Cbr(configuracao=dict(CONFIGURACAO_PADRAO, backend='sequencia'))
+    assert sequencial.truco('truco', 1, 50, registro) in (0, 1, 2)
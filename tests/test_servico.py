@@ -0,0 +1,61 @@
+import asyncio
+import json
+from truco.servico import ServicoDecisoes, requisitar
+
+def conversar(cbr, pedidos):
+    async def principal():
+        servico = ServicoDecisoes(cbr)
+        await servico.iniciar('127.0.0.1', 0)
+        leitor, escritor = await asyncio.open_connection(*servico.endereco()[:2])
+        try:
+            respostas = [await requisitar(leitor, escritor, *pedido) for pedido in pedidos]
+            _, metricas = await requisitar(leitor, escritor, 'GET', '/metricas')
+        finally:
+            escritor.close()
+            await servico.encerrar()
+
+        return respostas, metricas
+
+    return asyncio.run(principal())
+
+def test_decisoes_em_json_e_binario_na_mesma_conexao(cbr):
+    registro = cbr.dataset.iloc[[7]]
+    linha = registro.to_numpy()[0]
+    corpo = json.dumps({'registro': linha.tolist(), 'qualidade_mao_bot': 30}).encode('utf-8')
+    respostas, metricas = conversar(cbr, [
+        ('GET', '/saude'),
+        ('POST', '/truco', corpo),
+        ('POST', '/truco?qualidade_mao_bot=30', linha.astype('<i2').tobytes(), 'application/octet-stream'),
+        ('POST', '/jogar_carta?rodada=1&pontuacao_cartas=52,24,12', linha.astype('<i2').tobytes(), 'application/octet-stream'),
+    ])
+    (_, saude), (status, truco), (_, binario), (_, carta) = respostas
+    assert saude['colunas'] == list(cbr.dataset.columns)
+    assert status == 200 and truco['decisao'] == cbr.truco('truco', 1, 30, registro)
+    assert len(truco['distancias']) == 100 and truco['distancias'] == sorted(truco['distancias'])
+    assert binario == truco
+    assert carta['decisao'] == cbr.jogar_carta(1, [52, 24, 12], registro)
+    assert metricas['conexoes_total'] == 1 and metricas['pedidos'] == 4
+
+def test_lote_e_erros(cbr):
+    linhas = cbr.dataset.iloc[[1, 2, 3]].to_numpy().tolist()
+    lote = {'pedidos': [
+        {'decisao': 'truco', 'registro': linhas[0], 'qualidade_mao_bot': 10},
+        {'decisao': 'envido', 'registro': linhas[1], 'tipo': 6, 'pontos_envido_robo': 28},
+        {'decisao': 'jogar_carta', 'registro': linhas[2], 'rodada': 1},
+    ]}
+    respostas, metricas = conversar(cbr, [
+        ('POST', '/lote', json.dumps(lote).encode('utf-8')),
+        ('POST', '/truco', json.dumps({'registro': [1, 2], 'qualidade_mao_bot': 30}).encode('utf-8')),
+        ('GET', '/truco'),
+        ('GET', '/nada'),
+        ('GET', '/metricas/cbr'),
+    ])
+    (status, resposta), (invalido, _), (metodo, _), (inexistente, _), (_, prometheus) = respostas
+    assert isinstance(prometheus, str)
+    assert status == 200
+    assert resposta['respostas'][0]['decisao'] == cbr.truco('truco', 1, 10, cbr.dataset.iloc[[1]])
+    assert resposta['respostas'][1]['decisao'] == cbr.envido(6, 1, 28, None, cbr.dataset.iloc[[2]])
+    assert 'erro' in resposta['respostas'][2]
+    assert (invalido, metodo, inexistente) == (400, 405, 404)
+    assert metricas['rotas']['/truco']['erros'] == 2
+    assert metricas['pedidos'] == 5
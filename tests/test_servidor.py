@@ -0,0 +1,73 @@
+import asyncio
+import json
+import random
+from truco.gravador import DestinoCsv, GravadorCasos
+from truco import servidor as modulo_servidor
+from truco.servidor import ServidorTruco
+
+def rodar(cbr, tmp_path, corpo, **opcoes):
+    async def principal():
+        gravador = GravadorCasos(DestinoCsv(tmp_path / 'jogadas.csv'))
+        servidor = ServidorTruco(cbr, gravador=gravador, **opcoes)
+        await servidor.iniciar('127.0.0.1', 0)
+        try:
+            return await corpo(servidor, *servidor.endereco()[:2])
+        finally:
+            await servidor.encerrar()
+            gravador.fechar()
+
+    return asyncio.run(principal())
+
+async def conversar(host, porta, mensagens):
+    leitor, escritor = await asyncio.open_connection(host, porta)
+    respostas = []
+    for mensagem in mensagens:
+        escritor.write((mensagem if isinstance(mensagem, str) else json.dumps(mensagem)).encode('utf-8') + b'\n')
+        await escritor.drain()
+        respostas.append(json.loads(await leitor.readline()))
+
+    escritor.close()
+    await escritor.wait_closed()
+    return respostas
+
+def test_teste_de_carga_com_varias_mesas(cbr, tmp_path):
+    random.seed(3)
+    async def corpo(servidor, host, porta):
+        resumo = await modulo_servidor.teste_carga(20, host, porta, concorrencia=10)
+        return resumo, servidor.estatisticas()
+
+    resumo, estatisticas = rodar(cbr, tmp_path, corpo)
+    assert resumo['concluidas'] + resumo['erros'] == 20
+    assert resumo['concluidas'] > 0
+    assert resumo['pedidos'] > 20
+    assert estatisticas['mesas'] == 0 and estatisticas['conexoes'] == 0
+
+def test_erros_de_protocolo_e_limite_de_mesas(cbr, tmp_path):
+    async def corpo(servidor, host, porta):
+        return await conversar(host, porta, ['{quebrado', {'acao': 'voar'}, {'acao': 'nova_mesa', 'id': 1}, {'acao': 'nova_mesa'},
+                                             {'acao': 'jogar', 'mesa': 99, 'escolha': 0}, {'acao': 'jogar', 'mesa': 1, 'escolha': 'a'},
+                                             {'acao': 'estado', 'mesa': [1]}, {'acao': 'estado', 'mesa': 1}])
+
+    respostas = rodar(cbr, tmp_path, corpo, max_mesas=1)
+    assert respostas[0]['erro'] == 'Mensagem JSON inválida.'
+    assert respostas[1]['erro'].startswith('Ação desconhecida')
+    assert respostas[2]['mesa'] == 1 and respostas[2]['id'] == 1 and respostas[2]['opcoes']
+    assert respostas[3]['erro'].startswith('Servidor cheio')
+    assert respostas[4]['erro'] == 'Mesa inexistente: 99'
+    assert respostas[5]['erro'] == 'A escolha deve ser um número inteiro.'
+    # mesa que não é um número: resposta de erro, e a conexão continua atendendo
+    assert respostas[6] == {'erro': 'A mesa deve ser um número inteiro.', 'mesa': [1]}
+    assert respostas[7]['mesa'] == 1 and 'erro' not in respostas[7]
+
+def test_mesa_parada_expira(cbr, tmp_path):
+    async def corpo(servidor, host, porta):
+        leitor, escritor = await asyncio.open_connection(host, porta)
+        escritor.write(b'{"acao": "nova_mesa"}\n')
+        mesa = json.loads(await leitor.readline())['mesa']
+        aviso = json.loads(await asyncio.wait_for(leitor.readline(), 5))
+        escritor.close()
+        return mesa, aviso, servidor.estatisticas()
+
+    mesa, aviso, estatisticas = rodar(cbr, tmp_path, corpo, tempo_limite=0.05)
+    assert aviso == {'mesa': mesa, 'aviso': 'Mesa encerrada por inatividade.'}
+    assert estatisticas['mesas_expiradas'] == 1
@@ -0,0 +1,48 @@
+import random
+import pytest
+from unittest.mock import MagicMock
+from truco.entrada import DecisaoPendente, EntradaSessao
+from truco.gravador import DestinoCsv, GravadorCasos
+from truco.saida import SaidaEventos
+from truco.sessao import SessaoJogo
+from truco.truco import Truco
+
+@pytest.fixture
+def gravador(tmp_path):
+    gravador = GravadorCasos(DestinoCsv(tmp_path / 'jogadas.csv'))
+    yield gravador
+    gravador.fechar()
+
+def test_pedido_do_bot_fica_pendente_ate_a_resposta():
+    truco = Truco(entrada=EntradaSessao())
+    jogador1, jogador2 = MagicMock(pontos=0), MagicMock(pontos=0)
+    with pytest.raises(DecisaoPendente) as pendente:
+        truco.pedir_truco(MagicMock(), 2, jogador1, jogador2)
+
+    assert pendente.value.opcoes == [0, 1, 2]
+    assert pendente.value.continuar(1) is True
+    assert truco.jogador_bloqueado == 2
+
+def test_sessoes_compartilham_cbr_e_jogam_ate_o_fim(cbr, gravador):
+    random.seed(7)
+    sessoes = [SessaoJogo(cbr, f'Jogador {i}', gravador=gravador) for i in range(3)]
+    pendentes = [sessao.iniciar() for sessao in sessoes]
+    assert sessoes[0].dados.registro is not sessoes[1].dados.registro
+    while not all(sessao.terminada for sessao in sessoes):
+        for i, sessao in enumerate(sessoes):
+            if not (sessao.terminada):
+                pendentes[i] = sessao.jogar(random.choice(pendentes[i].opcoes))
+
+    for sessao in sessoes:
+        estado = sessao.estado()
+        assert estado['terminada'] and estado['pergunta'] is None
+        assert estado['pontos'][estado['vencedor'] - 1] >= 12
+
+def test_escolha_invalida_repete_a_pergunta(cbr, gravador):
+    saida = SaidaEventos()
+    sessao = SessaoJogo(cbr, saida=saida, gravador=gravador)
+    pendente = sessao.iniciar()
+    assert sessao.jogar(-5) is pendente
+    assert saida.eventos[-1] == ('mensagem', {'texto': 'Selecione um valor válido!'})
+    with pytest.raises(RuntimeError):
+        sessao.iniciar()
@@ -0,0 +1,158 @@
+import argparse
+import json
+import time
+
+# Consultas usadas no relatório de recall e quantidades de listas sondadas comparadas
+CONSULTAS = 200
+SONDAS = (1, 2, 4, 8, 16, 32)
+
+
+class IndiceIVF():
+    """Busca aproximada de vizinhos com quantizador grosso (IVF), com a interface de ajuste e consulta do NearestNeighbors.
+
+    O ajuste agrupa os casos em `listas` centros com k-means e guarda os casos ordenados por lista (em float32, com as
+    normas ao quadrado já calculadas). A consulta compara o registro com os centros, percorre só os casos das `sondas`
+    listas mais próximas e ordena esses candidatos pela distância exata. Mais sondas aumentam o recall e a latência;
+    com todas as listas sondadas a busca é exata.
+    """
+    def __init__(self, n_neighbors=100, listas=None, sondas=8, semente=0):
+        self.n_neighbors = n_neighbors
+        self.listas = listas
+        self.sondas = sondas
+        self.semente = semente
+
+
+    def fit(self, casos):
+        import numpy as np
+        from sklearn.cluster import MiniBatchKMeans
+
+        matriz = np.asarray(casos, dtype=np.float32)
+        listas = self.listas or max(1, int(round(np.sqrt(len(matriz)))))
+        modelo = MiniBatchKMeans(n_clusters=min(listas, len(matriz)), n_init=1, batch_size=4096, random_state=self.semente).fit(matriz)
+        rotulos = modelo.labels_
+        self.centros = modelo.cluster_centers_.astype(np.float32)
+        # casos de uma mesma lista ficam contíguos, então cada lista sondada é uma fatia da matriz
+        self.posicoes = np.argsort(rotulos, kind='stable')
+        self.casos = np.ascontiguousarray(matriz[self.posicoes])
+        self.normas = (self.casos.astype(np.float64) ** 2).sum(axis=1)
+        self.inicios = np.searchsorted(rotulos[self.posicoes], np.arange(len(self.centros) + 1))
+        return self
+
+
+    def _candidatos(self, consulta, k):
+        """Posições (na matriz ordenada) dos casos das listas mais próximas, sondando mais listas se faltarem casos."""
+        import numpy as np
+
+        ordem = np.argsort(((self.centros - consulta) ** 2).sum(axis=1), kind='stable')
+        sondas = min(self.sondas, len(ordem))
+        tamanhos = self.inicios[ordem + 1] - self.inicios[ordem]
+        while (sondas < len(ordem) and tamanhos[:sondas].sum() < k):
+            sondas += 1
+
+        return np.concatenate([np.arange(self.inicios[lista], self.inicios[lista + 1]) for lista in ordem[:sondas]])
+
+
+    def kneighbors(self, matriz):
+        """Distâncias e posições dos vizinhos aproximados de cada linha, em ordem crescente (empates pela menor posição)."""
+        import numpy as np
+
+        matriz = np.asarray(matriz, dtype=np.float32)
+        k = min(self.n_neighbors, len(self.casos))
+        distancias = np.empty((len(matriz), k))
+        indices = np.empty((len(matriz), k), dtype=np.intp)
+        for linha, consulta in enumerate(matriz):
+            candidatos = self._candidatos(consulta, k)
+            quadrados = self.normas[candidatos] - 2 * (self.casos[candidatos] @ consulta).astype(np.float64) + float(consulta.astype(np.float64) @ consulta)
+            originais = self.posicoes[candidatos]
+            melhores = np.argpartition(quadrados, k - 1)[:k] if len(candidatos) > k else np.arange(len(candidatos))
+            melhores = melhores[np.lexsort((originais[melhores], quadrados[melhores]))]
+            distancias[linha] = np.sqrt(np.maximum(quadrados[melhores], 0))
+            indices[linha] = originais[melhores]
+
+        return distancias, indices
+
+
+def base_sintetica(casos, replicar, semente=0):
+    """Base maior para o relatório: a base de casos repetida `replicar` vezes, com ruído de ±1 nos valores presentes
+    das cópias, para simular milhões de mãos parecidas com as reais."""
+    import numpy as np
+
+    matriz = np.asarray(casos, dtype=np.int16)
+    if (replicar <= 1):
+        return matriz
+
+    sorteio = np.random.default_rng(semente)
+    copias = np.tile(matriz, (replicar, 1))
+    ruido = sorteio.integers(-1, 2, size=copias.shape, dtype=np.int16)
+    ruido[:len(matriz)] = 0
+    return np.where(copias >= 0, copias + ruido, copias).astype(np.int16)
+
+
+def relatorio_recall(casos, n_neighbors=100, listas=None, sondas=SONDAS, consultas=CONSULTAS, semente=0):
+    """Recall@k e latência (p50 e p99 por consulta de um registro) do IVF para cada quantidade de sondas, contra a
+    busca exata por ball tree sobre a mesma base."""
+    import numpy as np
+    from sklearn.neighbors import NearestNeighbors
+
+    matriz = np.asarray(casos, dtype=np.float64)
+    sorteio = np.random.default_rng(semente)
+    amostra = matriz[sorteio.choice(len(matriz), min(consultas, len(matriz)), replace=False)]
+
+    def cronometrar(indice):
+        latencias, resultados = [], []
+        for linha in amostra:
+            inicio = time.perf_counter()
+            resultados.append(indice.kneighbors(linha.reshape(1, -1))[1][0])
+            latencias.append(time.perf_counter() - inicio)
+
+        latencias.sort()
+        return resultados, latencias[len(latencias) // 2] * 1e3, latencias[min(len(latencias) - 1, int(0.99 * len(latencias)))] * 1e3
+
+    inicio = time.perf_counter()
+    exato = NearestNeighbors(n_neighbors=n_neighbors, algorithm='ball_tree').fit(matriz)
+    ajuste_exato = time.perf_counter() - inicio
+    esperados, p50, p99 = cronometrar(exato)
+    relatorio = {'casos': len(matriz), 'n_neighbors': n_neighbors, 'consultas': len(amostra),
+                 'exato': {'p50_ms': p50, 'p99_ms': p99, 'ajuste_s': ajuste_exato}, 'ivf': []}
+    inicio = time.perf_counter()
+    ivf = IndiceIVF(n_neighbors, listas, semente=semente).fit(matriz)
+    relatorio['listas'] = len(ivf.centros)
+    relatorio['ajuste_ivf_s'] = time.perf_counter() - inicio
+    for quantidade in sondas:
+        ivf.sondas = quantidade
+        obtidos, p50, p99 = cronometrar(ivf)
+        recall = np.mean([len(np.intersect1d(a, b)) / len(a) for a, b in zip(esperados, obtidos)])
+        relatorio['ivf'].append({'sondas': quantidade, 'recall': float(recall), 'p50_ms': p50, 'p99_ms': p99})
+
+    return relatorio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Recall@k e latência da busca aproximada (IVF) contra a busca exata.')
+    parser.add_argument('--replicar', type=int, default=1, help='repete a base de casos com ruído para simular uma base maior')
+    parser.add_argument('--k', type=int, default=100, help='vizinhos por consulta')
+    parser.add_argument('--listas', type=int, default=None, help='listas do quantizador (padrão: raiz do número de casos)')
+    parser.add_argument('--sondas', type=int, nargs='+', default=list(SONDAS), help='listas sondadas por consulta')
+    parser.add_argument('--consultas', type=int, default=CONSULTAS)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--json', action='store_true', help='imprime o relatório em JSON')
+    args = parser.parse_args(argv)
+
+    from .dados import Dados
+
+    casos = base_sintetica(Dados().retornar_casos(), args.replicar, args.semente)
+    relatorio = relatorio_recall(casos, args.k, args.listas, args.sondas, args.consultas, args.semente)
+    if (args.json):
+        print(json.dumps(relatorio, indent=2))
+        return
+
+    exato = relatorio['exato']
+    print(f"{relatorio['casos']} casos, k={relatorio['n_neighbors']}, {relatorio['consultas']} consultas")
+    print(f"exato (ball tree)     p50 {exato['p50_ms']:8.3f} ms  p99 {exato['p99_ms']:8.3f} ms  ajuste {exato['ajuste_s']:.2f} s")
+    print(f"IVF com {relatorio['listas']} listas  ajuste {relatorio['ajuste_ivf_s']:.2f} s")
+    for linha in relatorio['ivf']:
+        print(f"  {linha['sondas']:>4} sondas        p50 {linha['p50_ms']:8.3f} ms  p99 {linha['p99_ms']:8.3f} ms  recall@{relatorio['n_neighbors']} {linha['recall']:.3f}")
+
+
+if __name__ == '__main__':
+    main()
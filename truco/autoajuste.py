@@ -0,0 +1,208 @@
+import argparse
+import itertools
+import json
+import time
+from pathlib import Path
+from .cbr import CAMINHO_CONFIGURACAO, CONFIGURACAO_PADRAO, criar_indice
+from .equivalencia import DECISOES, amostrar_base, decidir
+
+# O backend 'sentinela' usa outra distância (ver truco.distancia), então fica fora da grade padrão: a concordância
+# com a configuração atual não serve para compará-lo; o 'ivf' (aproximado) só compensa em bases muito maiores.
+# O 'sequencia' entra na grade para que a sua latência seja medida, mas, como prioriza o prefixo de jogadas, ele
+# discorda de propósito do kNN simples: a concordância dele é uma cota inferior e ele só é escolhido se, mesmo assim,
+# ficar na fronteira dentro do orçamento
+BACKENDS = ['sklearn', 'scipy', 'sentinela', 'ivf', 'sequencia']
+# Grade padrão; leaf_size só se aplica às árvores do scikit-learn e do scipy, e o backend do scipy é sempre uma kd-tree
+GRADE = {
+    'n_neighbors': [50, 100, 150],
+    'algorithm': ['ball_tree', 'kd_tree', 'brute'],
+    'leaf_size': [10, 30, 60],
+    'backend': ['sklearn', 'scipy', 'sequencia'],
+}
+# Orçamento padrão de latência (p99 de uma consulta de um registro), em milissegundos
+ORCAMENTO_MS = 2.0
+# Consultas de aquecimento antes de cronometrar cada configuração
+AQUECIMENTO = 20
+
+
+def configuracoes(grade=GRADE):
+    """Combinações da grade, sem repetir configurações equivalentes (força bruta e scipy ignoram parte dos parâmetros)."""
+    vistas = []
+    for k, algoritmo, folha, backend in itertools.product(grade['n_neighbors'], grade['algorithm'], grade['leaf_size'], grade['backend']):
+        if (backend == 'scipy'):
+            algoritmo = 'kd_tree'
+
+        if (backend in ('sentinela', 'ivf', 'sequencia')):
+            algoritmo = 'brute'
+
+        if (algoritmo == 'brute'):
+            folha = CONFIGURACAO_PADRAO['leaf_size']
+
+        configuracao = dict(CONFIGURACAO_PADRAO, n_neighbors=k, algorithm=algoritmo, leaf_size=folha, backend=backend)
+        if (configuracao not in vistas):
+            vistas.append(configuracao)
+
+    return vistas
+
+
+def _percentil(valores, q):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+
+
+def medir_configuracao(cbr, configuracao, corpus, esperadas):
+    """Ajusta o índice da configuração sobre a base do Cbr e mede a latência de cada consulta de um registro e a
+    concordância das decisões (tomadas com os vizinhos desse índice) com as respostas `esperadas`."""
+    import numpy as np
+
+    inicio = time.perf_counter()
+    indice = criar_indice(configuracao).fit(cbr.dataset)
+    ajuste = time.perf_counter() - inicio
+    matrizes = [np.asarray([linha], dtype=np.float64) for _, _, linha, _ in corpus]
+    for matriz in matrizes[:AQUECIMENTO]:
+        indice.kneighbors(matriz)
+
+    latencias = []
+    iguais = dict.fromkeys(DECISOES, 0)
+    totais = dict.fromkeys(DECISOES, 0)
+    for (decisao, _, _, parametros), matriz, esperada in zip(corpus, matrizes, esperadas):
+        inicio = time.perf_counter()
+        _, indices = indice.kneighbors(matriz)
+        latencias.append(time.perf_counter() - inicio)
+        totais[decisao] += 1
+        if (decidir(cbr, decisao, parametros, vizinhos=indices[0]) == esperada):
+            iguais[decisao] += 1
+
+    return {
+        'configuracao': configuracao,
+        'p50_ms': _percentil(latencias, 0.5) * 1e3,
+        'p99_ms': _percentil(latencias, 0.99) * 1e3,
+        'ajuste_ms': ajuste * 1e3,
+        'concordancia': sum(iguais.values()) / max(sum(totais.values()), 1),
+        'concordancia_decisoes': {decisao: iguais[decisao] / totais[decisao] if totais[decisao] else 1.0 for decisao in DECISOES},
+    }
+
+
+def fronteira_pareto(medicoes):
+    """Medições não dominadas: nenhuma outra tem p99 menor ou igual e concordância maior ou igual, com uma delas estrita."""
+    fronteira = []
+    for medicao in medicoes:
+        dominada = any(
+            outra['p99_ms'] <= medicao['p99_ms'] and outra['concordancia'] >= medicao['concordancia']
+            and (outra['p99_ms'] < medicao['p99_ms'] or outra['concordancia'] > medicao['concordancia'])
+            for outra in medicoes
+        )
+        if not (dominada):
+            fronteira.append(medicao)
+
+    return sorted(fronteira, key=lambda medicao: medicao['p99_ms'])
+
+
+def escolher(fronteira, orcamento_ms=ORCAMENTO_MS):
+    """Da fronteira, a de maior concordância com p99 dentro do orçamento (empate pelo menor p50); se nenhuma couber,
+    a mais rápida."""
+    dentro = [medicao for medicao in fronteira if medicao['p99_ms'] <= orcamento_ms]
+    if not (dentro):
+        return min(fronteira, key=lambda medicao: medicao['p99_ms'])
+
+    return max(dentro, key=lambda medicao: (medicao['concordancia'], -medicao['p50_ms']))
+
+
+def autoajustar(cbr=None, grade=GRADE, orcamento_ms=ORCAMENTO_MS, casos=300, semente=0):
+    """Varre a grade sobre a base de casos real e escolhe a configuração do índice pelo orçamento de latência.
+
+    A concordância é medida contra as decisões do Cbr com a configuração atual (a do arquivo, se existir), sobre
+    `casos` registros sorteados da base, cada um com as três decisões.
+    """
+    from .cbr import Cbr
+
+    if (cbr is None):
+        cbr = Cbr()
+
+    corpus = amostrar_base(cbr, casos, semente)
+    esperadas = [decidir(cbr, decisao, parametros, vizinhos=cbr.vizinhos(_registro(cbr, linha))) for decisao, _, linha, parametros in corpus]
+    medicoes = [medir_configuracao(cbr, configuracao, corpus, esperadas) for configuracao in configuracoes(grade)]
+    fronteira = fronteira_pareto(medicoes)
+    return {
+        'atual': cbr.configuracao,
+        'orcamento_ms': orcamento_ms,
+        'itens': len(corpus),
+        'medicoes': medicoes,
+        'fronteira': fronteira,
+        'escolhida': escolher(fronteira, orcamento_ms),
+    }
+
+
+def _registro(cbr, linha):
+    import pandas as pd
+
+    return pd.DataFrame([linha], columns=cbr.dataset.columns)
+
+
+def salvar_configuracao(resultado, caminho=CAMINHO_CONFIGURACAO):
+    """Grava a configuração escolhida na seção 'indice' (lida pelo Cbr) junto com a fronteira medida."""
+    escolhida = resultado['escolhida']
+    conteudo = {
+        'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'orcamento_ms': resultado['orcamento_ms'],
+        'indice': escolhida['configuracao'],
+        'medicao': {chave: valor for chave, valor in escolhida.items() if chave != 'configuracao'},
+        'fronteira': resultado['fronteira'],
+    }
+    with open(Path(caminho), 'w', encoding='utf-8') as arquivo:
+        json.dump(conteudo, arquivo, indent=2)
+        arquivo.write('\n')
+
+
+def _descrever(configuracao):
+    if (configuracao.get('projecao')):
+        return f"{_descrever(dict(configuracao, projecao=None))} projecao={configuracao['projecao']}/{configuracao['componentes']}"
+
+    if (configuracao['backend'] == 'scipy'):
+        return f"k={configuracao['n_neighbors']} scipy cKDTree folha={configuracao['leaf_size']}"
+
+    if (configuracao['backend'] == 'sentinela'):
+        return f"k={configuracao['n_neighbors']} sentinela escala={configuracao['escala']} penalidade={configuracao['penalidade']}"
+
+    if (configuracao['backend'] == 'sequencia'):
+        return f"k={configuracao['n_neighbors']} sequencia"
+
+    if (configuracao['backend'] == 'ivf'):
+        return f"k={configuracao['n_neighbors']} ivf listas={configuracao['listas'] or 'raiz'} sondas={configuracao['sondas']}"
+
+    if (configuracao['algorithm'] == 'brute'):
+        return f"k={configuracao['n_neighbors']} sklearn brute"
+
+    return f"k={configuracao['n_neighbors']} sklearn {configuracao['algorithm']} folha={configuracao['leaf_size']}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Escolhe k, algoritmo, tamanho de folha e backend do índice do Cbr dentro de um orçamento de latência.')
+    parser.add_argument('--orcamento-ms', type=float, default=ORCAMENTO_MS, help='p99 máximo de uma consulta, em milissegundos')
+    parser.add_argument('--k', type=int, nargs='+', default=GRADE['n_neighbors'], help='quantidades de vizinhos')
+    parser.add_argument('--algoritmos', nargs='+', default=GRADE['algorithm'], choices=GRADE['algorithm'])
+    parser.add_argument('--folhas', type=int, nargs='+', default=GRADE['leaf_size'], help='tamanhos de folha das árvores')
+    parser.add_argument('--backends', nargs='+', default=GRADE['backend'], choices=BACKENDS)
+    parser.add_argument('--casos', type=int, default=300, help='registros sorteados da base para medir latência e concordância')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', default=str(CAMINHO_CONFIGURACAO), help='arquivo de configuração lido pelo Cbr (com TRUCO_CONFIGURACAO_INDICE)')
+    parser.add_argument('--nao-gravar', action='store_true', help='só mostra a escolha, sem gravar o arquivo')
+    args = parser.parse_args(argv)
+
+    grade = {'n_neighbors': args.k, 'algorithm': args.algoritmos, 'leaf_size': args.folhas, 'backend': args.backends}
+    resultado = autoajustar(grade=grade, orcamento_ms=args.orcamento_ms, casos=args.casos, semente=args.semente)
+    print(f"Configuração atual: {_descrever(resultado['atual'])}; {resultado['itens']} decisões por configuração")
+    for medicao in sorted(resultado['medicoes'], key=lambda medicao: medicao['p99_ms']):
+        marca = '*' if medicao in resultado['fronteira'] else ' '
+        print(f"{marca} {_descrever(medicao['configuracao']):<36} p50 {medicao['p50_ms']:7.3f} ms  p99 {medicao['p99_ms']:7.3f} ms  "
+              f"concordância {medicao['concordancia']:7.2%}  ajuste {medicao['ajuste_ms']:7.1f} ms")
+
+    escolhida = resultado['escolhida']
+    print(f"Escolhida (orçamento p99 {args.orcamento_ms} ms): {_descrever(escolhida['configuracao'])}")
+    if not (args.nao_gravar):
+        salvar_configuracao(resultado, args.saida)
+        print(f'Configuração gravada em {args.saida}; defina TRUCO_CONFIGURACAO_INDICE={args.saida} para o Cbr usá-la')
+
+
+if __name__ == '__main__':
+    main()
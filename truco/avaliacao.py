@@ -0,0 +1,164 @@
+import argparse
+import itertools
+import os
+import time
+from .colunas import COLUNAS_CASO
+from .compartilhado import BaseCompartilhada, cbr_trabalhador
+
+# Colunas previstas pelo voto dos vizinhos: as mesmas usadas nas decisões de carta, truco e envido do Cbr
+ALVOS = ['primeiraCartaRobo', 'quemGanhouTruco', 'quemGanhouEnvido']
+_ROBO = ['jogadorMao', 'cartaAltaRobo', 'cartaMediaRobo', 'cartaBaixaRobo', 'naipeCartaAltaRobo', 'naipeCartaMediaRobo',
+         'naipeCartaBaixaRobo', 'qualidadeMaoRobo', 'pontosEnvidoRobo', 'pontosFlorRobo']
+_HUMANO = ['cartaAltaHumano', 'cartaMediaHumano', 'cartaBaixaHumano', 'naipeCartaAltaHumano', 'naipeCartaMediaHumano',
+           'naipeCartaBaixaHumano', 'qualidadeMaoHumano']
+# Subconjuntos de atributos avaliados; as colunas alvo nunca entram como atributo. 'todas' inclui colunas que só são
+# conhecidas no fim da mão (quem pediu truco, quem ganhou as rodadas), então serve de limite superior
+ATRIBUTOS = {
+    'todas': COLUNAS_CASO,
+    'robo': _ROBO,
+    'maos': _ROBO + _HUMANO,
+}
+ESCALAS = ('nenhuma', 'padrao', 'minmax')
+# Consultas individuais cronometradas por fold para a latência unitária
+AMOSTRAS_LATENCIA = 50
+
+
+def _escalar(escala, treino, teste):
+    """Ajusta a escala no treino e aplica nos dois conjuntos (desvio ou amplitude nulos viram 1)."""
+    if (escala == 'nenhuma'):
+        return treino, teste
+
+    if (escala == 'padrao'):
+        centro, largura = treino.mean(axis=0), treino.std(axis=0)
+
+    elif (escala == 'minmax'):
+        centro, largura = treino.min(axis=0), treino.max(axis=0) - treino.min(axis=0)
+
+    else:
+        raise ValueError(f'Escala desconhecida: {escala}')
+
+    largura[largura == 0] = 1
+    return (treino - centro) / largura, (teste - centro) / largura
+
+
+def votar(valores, pesos):
+    """Voto ponderado de cada linha de vizinhos, com empate decidido pela primeira ocorrência (como no Cbr)."""
+    import numpy as np
+
+    previstos = np.empty(len(valores), dtype=valores.dtype)
+    for i, (linha, peso) in enumerate(zip(valores, pesos)):
+        unicos, primeira, inverso = np.unique(linha, return_index=True, return_inverse=True)
+        contagem = np.bincount(inverso, weights=peso)
+        empatados = np.flatnonzero(contagem == contagem.max())
+        previstos[i] = unicos[empatados[np.argmin(primeira[empatados])]]
+
+    return previstos
+
+
+def avaliar_fold(configuracao, fold, folds, semente, alvos, casos=None, pesos=None):
+    """Ajusta o kNN com os outros folds e mede o voto dos vizinhos sobre os casos do fold, além dos tempos de ajuste e consulta."""
+    import numpy as np
+    from sklearn.neighbors import NearestNeighbors
+
+    if (casos is None):
+        cbr = cbr_trabalhador()
+        casos, pesos = cbr.dataset, cbr.pesos.to_numpy()
+
+    k, metrica, escala, atributos = configuracao
+    ordem = np.random.default_rng(semente).permutation(len(casos))
+    teste = np.sort(ordem[fold::folds])
+    treino = np.setdiff1d(ordem, teste)
+    colunas = [coluna for coluna in ATRIBUTOS[atributos] if coluna not in alvos]
+    matriz = casos[colunas].to_numpy(dtype=np.float64)
+    x_treino, x_teste = _escalar(escala, matriz[treino], matriz[teste])
+
+    inicio = time.perf_counter()
+    vizinhos = NearestNeighbors(n_neighbors=k, metric=metrica).fit(x_treino)
+    ajuste = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    _, indices = vizinhos.kneighbors(x_teste)
+    lote = (time.perf_counter() - inicio) / len(teste)
+    unitarias = []
+    for linha in x_teste[:AMOSTRAS_LATENCIA]:
+        inicio = time.perf_counter()
+        vizinhos.kneighbors(linha.reshape(1, -1))
+        unitarias.append(time.perf_counter() - inicio)
+
+    resultado = {'ajuste': ajuste, 'latencia_lote': lote, 'latencia_unitaria': float(np.median(unitarias))}
+    peso_teste = pesos[teste]
+    for alvo in alvos:
+        valores = casos[alvo].to_numpy()
+        previstos = votar(valores[treino][indices], pesos[treino][indices])
+        reais = valores[teste]
+        resultado[f'acuracia_{alvo}'] = float(np.average(previstos == reais, weights=peso_teste))
+        resultado[f'mae_{alvo}'] = float(np.average(np.abs(previstos.astype(np.float64) - reais), weights=peso_teste))
+
+    return resultado
+
+
+def _avaliar_no_trabalhador(argumentos):
+    return argumentos[:2], avaliar_fold(*argumentos)
+
+
+def grade(ks=(10, 50, 100), metricas=('euclidean', 'manhattan'), escalas=ESCALAS, atributos=tuple(ATRIBUTOS)):
+    """Todas as combinações de k, métrica, escala e subconjunto de atributos."""
+    return list(itertools.product(ks, metricas, escalas, atributos))
+
+
+def validacao_cruzada(configuracoes, cbr=None, folds=5, alvos=ALVOS, processos=None, semente=0):
+    """Validação cruzada em k folds de cada configuração, com os pares (configuração, fold) divididos entre processos.
+
+    Retorna um DataFrame com uma linha por configuração: médias dos folds de acurácia e erro absoluto por alvo,
+    acurácia média, tempo de ajuste e latência de consulta (em lote e unitária).
+    """
+    import pandas as pd
+    from .cbr import Cbr
+
+    if (cbr is None):
+        cbr = Cbr()
+
+    tarefas = [(configuracao, fold, folds, semente, list(alvos)) for configuracao in configuracoes for fold in range(folds)]
+    if (processos == 0):
+        resultados = [(tarefa[:2], avaliar_fold(*tarefa, casos=cbr.dataset, pesos=cbr.pesos.to_numpy())) for tarefa in tarefas]
+
+    else:
+        base = BaseCompartilhada(cbr)
+        try:
+            with base.criar_pool(processos) as pool:
+                resultados = list(pool.map(_avaliar_no_trabalhador, tarefas, chunksize=max(1, len(tarefas) // ((processos or os.cpu_count() or 1) * 4))))
+        finally:
+            base.fechar()
+
+    linhas = [dict(zip(('k', 'metrica', 'escala', 'atributos'), configuracao), fold=fold, **resultado) for (configuracao, fold), resultado in resultados]
+    tabela = pd.DataFrame(linhas).drop(columns='fold').groupby(['k', 'metrica', 'escala', 'atributos'], sort=False).mean().reset_index()
+    tabela['acuracia_media'] = tabela[[f'acuracia_{alvo}' for alvo in alvos]].mean(axis=1)
+    for coluna in ('latencia_lote', 'latencia_unitaria'):
+        tabela[f'{coluna}_us'] = tabela.pop(coluna) * 1e6
+
+    tabela['ajuste_ms'] = tabela.pop('ajuste') * 1e3
+    return tabela.sort_values('acuracia_media', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validação cruzada do voto dos vizinhos sobre uma grade de configurações do kNN.')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--k', type=int, nargs='+', default=[10, 50, 100], help='quantidades de vizinhos')
+    parser.add_argument('--metricas', nargs='+', default=['euclidean', 'manhattan'], help='métricas de distância do scikit-learn')
+    parser.add_argument('--escalas', nargs='+', default=list(ESCALAS), choices=ESCALAS)
+    parser.add_argument('--atributos', nargs='+', default=list(ATRIBUTOS), choices=list(ATRIBUTOS))
+    parser.add_argument('--alvos', nargs='+', default=ALVOS, help='colunas previstas pelo voto dos vizinhos')
+    parser.add_argument('--processos', type=int, default=None, help='processos trabalhadores (0 roda no próprio processo)')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', default='avaliacao.csv', help='arquivo csv com a tabela de resultados')
+    args = parser.parse_args(argv)
+
+    configuracoes = grade(args.k, args.metricas, args.escalas, args.atributos)
+    tabela = validacao_cruzada(configuracoes, folds=args.folds, alvos=args.alvos, processos=args.processos, semente=args.semente)
+    tabela.to_csv(args.saida, index=False)
+    colunas = ['k', 'metrica', 'escala', 'atributos', 'acuracia_media'] + [f'acuracia_{alvo}' for alvo in args.alvos] + ['latencia_lote_us', 'latencia_unitaria_us', 'ajuste_ms']
+    print(tabela[colunas].to_string(index=False, float_format=lambda valor: f'{valor:.4f}'))
+    print(f'{len(configuracoes)} configurações x {args.folds} folds; tabela completa em {args.saida}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from .colunas import COLUNAS_CASO
+from .fontes import ler_casos_csv
+
+# Índices sobre as colunas de resultado e de contexto mais usadas para filtrar os casos
+INDICES = {
+    'idx_casos_rodadas': ['ganhadorPrimeiraRodada', 'ganhadorSegundaRodada', 'ganhadorTerceiraRodada'],
+    'idx_casos_truco': ['quemTruco', 'quemGanhouTruco'],
+    'idx_casos_envido': ['quemPediuEnvido', 'quemGanhouEnvido'],
+    'idx_casos_flor': ['quemFlor', 'quemGanhouFlor'],
+    'idx_casos_mao': ['jogadorMao', 'cartaAltaRobo', 'cartaMediaRobo', 'cartaBaixaRobo'],
+}
+
+
+class BancoCasos():
+    """Base de casos em SQLite, com esquema tipado e modo WAL para gravações concorrentes de vários processos."""
+    def __init__(self, caminho='casos.db', colunas=None, timeout=30.0):
+        if (colunas is None):
+            colunas = COLUNAS_CASO
+
+        self.caminho = caminho
+        self.colunas = list(colunas)
+        self.trava = threading.Lock()
+        self.conexao = sqlite3.connect(caminho, timeout=timeout, check_same_thread=False)
+        self.conexao.execute('PRAGMA journal_mode=WAL')
+        self.conexao.execute('PRAGMA synchronous=NORMAL')
+        self.criar_tabela()
+
+
+    def criar_tabela(self):
+        """Cria a tabela de casos e os índices, caso ainda não existam."""
+        definicoes = ', '.join(f'"{c}" INTEGER NOT NULL' for c in self.colunas)
+        with self.trava, self.conexao:
+            self.conexao.execute(f'CREATE TABLE IF NOT EXISTS casos (idMao INTEGER PRIMARY KEY, {definicoes})')
+            existentes = {linha[1] for linha in self.conexao.execute('PRAGMA table_info(casos)')}
+            faltantes = [c for c in self.colunas if c not in existentes]
+            if (faltantes):
+                raise ValueError(f"A tabela de casos em {self.caminho} não possui as colunas: {', '.join(faltantes)}")
+
+            for nome, colunas in INDICES.items():
+                if all(c in self.colunas for c in colunas):
+                    lista = ', '.join(f'"{c}"' for c in colunas)
+                    self.conexao.execute(f'CREATE INDEX IF NOT EXISTS {nome} ON casos ({lista})')
+
+
+    def inserir(self, linhas):
+        """Insere os casos em uma única transação. Cada linha traz os valores na ordem de `colunas`."""
+        lista = ', '.join(f'"{c}"' for c in self.colunas)
+        marcadores = ', '.join('?' * len(self.colunas))
+        with self.trava, self.conexao:
+            cursor = self.conexao.executemany(f'INSERT INTO casos ({lista}) VALUES ({marcadores})', linhas)
+            return cursor.rowcount
+
+
+    def importar_df(self, df):
+        """Importa um dataframe já tratado (como o retornado por `ler_casos_csv`)."""
+        return self.inserir(df[self.colunas].to_numpy().tolist())
+
+
+    def quantidade(self):
+        """Retorna o número de casos armazenados."""
+        with self.trava:
+            return self.conexao.execute('SELECT COUNT(*) FROM casos').fetchone()[0]
+
+
+    def carregar_matriz(self):
+        """Carrega os ids e a matriz int16 de atributos em uma única consulta."""
+        lista = ', '.join(f'"{c}"' for c in self.colunas)
+        with self.trava:
+            linhas = self.conexao.execute(f'SELECT idMao, {lista} FROM casos ORDER BY idMao').fetchall()
+
+        if not (linhas):
+            return np.empty(0, dtype=np.int64), np.empty((0, len(self.colunas)), dtype=np.int16)
+
+        tabela = np.array(linhas, dtype=np.int64)
+        return tabela[:, 0], tabela[:, 1:].astype(np.int16)
+
+
+    def carregar_casos(self):
+        """Retorna os casos no mesmo formato de `Dados.casos`: dataframe int16 indexado por idMao."""
+        ids, matriz = self.carregar_matriz()
+        return pd.DataFrame(matriz, index=pd.Index(ids, name='idMao'), columns=self.colunas)
+
+
+    def escrever(self, colunas, linhas):
+        """Destino do `GravadorCasos`: grava o lote de registros em uma transação, ignorando o idMao do registro."""
+        posicoes = [colunas.index(c) for c in self.colunas]
+        self.inserir([[int(linha[i]) for i in posicoes] for linha in linhas])
+
+
+    def sincronizar(self):
+        """Aplica o conteúdo do WAL no arquivo principal do banco."""
+        with self.trava:
+            self.conexao.execute('PRAGMA wal_checkpoint(PASSIVE)')
+
+
+    def fechar(self):
+        with self.trava:
+            self.conexao.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Importa arquivos da base de casos para o banco SQLite.')
+    parser.add_argument('banco', help='caminho do arquivo SQLite')
+    parser.add_argument('arquivos', nargs='+', help='arquivos csv da base de casos')
+    parser.add_argument('--sep', default='\t', help='separador dos arquivos csv (padrão: tab)')
+    args = parser.parse_args(argv)
+
+    banco = BancoCasos(args.banco)
+    for arquivo in args.arquivos:
+        inseridos = banco.importar_df(ler_casos_csv(arquivo, sep=args.sep))
+        print(f'{arquivo}: {inseridos} casos importados')
+
+    print(f'Total de casos em {args.banco}: {banco.quantidade()}')
+    banco.fechar()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,8 +4,10 @@ import random
 
 class Baralho():
     
-    def __init__(self):
+    def __init__(self, sorteio=None):
         # self.vira = []
+        # gerador usado no embaralhamento (um random.Random com semente deixa as distribuições reproduzíveis)
+        self.sorteio = sorteio
         self.manilhas = []
         self.cartas = []
         self.criar_baralho() 
@@ -19,7 +21,7 @@ class Baralho():
     
     def embaralhar(self):
         """Embaralha o baralho de forma aleatõria."""
-        random.shuffle(self.cartas)
+        (self.sorteio or random).shuffle(self.cartas)
 
     def retirar_carta(self):
         """Retira uma carta quando o jogador for receber as cartas na mesa."""
@@ -31,7 +33,7 @@ class Baralho():
         self.manilhas = []
         self.cartas = []
     
-    def printar_baralho(self):
+    def printar_baralho(self, saida=None):
         """Exibe o baralho inteiro."""
         for c in self.cartas:
-            c.exibir_carta()
\ No newline at end of file
+            c.exibir_carta(saida=saida)
\ No newline at end of file
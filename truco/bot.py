@@ -1,5 +1,5 @@
 import random 
-import pandas as pd
+from .oponentes import LIMIAR_FUGA_ENVIDO, MINIMO_OBSERVACOES
 
 class Bot():
     def __init__(self, nome):
@@ -117,12 +117,9 @@ class Bot():
         # self.mao.pop(i)
 
 
-    def mostrar_mao(self):
+    def mostrar_mao(self, interface):
         """Exibe as cartas na mão do bot."""
-        i = 0
-        for carta in self.mao:
-            carta.exibir_carta(i)
-            i += 1
+        interface.mostrar_mao(self.mao)
         
 
     def adicionar_pontos(self, pontos):
@@ -152,7 +149,13 @@ class Bot():
     def avaliar_truco(self, cbr, tipo, quem_pediu):
         """Verifica se a melhor jogada para o bot deve pedir, aceitar, recusar ou aumentar a aposta do truco."""
         # CHAMADA DO CBR OU OUTRA INTELIGÊNCIA DEVE OCORRER AQUI
-        return cbr.truco(tipo, quem_pediu, self.qualidade_mao)
+        escolha = cbr.truco(tipo, quem_pediu, self.qualidade_mao)
+        # contra um oponente que costuma blefar no truco, o bot aceita em vez de fugir
+        oponente = getattr(cbr, 'oponente', None)
+        if (escolha == 0 and oponente is not None and oponente.blefa_no_truco()):
+            return 1
+
+        return escolha
     
 
     def avaliar_envido(self, cbr, tipo, quem_pediu, pontos_totais_adversario):
@@ -165,7 +168,26 @@ class Bot():
             perdendo = False
 
         # CHAMADA DO CBR OU OUTRA INTELIGÊNCIA DEVE OCORRER AQUI
-        return cbr.envido(tipo, quem_pediu, self.envido, perdendo)
+        escolha = cbr.envido(tipo, quem_pediu, self.envido, perdendo)
+        # pedido do bot: contra um oponente que costuma fugir do envido, pedir rende o ponto da recusa
+        oponente = getattr(cbr, 'oponente', None)
+        if (quem_pediu == 2 and not escolha):
+            if (oponente is not None and oponente.foge_do_envido()):
+                return 6
+
+            # sem observações suficientes do oponente, vale o hábito dos humanos nas partidas dos casos vizinhos
+            if ((oponente is None or oponente.envidos_recebidos < MINIMO_OBSERVACOES) and self.partidas_fogem_do_envido(cbr)):
+                return 6
+
+        return escolha
+
+
+    def partidas_fogem_do_envido(self, cbr, limiar=LIMIAR_FUGA_ENVIDO):
+        """Se, nas partidas de onde vieram os casos vizinhos, o humano recusou ao menos `limiar` dos envidos do bot.
+        Chamado logo depois de `cbr.envido`, reaproveita os vizinhos dessa decisão."""
+        contexto = cbr.contexto_partidas() if hasattr(cbr, 'contexto_partidas') else None
+        return (contexto is not None and contexto['envidosRobo'] >= MINIMO_OBSERVACOES
+                and contexto['taxaNegouEnvidoHumano'] >= limiar)
 
     def avaliar_pedir_envido(self):
         """Verifica se a melhor jogada para o bot seria pedir envido."""
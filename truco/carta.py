@@ -1,5 +1,6 @@
 import itertools
 from .pontos import MANILHA, CARTAS_VALORES, ENVIDO
+from .saida import SaidaConsole
 
 class Carta():
     def __init__(self, numero, naipe):
@@ -65,32 +66,24 @@ class Carta():
 
     def classificar_carta(self, cartas):
         """Método para classificar as cartas por ranks (alto, médio, baixo) e retorna a pontuação individual de cada carta."""
-        carta_alta = self.verificar_carta_alta(self.verificar_carta_alta(cartas[0], cartas[1]), cartas[2])
-        carta_baixa = self.verificar_carta_baixa(self.verificar_carta_baixa(cartas[0], cartas[1]), cartas[2])
+        lista_pontos = [self.retornar_pontos_carta(carta) for carta in cartas]
         lista_classificacao = ['', '', '']
-        lista_pontos = ['', '', '']
-        
-        for i in range(len(lista_classificacao)):
-            if carta_alta == cartas[i]: 
-                lista_pontos[i] = self.retornar_pontos_carta(cartas[i])
-                lista_classificacao[i] = 'Alta'
-            
-            if carta_baixa == cartas[i]: 
-                lista_pontos[i] = self.retornar_pontos_carta(cartas[i])
-                lista_classificacao[i] = 'Baixa'
-            
-            if not lista_classificacao[i]: 
-                lista_pontos[i] = self.retornar_pontos_carta(cartas[i])
-                lista_classificacao[i] = 'Media'
+        # ordena pela pontuação, então cartas de mesma força (dois 3, por exemplo) ainda recebem ranks distintos
+        ordem = sorted(range(len(cartas)), key=lambda i: lista_pontos[i])
+        for i, rank in zip(ordem, ['Baixa', 'Media', 'Alta']):
+            lista_classificacao[i] = rank
 
         return lista_pontos, lista_classificacao
 
 
-    def exibir_carta(self, i=None):
+    def exibir_carta(self, i=None, saida=None):
         """Exibe a carta a ser jogada e a opção para jogá-la."""
         if i == None:
             i = ""
-        print(f"[{i}] {self.numero} de {self.naipe}")
+        if (saida is None):
+            saida = SaidaConsole()
+
+        saida.emitir('carta_opcao', indice=i, numero=self.numero, naipe=self.naipe)
 
     def retornar_carta(self):
         """Retorna o valor legível da carta, contendo o número e o naipe"""
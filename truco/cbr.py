@@ -1,20 +1,125 @@
-from sklearn.neighbors import NearestNeighbors
-import pandas as pd
+import json
+import os
 import warnings
 from pathlib import Path
 from .dados import Dados
+from .metricas import METRICAS
+
+# Índice usado quando não há arquivo de configuração; `python -m truco.autoajuste` grava outra escolha no arquivo
+# (escala, penalidade e pesos_colunas só valem para o backend 'sentinela', ver truco.distancia; listas e sondas para o
+# backend aproximado 'ivf', ver truco.aproximado; o backend 'sequencia' usa a trie de jogadas, ver truco.sequencia;
+# projecao, 'pca' ou o caminho de um mapa gravado, põe uma projeção linear com `componentes` dimensões na frente do
+# índice, ver truco.projecao)
+CONFIGURACAO_PADRAO = {'n_neighbors': 100, 'algorithm': 'ball_tree', 'leaf_size': 30, 'backend': 'sklearn',
+                       'escala': 'padrao', 'penalidade': 2.0, 'pesos_colunas': None, 'listas': None, 'sondas': 8,
+                       'projecao': None, 'componentes': 16}
+CAMINHO_CONFIGURACAO = Path(__file__).resolve().parent.parent / 'configuracao_indice.json'
+
+
+def carregar_configuracao(caminho=None):
+    """Configuração do índice: a padrão, atualizada pela seção 'indice' do arquivo JSON, se ele existir.
+
+    Sem `caminho`, o arquivo só é lido quando a variável TRUCO_CONFIGURACAO_INDICE aponta para ele, para que um
+    configuracao_indice.json esquecido na pasta do projeto não mude o índice de quem não pediu.
+    """
+    configuracao = dict(CONFIGURACAO_PADRAO)
+    if (caminho is None):
+        caminho = os.environ.get('TRUCO_CONFIGURACAO_INDICE')
+
+    if (caminho is not None and Path(caminho).exists()):
+        with open(caminho, encoding='utf-8') as arquivo:
+            indice = json.load(arquivo).get('indice', {})
+
+        configuracao.update({chave: valor for chave, valor in indice.items() if chave in CONFIGURACAO_PADRAO})
+
+    return configuracao
+
+
+class IndiceKDTree():
+    """Índice do scipy (cKDTree) com a mesma interface de ajuste e consulta do NearestNeighbors."""
+    def __init__(self, n_neighbors=100, leaf_size=30):
+        self.n_neighbors = n_neighbors
+        self.leaf_size = leaf_size
+        self.arvore = None
+
+
+    def fit(self, casos):
+        import numpy as np
+        from scipy.spatial import cKDTree
+
+        self.arvore = cKDTree(np.asarray(casos, dtype=np.float64), leafsize=self.leaf_size)
+        return self
+
+
+    def kneighbors(self, matriz, n_neighbors=None):
+        import numpy as np
+
+        k = self.n_neighbors if n_neighbors is None else n_neighbors
+        if (k > self.arvore.n):
+            # como no NearestNeighbors: o cKDTree completaria a resposta com índices fora da base e distância infinita
+            raise ValueError(f"n_neighbors ({k}) maior que o número de casos do índice ({self.arvore.n})")
+
+        distancias, indices = self.arvore.query(np.asarray(matriz, dtype=np.float64), k=[k] if k == 1 else k)
+        return distancias, indices
+
+
+def criar_indice(configuracao):
+    """Índice de vizinhos, ainda sem ajuste, descrito pela configuração."""
+    if (configuracao.get('projecao')):
+        if (configuracao['backend'] in ('sentinela', 'sequencia')):
+            # esses backends dependem das colunas originais (sentinelas e jogadas), que a projeção mistura
+            raise ValueError(f"A projeção não pode ser usada com o backend '{configuracao['backend']}'")
+
+        from .projecao import IndiceProjetado
+        return IndiceProjetado(criar_indice(dict(configuracao, projecao=None)), configuracao['projecao'], configuracao['componentes'])
+
+    if (configuracao['backend'] == 'scipy'):
+        return IndiceKDTree(configuracao['n_neighbors'], configuracao['leaf_size'])
+
+    if (configuracao['backend'] == 'sentinela'):
+        from .distancia import DistanciaSentinela
+        return DistanciaSentinela(configuracao['n_neighbors'], configuracao['escala'], configuracao['penalidade'], configuracao['pesos_colunas'])
+
+    if (configuracao['backend'] == 'sequencia'):
+        from .sequencia import IndiceSequencial
+        return IndiceSequencial(configuracao['n_neighbors'])
+
+    if (configuracao['backend'] == 'ivf'):
+        from .aproximado import IndiceIVF
+        return IndiceIVF(configuracao['n_neighbors'], configuracao['listas'], configuracao['sondas'])
+
+    if (configuracao['backend'] != 'sklearn'):
+        raise ValueError(f"Backend de índice desconhecido: {configuracao['backend']}")
+
+    from sklearn.neighbors import NearestNeighbors
+    return NearestNeighbors(n_neighbors=configuracao['n_neighbors'], algorithm=configuracao['algorithm'], leaf_size=configuracao['leaf_size'])
+
 
 class Cbr():
-    def __init__(self):
+    # pandas e scikit-learn só são importados quando o Cbr é construído, para que importar o módulo seja leve
+    def __init__(self, dados=None, nbrs=None, metricas=None, configuracao=None):
+        import pandas as pd
+
+        if (dados is None):
+            dados = Dados()
+
         self.indice = 0
-        self.dados = Dados()
+        self.dados = dados
         self.dataset = self.dados.retornar_casos()
+        self.pesos = pd.Series(self.dados.retornar_pesos(), index=self.dataset.index)
         # self.dados = self.retornarSimilares()
-        self.nbrs = self.vizinhos_proximos()
+        self.configuracao = carregar_configuracao() if configuracao is None else dict(CONFIGURACAO_PADRAO, **configuracao)
+        # um índice já ajustado (por exemplo, anexado da memória compartilhada) dispensa o fit
+        self.nbrs = self.vizinhos_proximos() if nbrs is None else nbrs
+        self.metricas = METRICAS if metricas is None else metricas
+        # (conteúdo do registro, vizinhos) da última decisão, reaproveitados pelo contexto das partidas
+        self._ultima_consulta = None
 
 
     def carregar_dataset(self):
         """Carrega o dataset, caso necessário"""
+        import pandas as pd
+
         base_dir = Path(__file__).resolve().parent.parent
         csv_path = base_dir / 'dbtrucoimitacao_maos.csv'
         try:
@@ -42,26 +147,103 @@ class Cbr():
 
 
     def vizinhos_proximos(self, df=None):
-        """Cálculo dos 100 Nearest Neighbors."""
+        """Cálculo dos Nearest Neighbors (100 vizinhos por ball tree, salvo outra configuração)."""
         if (df is None):
-            return NearestNeighbors(n_neighbors=100, algorithm='ball_tree').fit(self.dataset)
-            
-        return NearestNeighbors(n_neighbors=100, algorithm='ball_tree').fit(df)
+            return criar_indice(self.configuracao).fit(self.dataset)
 
+        return criar_indice(self.configuracao).fit(df)
 
-    def jogar_carta(self, rodada, pontuacao_cartas):
-        """Método que considera as jogadas em que o bot saiu vitorioso e retorna a pontuação mais próxima a ser jogada em determinada rodada."""
-        registro = self.dados.retornar_registro()
+
+    def consultar(self, matriz, n_neighbors=None):
+        """Busca os vizinhos de vários registros de uma vez (uma linha por registro). Retorna distâncias e índices."""
         warnings.simplefilter(action='ignore', category=UserWarning)
-        distancias, indices = self.nbrs.kneighbors((registro.to_numpy().reshape(1, -1)))
-        jogadas_vencidas = self.dataset.iloc[indices.tolist()[0]]
+        if (n_neighbors is None):
+            return self.nbrs.kneighbors(matriz)
+
+        return self.nbrs.kneighbors(matriz, n_neighbors=n_neighbors)
+
+
+    def vizinhos(self, registro):
+        """Posições, no dataset, dos vizinhos mais próximos do registro."""
+        distancias, indices = self.consultar(registro.to_numpy().reshape(1, -1))
+        return indices[0]
+
+
+    def contexto_partidas(self, registro=None, vizinhos=None):
+        """Hábitos de aposta do humano nas partidas dos vizinhos do registro (ver `IndicePartidas.contexto`), ou None se
+        a base não tem o índice de partidas."""
+        partidas = self.dados.retornar_partidas()
+        if (partidas is None):
+            return None
+
+        if (vizinhos is None):
+            registro = self.dados.retornar_registro() if registro is None else registro
+            vizinhos = self.ultimos_vizinhos(registro)
+            if (vizinhos is None):
+                vizinhos = self.vizinhos(registro)
+
+        return partidas.contexto(vizinhos)
+
+
+    def ultimos_vizinhos(self, registro):
+        """Vizinhos da última decisão, se ela foi tomada para um registro igual a este; senão None.
+
+        O Cbr é compartilhado entre as sessões: a chave é o conteúdo do registro, então uma decisão de outra mesa no
+        meio do caminho só faz a consulta ser refeita, nunca devolve os vizinhos de outro registro.
+        """
+        ultima = self._ultima_consulta
+        if (ultima is not None and ultima[0] == registro.to_numpy().tobytes()):
+            return ultima[1]
+
+        return None
+
+
+    def _mais_frequente(self, jogadas, coluna):
+        """Retorna o valor mais frequente da coluna entre os casos, contando o peso de cada caso (empates pela primeira ocorrência)."""
+        if (jogadas.empty):
+            # nenhum vizinho passou no filtro: sem referência, usa o sentinel de valor ausente
+            self.metricas.incrementar('vizinhos_vazios_total', coluna=coluna)
+            return -100
+
+        contagem = self.pesos.loc[jogadas.index].groupby(jogadas[coluna].to_numpy(), sort=False).sum()
+        return contagem.sort_values(ascending=False, kind='stable').index.to_list()[0]
+
+
+    def _vizinhos_decisao(self, registro, vizinhos, cronometro):
+        """Vizinhos usados em uma decisão: os recebidos (por exemplo, de uma consulta em lote) ou os do registro."""
+        if (vizinhos is None):
+            if (registro is None):
+                registro = self.dados.retornar_registro()
+
+            vizinhos = self.vizinhos(registro)
+            cronometro.marcar('consulta')
+
+        if (registro is not None):
+            self._ultima_consulta = (registro.to_numpy().tobytes(), vizinhos)
+
+        return vizinhos
+
+
+    def jogar_carta(self, rodada, pontuacao_cartas, registro=None, vizinhos=None):
+        """Método que considera as jogadas em que o bot saiu vitorioso e retorna a pontuação mais próxima a ser jogada em determinada rodada."""
+        cronometro = self.metricas.cronometro('jogar_carta')
+        vizinhos = self._vizinhos_decisao(registro, vizinhos, cronometro)
+        jogadas_vencidas = self.dataset.iloc[vizinhos]
         jogadas_vencidas = jogadas_vencidas[(((jogadas_vencidas.ganhadorPrimeiraRodada == 2) & ((jogadas_vencidas.ganhadorSegundaRodada == 2)) | (jogadas_vencidas.ganhadorPrimeiraRodada == 2)) & (jogadas_vencidas.ganhadorTerceiraRodada == 2) | ((jogadas_vencidas.ganhadorSegundaRodada == 2) & (jogadas_vencidas.ganhadorTerceiraRodada == 2)))]
+        cronometro.marcar('recorte')
+        decisao = self._decidir_carta(jogadas_vencidas, rodada, pontuacao_cartas)
+        cronometro.encerrar('agregacao')
+        return decisao
+
+
+    def _decidir_carta(self, jogadas_vencidas, rodada, pontuacao_cartas):
+        """Agregação do jogar_carta: a carta mais próxima da mais jogada nas partidas vencidas."""
         ordem_carta_jogada = 'CartaRobo'
         if ((rodada) == 3): ordem_carta_jogada = 'primeira' + ordem_carta_jogada
         elif ((rodada) == 2): ordem_carta_jogada = 'segunda' + ordem_carta_jogada
         elif ((rodada) == 1): ordem_carta_jogada = 'terceira' + ordem_carta_jogada
 
-        valor_referencia = jogadas_vencidas[ordem_carta_jogada].value_counts().index.to_list()[0]
+        valor_referencia = self._mais_frequente(jogadas_vencidas, ordem_carta_jogada)
         if (valor_referencia <= 0): 
             return -1
 
@@ -72,19 +254,25 @@ class Cbr():
         # return carta_escolhida
         return pontuacao_cartas.index(int(carta_escolhida))
 
-    def truco(self, tipo, quem_pediu, qualidade_mao_bot):
+    def truco(self, tipo, quem_pediu, qualidade_mao_bot, registro=None, vizinhos=None):
         """Método que considera o pedido de truco e retorna a melhor opção entre aceitar, aumentar ou fugir."""
-        registro = self.dados.retornar_registro()
-        warnings.simplefilter(action='ignore', category=UserWarning)
-        distancias, indices = self.nbrs.kneighbors((registro.to_numpy().reshape(1, -1)))
-        jogadas = perdidas = self.dataset.iloc[indices.tolist()[0]]
+        cronometro = self.metricas.cronometro('truco')
+        vizinhos = self._vizinhos_decisao(registro, vizinhos, cronometro)
+        jogadas = perdidas = self.dataset.iloc[vizinhos]
         jogadas = jogadas[(jogadas.quemGanhouTruco == 2)]
         perdidas = perdidas[(perdidas.quemGanhouTruco == 1)]
+        cronometro.marcar('recorte')
+        decisao = self._decidir_truco(jogadas, perdidas, qualidade_mao_bot)
+        cronometro.encerrar('agregacao')
+        return decisao
+
 
-        vencidas = jogadas['quemGanhouTruco'].value_counts().index.to_list()[0]
-        perdidas = perdidas['quemGanhouTruco'].value_counts().index.to_list()[0]
-        retruco = jogadas['quemRetruco'].value_counts().index.to_list()[0]
-        qualidade_mao_humana = jogadas['qualidadeMaoHumano'].dropna().value_counts().index.to_list()[0]
+    def _decidir_truco(self, jogadas, perdidas, qualidade_mao_bot):
+        """Agregação do truco: compara os trucos vencidos e perdidos e a qualidade das mãos."""
+        vencidas = self._mais_frequente(jogadas, 'quemGanhouTruco')
+        perdidas = self._mais_frequente(perdidas, 'quemGanhouTruco')
+        retruco = self._mais_frequente(jogadas, 'quemRetruco')
+        qualidade_mao_humana = self._mais_frequente(jogadas, 'qualidadeMaoHumano')
 
 
         if (vencidas > perdidas and qualidade_mao_bot > qualidade_mao_humana):
@@ -97,23 +285,30 @@ class Cbr():
             return 0
 
 
-    def envido(self, tipo, quem_pediu, pontos_envido_robo, robo_perdendo=None):
+    def envido(self, tipo, quem_pediu, pontos_envido_robo, robo_perdendo=None, registro=None, vizinhos=None):
         """Método que considera o pedido de envido e retorna a melhor opção entre aceitar, pedir real envido, falta envido ou fugir."""
-        registro = self.dados.retornar_registro()
-        warnings.simplefilter(action='ignore', category=UserWarning)
-        distancias, indices = self.nbrs.kneighbors((registro.to_numpy().reshape(1, -1)))
-        jogadas = self.dataset.iloc[indices.tolist()[0]]
+        cronometro = self.metricas.cronometro('envido')
+        vizinhos = self._vizinhos_decisao(registro, vizinhos, cronometro)
+        jogadas = self.dataset.iloc[vizinhos]
         ganhas = jogadas[((jogadas.pontosEnvidoRobo > jogadas.pontosEnvidoHumano) | (jogadas.quemGanhouEnvido == 2))]
         perdidas = jogadas[((jogadas.pontosEnvidoRobo < jogadas.pontosEnvidoHumano) | (jogadas.quemGanhouEnvido == 1))]
+        cronometro.marcar('recorte')
+        decisao = self._decidir_envido(ganhas, perdidas, tipo, quem_pediu, pontos_envido_robo, robo_perdendo)
+        cronometro.encerrar('agregacao')
+        return decisao
+
+
+    def _decidir_envido(self, ganhas, perdidas, tipo, quem_pediu, pontos_envido_robo, robo_perdendo):
+        """Agregação do envido: compara os envidos ganhos e perdidos e os pontos do humano."""
         # 'quemPediuEnvido', 'quemPediuFaltaEnvido', 'quemPediuRealEnvido', 'pontosEnvidoRobo', 'pontosEnvidoHumano', 'quemNegouEnvido', 'quemGanhouEnvido', 'quemEscondeuPontosEnvido'
         # print(jogadas)
-        envido_ganhas = ganhas['quemGanhouEnvido'].value_counts().index.to_list()[0]
-        envido_perdidas = perdidas['quemGanhouEnvido'].value_counts().index.to_list()[0]
-        real_envido_ganhas = ganhas['quemPediuRealEnvido'].value_counts().index.to_list()[0]
-        real_envido_perdidas = perdidas['quemPediuFaltaEnvido'].value_counts().index.to_list()[0]
-        falta_envido_ganhas = ganhas['quemPediuFaltaEnvido'].value_counts().index.to_list()[0]
-        falta_envido_perdidas = perdidas['quemPediuFaltaEnvido'].value_counts().index.to_list()[0]
-        pontos_jogador = ganhas['pontosEnvidoHumano'].value_counts().index.to_list()[0]
+        envido_ganhas = self._mais_frequente(ganhas, 'quemGanhouEnvido')
+        envido_perdidas = self._mais_frequente(perdidas, 'quemGanhouEnvido')
+        real_envido_ganhas = self._mais_frequente(ganhas, 'quemPediuRealEnvido')
+        real_envido_perdidas = self._mais_frequente(perdidas, 'quemPediuFaltaEnvido')
+        falta_envido_ganhas = self._mais_frequente(ganhas, 'quemPediuFaltaEnvido')
+        falta_envido_perdidas = self._mais_frequente(perdidas, 'quemPediuFaltaEnvido')
+        pontos_jogador = self._mais_frequente(ganhas, 'pontosEnvidoHumano')
 
         # Condição especial quando o robô considera pedir o envido na primeira jogada
         if (quem_pediu == 2 and pontos_envido_robo > 5):
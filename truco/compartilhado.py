@@ -0,0 +1,95 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import pandas as pd
+from .cbr import Cbr
+from .dados import Dados
+
+# Alinhamento (em bytes) de cada array dentro do bloco de memória compartilhada
+ALINHAMENTO = 64
+
+# Cbr anexado pelo processo trabalhador em `inicializar_trabalhador`
+_CBR = None
+
+
+def _alinhar(posicao):
+    return (posicao + ALINHAMENTO - 1) // ALINHAMENTO * ALINHAMENTO
+
+
+class BaseCompartilhada():
+    """Publica a base de casos int16 e o índice já ajustado do Cbr em um bloco de memória compartilhada.
+
+    O índice é serializado com pickle protocolo 5: os arrays (casos, dados e nós da árvore) vão para o bloco
+    compartilhado e só os metadados ficam no `descritor`, que é pequeno e pode ser enviado aos processos trabalhadores.
+    Os trabalhadores anexam o bloco somente para leitura com `anexar`, sem ler os csv nem refazer o fit.
+    """
+    def __init__(self, cbr=None):
+        if (cbr is None):
+            cbr = Cbr()
+
+        buffers = []
+        partes = {
+            'nbrs': cbr.nbrs,
+            'casos': cbr.dataset.to_numpy(),
+            'ids': cbr.dataset.index.to_numpy(),
+            'pesos': cbr.pesos.to_numpy(),
+            'colunas': list(cbr.dataset.columns),
+        }
+        estrutura = pickle.dumps(partes, protocol=5, buffer_callback=buffers.append)
+        visoes = [buffer.raw() for buffer in buffers]
+        posicoes = []
+        total = 0
+        for visao in visoes:
+            total = _alinhar(total)
+            posicoes.append((total, visao.nbytes))
+            total += visao.nbytes
+
+        self.memoria = shared_memory.SharedMemory(create=True, size=max(total, 1))
+        for (inicio, tamanho), visao in zip(posicoes, visoes):
+            self.memoria.buf[inicio:inicio + tamanho] = visao
+
+        self.descritor = {'nome': self.memoria.name, 'estrutura': estrutura, 'buffers': posicoes}
+
+
+    def tamanho(self):
+        """Tamanho do bloco compartilhado, em bytes."""
+        return self.memoria.size
+
+
+    def criar_pool(self, processos=None):
+        """Pool de processos em que cada trabalhador já começa com o Cbr anexado (veja `cbr_trabalhador`)."""
+        return ProcessPoolExecutor(processos, initializer=inicializar_trabalhador, initargs=(self.descritor,))
+
+
+    def fechar(self):
+        """Libera o bloco compartilhado; deve ser chamado pelo processo que o criou, depois de encerrar os trabalhadores."""
+        self.memoria.close()
+        self.memoria.unlink()
+
+
+def anexar(descritor):
+    """Reconstrói o Cbr a partir do bloco compartilhado, com os arrays somente leitura apontando para o bloco."""
+    memoria = shared_memory.SharedMemory(name=descritor['nome'])
+    buffers = [memoria.buf[inicio:inicio + tamanho].toreadonly() for inicio, tamanho in descritor['buffers']]
+    partes = pickle.loads(descritor['estrutura'], buffers=buffers)
+    casos = pd.DataFrame(partes['casos'], index=pd.Index(partes['ids'], name='idMao'), columns=partes['colunas'], copy=False)
+    dados = Dados(somente_registro=True)
+    dados.definir_casos(casos, partes['pesos'])
+    cbr = Cbr(dados, nbrs=partes['nbrs'])
+    # mantém o bloco anexado enquanto o Cbr existir
+    cbr.memoria = memoria
+    return cbr
+
+
+def inicializar_trabalhador(descritor):
+    """Inicializador dos processos do pool: anexa o Cbr compartilhado uma única vez por processo."""
+    global _CBR
+    _CBR = anexar(descritor)
+
+
+def cbr_trabalhador():
+    """Cbr anexado no processo trabalhador atual."""
+    if (_CBR is None):
+        raise RuntimeError('Este processo não foi inicializado com inicializar_trabalhador.')
+
+    return _CBR
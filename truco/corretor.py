@@ -0,0 +1,172 @@
+import collections
+import threading
+import time
+import numpy as np
+
+# Quantidade de esperas guardadas para o cálculo dos percentis
+AMOSTRAS_ESPERA = 10000
+
+
+class _Pedido():
+    def __init__(self, registro):
+        self.registro = registro
+        self.chegada = time.perf_counter()
+        self.pronto = threading.Event()
+        self.vizinhos = None
+        self.erro = None
+
+
+class CorretorDecisoes():
+    """Agrupa as consultas de vizinhos de várias sessões em uma única busca no índice do `Cbr`.
+
+    As consultas ficam na fila até juntar `tamanho_lote` pedidos ou até o primeiro deles completar `espera` segundos;
+    então uma só chamada a `kneighbors` responde o lote inteiro. Lotes maiores aproveitam melhor a busca vetorizada,
+    ao custo de até `espera` segundos a mais de latência por decisão. Expõe a mesma interface de decisões do `Cbr`.
+    """
+    def __init__(self, cbr, tamanho_lote=32, espera=0.0003):
+        if (tamanho_lote < 1):
+            raise ValueError('O tamanho do lote deve ser pelo menos 1.')
+
+        self.cbr = cbr
+        self.dados = cbr.dados
+        self.tamanho_lote = tamanho_lote
+        self.espera = espera
+        self.fila = []
+        self.condicao = threading.Condition()
+        self.trava_metricas = threading.Lock()
+        self.tamanhos = collections.Counter()
+        self.esperas = collections.deque(maxlen=AMOSTRAS_ESPERA)
+        self.total_espera = 0.0
+        self.total_busca = 0.0
+        self.fechado = False
+        self.thread = threading.Thread(target=self._executar, name='corretor-decisoes', daemon=True)
+        self.thread.start()
+
+
+    def vizinhos(self, registro):
+        """Enfileira o registro e bloqueia até o lote em que ele entrou ser respondido."""
+        pedido = _Pedido(np.asarray(registro.to_numpy()).reshape(-1))
+        with self.condicao:
+            if (self.fechado):
+                raise RuntimeError('O corretor de decisões já foi fechado.')
+
+            self.fila.append(pedido)
+            self.condicao.notify()
+
+        pedido.pronto.wait()
+        if (pedido.erro is not None):
+            raise pedido.erro
+
+        return pedido.vizinhos
+
+
+    def jogar_carta(self, rodada, pontuacao_cartas, registro=None):
+        registro = self._registro(registro)
+        return self.cbr.jogar_carta(rodada, pontuacao_cartas, registro, vizinhos=self.vizinhos(registro))
+
+
+    def truco(self, tipo, quem_pediu, qualidade_mao_bot, registro=None):
+        registro = self._registro(registro)
+        return self.cbr.truco(tipo, quem_pediu, qualidade_mao_bot, registro, vizinhos=self.vizinhos(registro))
+
+
+    def envido(self, tipo, quem_pediu, pontos_envido_robo, robo_perdendo=None, registro=None):
+        registro = self._registro(registro)
+        return self.cbr.envido(tipo, quem_pediu, pontos_envido_robo, robo_perdendo, registro, vizinhos=self.vizinhos(registro))
+
+
+    def contexto_partidas(self, registro=None):
+        registro = self._registro(registro)
+        vizinhos = self.cbr.ultimos_vizinhos(registro)
+        return self.cbr.contexto_partidas(registro, vizinhos=self.vizinhos(registro) if vizinhos is None else vizinhos)
+
+
+    def metricas(self):
+        """Distribuição do tamanho dos lotes e tempo de espera na fila (em segundos)."""
+        with self.trava_metricas:
+            lotes = sum(self.tamanhos.values())
+            consultas = sum(tamanho * n for tamanho, n in self.tamanhos.items())
+            esperas = sorted(self.esperas)
+            return {
+                'lotes': lotes,
+                'consultas': consultas,
+                'tamanho_medio': consultas / lotes if lotes else 0.0,
+                'tamanhos': dict(sorted(self.tamanhos.items())),
+                'espera_media': self.total_espera / consultas if consultas else 0.0,
+                'espera_p50': percentil(esperas, 0.5),
+                'espera_p99': percentil(esperas, 0.99),
+                'espera_max': esperas[-1] if esperas else 0.0,
+                'busca_media': self.total_busca / lotes if lotes else 0.0,
+            }
+
+
+    def fechar(self):
+        """Responde o que estiver na fila e encerra a thread do corretor."""
+        with self.condicao:
+            self.fechado = True
+            self.condicao.notify()
+
+        self.thread.join()
+
+
+    def _registro(self, registro):
+        if (registro is None):
+            return self.dados.retornar_registro()
+
+        return registro
+
+
+    def _executar(self):
+        while True:
+            with self.condicao:
+                while (not self.fila and not self.fechado):
+                    self.condicao.wait()
+
+                if not (self.fila):
+                    return
+
+                # espera o lote encher, mas nunca além do prazo do pedido mais antigo
+                prazo = self.fila[0].chegada + self.espera
+                while (len(self.fila) < self.tamanho_lote and not self.fechado):
+                    restante = prazo - time.perf_counter()
+                    if (restante <= 0):
+                        break
+
+                    self.condicao.wait(restante)
+
+                lote = self.fila[:self.tamanho_lote]
+                del self.fila[:self.tamanho_lote]
+
+            self._responder(lote)
+
+
+    def _responder(self, lote):
+        inicio = time.perf_counter()
+        try:
+            _, indices = self.cbr.consultar(np.vstack([pedido.registro for pedido in lote]))
+        except Exception as erro:
+            for pedido in lote:
+                pedido.erro = erro
+                pedido.pronto.set()
+
+            return
+
+        fim = time.perf_counter()
+        with self.trava_metricas:
+            self.tamanhos[len(lote)] += 1
+            self.total_busca += fim - inicio
+            for pedido in lote:
+                self.esperas.append(inicio - pedido.chegada)
+                self.total_espera += inicio - pedido.chegada
+
+        for pedido, vizinhos in zip(lote, indices):
+            pedido.vizinhos = vizinhos
+            pedido.pronto.set()
+
+
+def percentil(valores, q):
+    """Percentil `q` (entre 0 e 1) de uma lista já ordenada."""
+    if not (valores):
+        return 0.0
+
+    return valores[min(len(valores) - 1, int(q * (len(valores) - 1) + 0.5))]
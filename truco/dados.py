@@ -1,52 +1,73 @@
-import pandas as pd
-import os
 from pathlib import Path
+from .colunas import COLUNAS
+from .gravador import GravadorCasos
+from .metricas import METRICAS
+
+# Registro modelo lido uma única vez por processo; cada Dados recebe uma cópia
+_MODELO_REGISTRO = None
+
 
 class Dados():
-    def __init__(self):
-        self.colunas = ['idMao', 'jogadorMao', 'cartaAltaRobo', 'cartaMediaRobo', 'cartaBaixaRobo', 'cartaAltaHumano', 'cartaMediaHumano', 'cartaBaixaHumano', 'primeiraCartaRobo', 'primeiraCartaHumano', 'segundaCartaRobo', 'segundaCartaHumano', 'terceiraCartaRobo', 'terceiraCartaHumano', 'ganhadorPrimeiraRodada', 'ganhadorSegundaRodada', 'ganhadorTerceiraRodada', 'quemPediuEnvido', 'quemPediuFaltaEnvido', 'quemPediuRealEnvido', 'pontosEnvidoRobo', 'pontosEnvidoHumano', 'quemNegouEnvido', 'quemGanhouEnvido', 'quemFlor', 'quemContraFlor', 'quemContraFlorResto', 'quemNegouFlor', 'pontosFlorRobo', 'pontosFlorHumano', 'quemGanhouFlor', 'quemEscondeuPontosEnvido', 'quemEscondeuPontosFlor', 'quemTruco', 'quemRetruco', 'quemValeQuatro', 'quemNegouTruco', 'quemGanhouTruco','quemEnvidoEnvido', 'quemFlor', 'naipeCartaAltaRobo', 'naipeCartaMediaRobo', 'naipeCartaBaixaRobo', 'naipeCartaAltaHumano', 'naipeCartaMediaHumano', 'naipeCartaBaixaHumano', 'naipePrimeiraCartaRobo', 'naipePrimeiraCartaHumano', 'naipeSegundaCartaRobo', 'naipeSegundaCartaHumano', 'naipeTerceiraCartaRobo', 'naipeTerceiraCartaHumano', 'qualidadeMaoRobo', 'qualidadeMaoHumano']
+    # numpy, pandas e o leitor das fontes são importados nos métodos que os usam, para que importar o módulo seja leve
+    def __init__(self, banco=None, fontes=None, deduplicar=True, somente_registro=False, gravador=None):
+        if (fontes is None and not somente_registro):
+            from .fontes import fontes_padrao
+            fontes = fontes_padrao()
+
+        self.colunas = COLUNAS
+        self.banco = banco
+        self.fontes = fontes
+        self.deduplicar = deduplicar
+        self.pesos = None
+        # posição, em self.casos, de cada linha lida das fontes (a deduplicação une linhas repetidas em um caso)
+        self.inverso = None
+        # índice das partidas (idPartida -> mãos e agregados), montado junto com a leitura dos casos das fontes
+        self.partidas = None
         self.registro = self.carregar_modelo_zerado()
-        self.casos = self.tratamento_inicial_df()
+        # com somente_registro a base de casos não é carregada: usado pelas sessões, que compartilham a base do Cbr
+        self.casos = None if somente_registro else self.carregar_casos()
+        self.gravador = gravador
+        # um gravador recebido de fora é compartilhado (por exemplo, entre sessões) e não é fechado por este Dados
+        self.gravador_compartilhado = gravador is not None
+
+    def carregar_casos(self):
+        """Carrega a base de casos (do banco SQLite, quando configurado, ou das fontes csv) e calcula o peso de cada caso.
+
+        Das fontes, as colunas de partida (idPartida e placares) vêm na mesma leitura, para o índice de partidas.
+        """
+        import numpy as np
+        from .fontes import carregar_fontes, deduplicar_casos
+        from .partidas import COLUNAS_EXTRAS, IndicePartidas, tabela_partidas
+
+        extras = None
+        if (self.banco is not None):
+            casos, pesos = self.banco.carregar_casos(), None
+
+        else:
+            casos, pesos, extras = carregar_fontes(self.fontes, self.colunas, extras=COLUNAS_EXTRAS)
+
+        lidos = casos
+        if (self.deduplicar):
+            casos, pesos, self.inverso = deduplicar_casos(casos, pesos, com_inverso=True)
+
+        else:
+            self.inverso = np.arange(len(casos))
+            if (pesos is None):
+                pesos = np.ones(len(casos), dtype=np.float64)
+
+        if (extras is not None):
+            self.partidas = IndicePartidas(tabela_partidas(lidos, extras, self.inverso))
+
+        self.pesos = pesos
+        return casos
+
 
     def tratamento_inicial_df(self):
         """Tratamento de dados do dataframe que será utilizado para alimentar a base de casos"""
-        base_dir = Path(__file__).resolve().parent.parent
-        csv_path = base_dir / 'dbtrucoimitacao_maos.csv'
-        # leitura robusta: arquivo neste projeto usa separador por tab e contém 'NULL' como string para valores ausentes
-        try:
-            df = pd.read_csv(csv_path, usecols=self.colunas, index_col='idMao', sep='\t', na_values=['NULL'], encoding='utf-8', low_memory=False)
-        except FileNotFoundError:
-            # fallback para caminho relativo ao cwd (comportamento antigo)
-            df = pd.read_csv('dbtrucoimitacao_maos.csv', usecols=self.colunas, index_col='idMao', sep='\t', na_values=['NULL'], encoding='utf-8', low_memory=False)
-
-        # garantir valores faltantes com um sentinel para tipos inteiros
-        df = df.fillna(-100)
-
-        colunas_string = [
-            'naipeCartaAltaRobo', 'naipeCartaMediaRobo', 'naipeCartaBaixaRobo',
-            'naipeCartaAltaHumano', 'naipeCartaMediaHumano', 'naipeCartaBaixaHumano',
-            'naipePrimeiraCartaRobo', 'naipePrimeiraCartaHumano', 'naipeSegundaCartaRobo',
-            'naipeSegundaCartaHumano', 'naipeTerceiraCartaRobo', 'naipeTerceiraCartaHumano',
-        ]
-
-        # converter naipes para inteiros apenas nas colunas de naipe existentes
-        mapping = {'ESPADAS': 1, 'OURO': 2, 'BASTOS': 3, 'COPAS': 4}
-        present_naipes = [c for c in colunas_string if c in df.columns]
-        # substituir por coluna e forçar dtype numérico explicitamente para evitar FutureWarning de downcasting
-        for col in present_naipes:
-            # mapear valores conhecidos para códigos numéricos sem usar `replace` (evita downcasting warning)
-            s = df[col]
-            mapped = s.map(mapping)
-            # use where instead of fillna to avoid downcasting warning when combining object/number series
-            combined = mapped.where(mapped.notna(), s)
-            df[col] = pd.to_numeric(combined, errors='coerce').fillna(-66).astype('int16')
-
-        colunas_int = [col for col in df.columns if col not in present_naipes]
-        # forçar colunas numéricas para int16 (coercendo se necessário)
-        for c in colunas_int:
-            df[c] = pd.to_numeric(df[c], errors='coerce').fillna(-100).astype('int16')
-
-        return df
+        from .fontes import carregar_fontes
+
+        casos, _ = carregar_fontes(self.fontes, self.colunas)
+        return casos
 
 
     def cartas_jogadas_pelo_bot(self, rodada, carta_robo):
@@ -134,6 +155,11 @@ class Dados():
         self.registro.pontosFlorRobo = pontos_flor_robo
     
 
+    def pedido_envido(self, quem_pediu_envido):
+        """Adiciona na base de casos quem pediu o envido"""
+        self.registro.quemPediuEnvido = quem_pediu_envido
+
+
     def vencedor_envido(self, quem_ganhou_envido, quem_negou_envido):
         """Adiciona na base de casos as informações referentes ao truco"""
         self.registro.quemGanhouEnvido = quem_ganhou_envido
@@ -154,12 +180,19 @@ class Dados():
 
     def carregar_modelo_zerado(self):
         """Carrega um dataframe zerado, para ser utilizado como modelo de caso."""
-        base_dir = Path(__file__).resolve().parent.parent
-        modelo_path = base_dir / 'modelo_registro.csv'
-        try:
-            return pd.read_csv(modelo_path, usecols=self.colunas, index_col='idMao')
-        except FileNotFoundError:
-            return pd.read_csv('modelo_registro.csv', usecols=self.colunas, index_col='idMao')
+        global _MODELO_REGISTRO
+        METRICAS.incrementar('cache_total', cache='modelo_registro', resultado='acerto' if _MODELO_REGISTRO is not None else 'falha')
+        if (_MODELO_REGISTRO is None):
+            import pandas as pd
+
+            base_dir = Path(__file__).resolve().parent.parent
+            modelo_path = base_dir / 'modelo_registro.csv'
+            try:
+                _MODELO_REGISTRO = pd.read_csv(modelo_path, usecols=self.colunas, index_col='idMao')
+            except FileNotFoundError:
+                _MODELO_REGISTRO = pd.read_csv('modelo_registro.csv', usecols=self.colunas, index_col='idMao')
+
+        return _MODELO_REGISTRO.copy()
 
 
     def retornar_registro(self):
@@ -167,20 +200,55 @@ class Dados():
         return self.registro
    
 
+    def definir_casos(self, casos, pesos):
+        """Usa uma base de casos já carregada (por exemplo, anexada da memória compartilhada)."""
+        self.casos = casos
+        self.pesos = pesos
+        # as mãos lidas das fontes não correspondem mais a esses casos
+        self.inverso = None
+        self.partidas = None
+
+
     def retornar_casos(self):
         """Retorna os casos."""
         return self.casos
+
+
+    def retornar_pesos(self):
+        """Retorna o peso de cada caso (quantas linhas das fontes ele representa)."""
+        return self.pesos
     
    
+    def retornar_partidas(self):
+        """Retorna o índice das partidas dos casos lidos das fontes (None se os casos vieram do banco ou de `definir_casos`)."""
+        return self.partidas
+
+
+    def retornar_gravador(self):
+        """Retorna o gravador de casos, criando-o na primeira chamada."""
+        if (self.gravador is None):
+            self.gravador = GravadorCasos(self.banco)
+
+        return self.gravador
+
+
     def finalizar_partida(self):
-        """Método para salvar as jogadas da partida em um csv."""
-        if not(os.path.isfile('jogadas.csv')):
-            self.registro.to_csv('jogadas.csv', header=self.registro.columns)
-        else:
-            self.registro.to_csv('jogadas.csv', mode='a', header=False)
+        """Método para salvar as jogadas da partida (no csv ou no banco), enfileirando o registro para o gravador em segundo plano."""
+        self.retornar_gravador().adicionar(self.registro)
+
+
+    def fechar(self):
+        """Grava os registros pendentes e encerra o gravador, se ele pertencer a este Dados."""
+        if (self.gravador is not None and not self.gravador_compartilhado):
+            self.gravador.fechar()
+
+
+    def resetar_registro(self):
+        """Volta o registro para o modelo zerado, sem recarregar a base de casos."""
+        self.registro = self.carregar_modelo_zerado()
 
 
     def resetar(self):
         """Resetar variáveis ligadas a rodada."""
-        self.casos = self.tratamento_inicial_df()
+        self.casos = self.carregar_casos()
         self.registro = self.carregar_modelo_zerado()
\ No newline at end of file
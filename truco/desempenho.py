@@ -0,0 +1,135 @@
+import argparse
+import json
+import math
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Razão máxima entre o tempo medido e o da referência antes de o benchmark ser considerado uma regressão
+TOLERANCIA = 1.5
+
+# Módulos medidos pelo perfil de inicialização e as dependências pesadas que cada um pode acabar importando
+MODULOS = ['truco.carta', 'truco.baralho', 'truco.jogo', 'truco.envido', 'truco.truco', 'truco.flor', 'truco.sessao', 'truco.dados', 'truco.cbr', 'truco.corretor', 'truco.servidor', 'truco.servico']
+PESADAS = ['numpy', 'pandas', 'sklearn']
+
+# Executado em um interpretador novo, para que o tempo não dependa do que já foi importado antes
+_IMPORTAR = '''
+import importlib, json, sys, time
+inicio = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(json.dumps({'tempo': time.perf_counter() - inicio, 'pesadas': [m for m in sys.argv[2:] if m in sys.modules]}))
+'''
+
+
+def medir(funcao, repeticoes=7, tempo_minimo=0.1, chamadas=None):
+    """Mede o tempo por chamada de `funcao`, em segundos.
+
+    Depois de uma chamada de aquecimento, calibra quantas chamadas cabem em `tempo_minimo` segundos e repete essa
+    rodada `repeticoes` vezes. O mínimo das rodadas, menos sensível a interferências da máquina, é o valor
+    usado na comparação com a referência.
+    """
+    inicio = time.perf_counter()
+    funcao()
+    primeira = time.perf_counter() - inicio
+    if (chamadas is None):
+        chamadas = max(1, math.ceil(tempo_minimo / max(primeira, 1e-9)))
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for _ in range(chamadas):
+            funcao()
+
+        tempos.append((time.perf_counter() - inicio) / chamadas)
+
+    return {
+        'mediana': statistics.median(tempos),
+        'media': statistics.fmean(tempos),
+        'minimo': min(tempos),
+        'maximo': max(tempos),
+        'desvio': statistics.pstdev(tempos),
+        'repeticoes': repeticoes,
+        'chamadas': chamadas,
+    }
+
+
+def carregar_referencia(caminho):
+    """Lê o arquivo JSON de referência; um arquivo inexistente equivale a uma referência vazia."""
+    caminho = Path(caminho)
+    if not (caminho.exists()):
+        return {}
+
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)['benchmarks']
+
+
+def salvar_referencia(caminho, resultados):
+    """Grava os resultados como nova referência, mantendo os benchmarks da referência anterior que não foram medidos."""
+    benchmarks = carregar_referencia(caminho)
+    benchmarks.update(resultados)
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump({'gerado_em': time.strftime('%Y-%m-%dT%H:%M:%S'), 'benchmarks': benchmarks}, arquivo, indent=2, sort_keys=True)
+        arquivo.write('\n')
+
+
+def comparar(resultado, referencia, tolerancia=TOLERANCIA):
+    """Razão entre o mínimo medido e o da referência, e se ela passou da tolerância (None quando não há referência)."""
+    if (referencia is None):
+        return None, False
+
+    razao = resultado['minimo'] / max(referencia['minimo'], 1e-12)
+    return razao, razao > tolerancia
+
+
+def tempo_importacao(modulo):
+    """Tempo de importação do módulo em um interpretador novo e quais dependências pesadas ele carregou."""
+    processo = subprocess.run([sys.executable, '-c', _IMPORTAR, modulo] + PESADAS, capture_output=True, text=True, check=True)
+    return json.loads(processo.stdout.splitlines()[-1])
+
+
+def perfil_inicializacao(modulos=MODULOS, carga=True):
+    """Perfil de inicialização: importação de cada módulo e, com `carga`, a importação das dependências pesadas,
+    a leitura da base de casos e o ajuste do índice."""
+    perfil = {'importacao': {modulo: tempo_importacao(modulo) for modulo in modulos}}
+    if (carga):
+        from .cbr import Cbr
+        from .dados import Dados
+
+        inicio = time.perf_counter()
+        import pandas
+        import sklearn.neighbors
+        importado = time.perf_counter()
+        dados = Dados()
+        lido = time.perf_counter()
+        Cbr(dados)
+        perfil['carga'] = {'dependencias': importado - inicio, 'dados': lido - importado, 'cbr': time.perf_counter() - lido, 'casos': len(dados.retornar_casos())}
+
+    return perfil
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Perfil de inicialização: tempo de importação de cada módulo e da carga do Cbr.')
+    parser.add_argument('modulos', nargs='*', default=MODULOS, help='módulos a medir (padrão: os principais do pacote)')
+    parser.add_argument('--sem-carga', action='store_true', help='não mede a leitura da base de casos nem o ajuste do índice')
+    parser.add_argument('--json', action='store_true', help='imprime o perfil em JSON')
+    args = parser.parse_args(argv)
+
+    perfil = perfil_inicializacao(args.modulos, carga=not args.sem_carga)
+    if (args.json):
+        print(json.dumps(perfil, indent=2))
+        return
+
+    for modulo, resultado in perfil['importacao'].items():
+        print(f"{modulo:<20} {resultado['tempo'] * 1000:8.1f} ms  {', '.join(resultado['pesadas']) or '-'}")
+
+    if ('carga' in perfil):
+        carga = perfil['carga']
+        print(f"{'pandas, sklearn':<20} {carga['dependencias'] * 1000:8.1f} ms  importação adiada até o primeiro Cbr")
+        print(f"{'Dados()':<20} {carga['dados'] * 1000:8.1f} ms  {carga['casos']} casos")
+        print(f"{'Cbr(dados)':<20} {carga['cbr'] * 1000:8.1f} ms  ajuste do índice")
+
+
+if __name__ == '__main__':
+    main()
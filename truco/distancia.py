@@ -0,0 +1,121 @@
+# Valores usados no Dados.tratamento_inicial_df para ausência: -100 em qualquer coluna e -66 nos naipes desconhecidos
+SENTINELAS = (-100, -66)
+ESCALAS = ('padrao', 'minmax', 'nenhuma')
+# Casos por bloco no cálculo das distâncias, para limitar a memória das matrizes intermediárias
+BLOCO = 2048
+
+
+class DistanciaSentinela():
+    """Índice de vizinhos com distância euclidiana escalada e ponderada que trata os sentinelas como ausentes.
+
+    Em cada coluna, valores presentes nos dois lados contribuem com a diferença escalada; um valor ausente de um
+    lado só contribui com `penalidade` (em unidades da escala); ausente dos dois lados não contribui. A escala é
+    calculada só com os valores presentes e os pesos por coluna multiplicam a contribuição ao quadrado.
+
+    O ajuste transforma os casos uma única vez em um espaço de atributos expandido em que a distância ao quadrado
+    é um produto escalar, então cada consulta faz uma multiplicação de matrizes por bloco de casos, sem reescalar a base.
+    """
+    def __init__(self, n_neighbors=100, escala='padrao', penalidade=2.0, pesos_colunas=None, sentinelas=SENTINELAS, bloco=BLOCO):
+        if (escala not in ESCALAS):
+            raise ValueError(f'Escala desconhecida: {escala}')
+
+        self.n_neighbors = n_neighbors
+        self.escala = escala
+        self.penalidade = penalidade
+        self.pesos_colunas = pesos_colunas or {}
+        self.sentinelas = sentinelas
+        self.bloco = bloco
+
+
+    def _presentes(self, matriz):
+        import numpy as np
+
+        return ~np.isin(matriz, self.sentinelas)
+
+
+    def _ajustar_escala(self, matriz, presentes):
+        import numpy as np
+
+        faltantes = np.where(presentes, matriz, np.nan)
+        colunas_vazias = ~presentes.any(axis=0)
+        faltantes[:, colunas_vazias] = 0
+        if (self.escala == 'padrao'):
+            centro, largura = np.nanmean(faltantes, axis=0), np.nanstd(faltantes, axis=0)
+
+        elif (self.escala == 'minmax'):
+            centro = np.nanmin(faltantes, axis=0)
+            largura = np.nanmax(faltantes, axis=0) - centro
+
+        else:
+            centro, largura = np.zeros(matriz.shape[1]), np.ones(matriz.shape[1])
+
+        largura[largura == 0] = 1
+        return centro, largura
+
+
+    def _transformar(self, matriz):
+        """Valores escalados (zero onde ausentes) e a máscara dos presentes, em float64."""
+        import numpy as np
+
+        matriz = np.asarray(matriz, dtype=np.float64)
+        presentes = self._presentes(matriz)
+        escalados = np.where(presentes, (matriz - self.centro) / self.largura, 0.0)
+        return escalados, presentes.astype(np.float64)
+
+
+    def fit(self, casos):
+        import numpy as np
+
+        colunas = list(getattr(casos, 'columns', []))
+        matriz = np.asarray(casos, dtype=np.float64)
+        self.pesos = np.ones(matriz.shape[1])
+        for coluna, peso in self.pesos_colunas.items():
+            if (coluna not in colunas):
+                raise ValueError(f'Coluna sem peso aplicável: {coluna}')
+
+            self.pesos[colunas.index(coluna)] = peso
+
+        self.centro, self.largura = self._ajustar_escala(matriz, self._presentes(matriz))
+        escalados, presentes = self._transformar(matriz)
+        # distância² = q_ext · x_ext + constante da consulta + constante do caso, com
+        # q_ext = [w q², P_q, -2 w q, -2 p² w P_q] e x_ext = [P_x, w x², x, P_x]
+        self.expandidos = np.ascontiguousarray(np.hstack([presentes, self.pesos * escalados ** 2, escalados, presentes]).T)
+        self.constantes = self.penalidade ** 2 * (presentes @ self.pesos)
+        self.quantidade = len(matriz)
+        return self
+
+
+    def _expandir_consulta(self, matriz):
+        import numpy as np
+
+        escalados, presentes = self._transformar(matriz)
+        expandida = np.hstack([self.pesos * escalados ** 2, presentes, -2 * self.pesos * escalados, -2 * self.penalidade ** 2 * self.pesos * presentes])
+        return expandida, self.penalidade ** 2 * (presentes @ self.pesos)
+
+
+    def kneighbors(self, matriz):
+        """Distâncias e posições dos vizinhos de cada linha, em ordem crescente (empates pela menor posição)."""
+        import numpy as np
+
+        expandida, constantes = self._expandir_consulta(matriz)
+        k = min(self.n_neighbors, self.quantidade)
+        melhores_distancias = np.full((len(expandida), 0), np.inf)
+        melhores_indices = np.empty((len(expandida), 0), dtype=np.intp)
+        for inicio in range(0, self.quantidade, self.bloco):
+            fim = min(inicio + self.bloco, self.quantidade)
+            distancias = expandida @ self.expandidos[:, inicio:fim] + constantes[:, None] + self.constantes[inicio:fim]
+            indices = np.broadcast_to(np.arange(inicio, fim), distancias.shape)
+            melhores_distancias = np.hstack([melhores_distancias, distancias])
+            melhores_indices = np.hstack([melhores_indices, indices])
+            if (melhores_distancias.shape[1] > k):
+                # guarda só os k melhores de cada linha antes do próximo bloco, com folga para os empates no limite
+                limite = np.partition(melhores_distancias, k - 1, axis=1)[:, k - 1:k]
+                manter = melhores_distancias <= limite
+                largura = manter.sum(axis=1).max()
+                ordem = np.argsort(~manter, axis=1, kind='stable')[:, :largura]
+                melhores_distancias = np.take_along_axis(melhores_distancias, ordem, axis=1)
+                melhores_indices = np.take_along_axis(melhores_indices, ordem, axis=1)
+
+        ordem = np.lexsort((melhores_indices, melhores_distancias), axis=1)[:, :k]
+        distancias = np.take_along_axis(melhores_distancias, ordem, axis=1)
+        return np.sqrt(np.maximum(distancias, 0)), np.take_along_axis(melhores_indices, ordem, axis=1)
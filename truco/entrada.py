@@ -0,0 +1,43 @@
+class DecisaoPendente(Exception):
+    """Sinaliza que o jogo precisa de uma escolha do humano para continuar.
+
+    `continuar` recebe a escolha e executa o restante da jogada que ficou suspensa.
+    """
+    def __init__(self, pergunta, opcoes, continuar):
+        super().__init__(pergunta)
+        self.pergunta = pergunta
+        self.opcoes = list(opcoes)
+        self.continuar = continuar
+
+
+    def depois(self, funcao):
+        """Encadeia `funcao` para ser executada com o resultado da continuação, mesmo que surjam novas decisões pendentes."""
+        anterior = self.continuar
+
+        def continuar(escolha):
+            try:
+                resultado = anterior(escolha)
+            except DecisaoPendente as outra:
+                outra.depois(funcao)
+                raise
+
+            return funcao(resultado)
+
+        self.continuar = continuar
+        return self
+
+
+class EntradaConsole():
+    """Lê as escolhas do humano pelo terminal."""
+    def escolher(self, pergunta, opcoes, continuar=None):
+        escolha = -1
+        while (escolha not in opcoes):
+            escolha = int(input(pergunta))
+
+        return escolha
+
+
+class EntradaSessao():
+    """Entrada usada pelas sessões: em vez de bloquear esperando o humano, suspende a jogada com uma `DecisaoPendente`."""
+    def escolher(self, pergunta, opcoes, continuar=None):
+        raise DecisaoPendente(pergunta, opcoes, continuar)
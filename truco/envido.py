@@ -1,5 +1,16 @@
+from .entrada import DecisaoPendente, EntradaConsole
+from .saida import SaidaConsole
+
 class Envido():
-    def __init__(self):
+    def __init__(self, saida=None, entrada=None):
+        if (saida is None):
+            saida = SaidaConsole()
+
+        if (entrada is None):
+            entrada = EntradaConsole()
+
+        self.saida = saida
+        self.entrada = entrada
         self.valor_envido = 2
         self.estado_atual = 0
         self.jogador_pediu_envido = 0
@@ -28,7 +39,6 @@ class Envido():
 
     def controlador_envido(self, cbr, dados, tipo, quem_pediu, jogador1, jogador2, interface):
         """Controlador de métodos, para selecionar o que pode ser chamado ou não."""
-        print(2)
         if (self.estado_atual != 0 or tipo == self.estado_atual):
             return None
         
@@ -40,25 +50,36 @@ class Envido():
 
         self.definir_pontos_jogadores(jogador1, jogador2)
 
-        if (tipo == 6):
-            self.envido(cbr, quem_pediu, jogador1, jogador2)
+        try:
+            if (tipo == 6):
+                self.envido(cbr, quem_pediu, jogador1, jogador2)
+
+            if (tipo ==  7):
+                self.real_envido(cbr, quem_pediu, jogador1, jogador2)
 
-        if (tipo ==  7):
-            self.real_envido(cbr, quem_pediu, jogador1, jogador2)
+            if (tipo ==  8):
+                self.falta_envido(cbr, quem_pediu, jogador1, jogador2)
 
-        if (tipo ==  8):
-            self.falta_envido(cbr, quem_pediu, jogador1, jogador2)
+        except DecisaoPendente as pendente:
+            # o resultado só é exibido depois que o humano responder
+            pendente.depois(lambda _: self.mostrar_resultado(jogador1, jogador2, interface))
+            raise
         
         # else:
         #     return None
 
+        self.mostrar_resultado(jogador1, jogador2, interface)
+
+
+    def mostrar_resultado(self, jogador1, jogador2, interface):
+        """Exibe o vencedor do envido, caso ninguém tenha fugido."""
         if (self.quem_fugiu == 0):
             interface.mostrar_vencedor_envido(self.quem_venceu_envido, jogador1.nome, self.jogador1_pontos, jogador2.nome, self.jogador2_pontos)
 
         
     def envido(self, cbr, quem_pediu, jogador1, jogador2):
         self.estado_atual = 6
-        print("Jogador pediu Envido!")
+        self.saida.emitir('mensagem', texto="Jogador pediu Envido!")
 
         if (quem_pediu == 1):
             self.jogador_pediu_envido = 1
@@ -67,13 +88,16 @@ class Envido():
 
         else:
             self.jogador_pediu_envido = 2
-            escolha = -1
-            while(escolha not in [0, 1, 2, 3]):
-                escolha = int(input(f"Jogador {quem_pediu}, você aceita o pedido de envido?\n[0] Recusar\n[1] Aceitar\n[2] Real Envido\n[3] Falta Envido"))
-        
+            escolha = self.entrada.escolher(f"Jogador {quem_pediu}, você aceita o pedido de envido?\n[0] Recusar\n[1] Aceitar\n[2] Real Envido\n[3] Falta Envido", [0, 1, 2, 3],
+                                            lambda escolha: self.responder_envido(escolha, cbr, quem_pediu, jogador1, jogador2))
+
+        return self.responder_envido(escolha, cbr, quem_pediu, jogador1, jogador2)
 
+
+    def responder_envido(self, escolha, cbr, quem_pediu, jogador1, jogador2):
+        """Aplica a resposta ao envido: recusar, aceitar, pedir real envido ou falta envido."""
         if escolha == 0:
-            print(f"fugiu")
+            self.saida.emitir('mensagem', texto="fugiu")
             if (quem_pediu == 1):
                 jogador1.pontos += 1
                 self.quem_fugiu = 2
@@ -85,7 +109,7 @@ class Envido():
             return
 
         elif escolha == 1:
-            print('Jogador aceitou envido!')
+            self.saida.emitir('mensagem', texto='Jogador aceitou envido!')
             self.avaliar_vencedor_envido(quem_pediu, jogador1, jogador2)
 
         elif escolha == 2:
@@ -100,7 +124,7 @@ class Envido():
     def real_envido(self, cbr, quem_pediu, jogador1, jogador2):
         self.estado_atual = 7
         self.valor_envido = 5
-        print("Jogador pediu Real Envido")
+        self.saida.emitir('mensagem', texto="Jogador pediu Real Envido")
 
         if (quem_pediu == 1):
             # self.jogador_pediu_real_envido = 1
@@ -108,13 +132,16 @@ class Envido():
 
         else:
             # self.jogador_pediu_real_envido = 2
-            escolha = -1
-            while(escolha not in [0, 1, 2]):
-                escolha = int(input(f"Jogador {quem_pediu}, você aceita o pedido de Real envido?\n[0] Recusar\n[1] Aceitar\n[2] Falta Envido"))
-        
+            escolha = self.entrada.escolher(f"Jogador {quem_pediu}, você aceita o pedido de Real envido?\n[0] Recusar\n[1] Aceitar\n[2] Falta Envido", [0, 1, 2],
+                                            lambda escolha: self.responder_real_envido(escolha, cbr, quem_pediu, jogador1, jogador2))
+
+        return self.responder_real_envido(escolha, cbr, quem_pediu, jogador1, jogador2)
+
 
+    def responder_real_envido(self, escolha, cbr, quem_pediu, jogador1, jogador2):
+        """Aplica a resposta ao real envido: recusar, aceitar ou pedir falta envido."""
         if escolha == 0:
-            print(f"Fugiu do Real Envido!")
+            self.saida.emitir('mensagem', texto="Fugiu do Real Envido!")
             if (quem_pediu == 1):
                 jogador1.pontos += 2
                 self.quem_fugiu = 2
@@ -126,7 +153,7 @@ class Envido():
             return
 
         elif escolha == 1:
-            print('Jogador aceitou Real envido!')
+            self.saida.emitir('mensagem', texto='Jogador aceitou Real envido!')
             self.avaliar_vencedor_envido(quem_pediu, jogador1, jogador2)
 
         else:
@@ -137,13 +164,11 @@ class Envido():
     def falta_envido(self, cbr, quem_pediu, jogador1, jogador2):
         self.estado_atual = 8
         if (quem_pediu == 1):
-            print(1)
             self.valor_envido = 12 - jogador2.pontos
 
         else:
-            print(2)
             self.valor_envido = 12 - jogador1.pontos
-        print("Jogador pediu Falta Envido!")
+        self.saida.emitir('mensagem', texto="Jogador pediu Falta Envido!")
 
         if (quem_pediu == 1):
             self.jogador_pediu_envido = 1
@@ -151,13 +176,16 @@ class Envido():
 
         else:
             self.jogador_pediu_envido = 2
-            escolha = -1
-            while(escolha not in [0, 1]):
-                escolha = int(input(f"Jogador {quem_pediu}, você aceita o pedido de envido?\n[0] Recusar\n[1] Aceitar\n"))
-        
+            escolha = self.entrada.escolher(f"Jogador {quem_pediu}, você aceita o pedido de envido?\n[0] Recusar\n[1] Aceitar\n", [0, 1],
+                                            lambda escolha: self.responder_falta_envido(escolha, quem_pediu, jogador1, jogador2))
+
+        return self.responder_falta_envido(escolha, quem_pediu, jogador1, jogador2)
+
 
+    def responder_falta_envido(self, escolha, quem_pediu, jogador1, jogador2):
+        """Aplica a resposta ao falta envido."""
         if escolha == 0:
-            print(f"Fugiu do falta envido!")
+            self.saida.emitir('mensagem', texto="Fugiu do falta envido!")
             if (quem_pediu == 1):
                 jogador1.pontos += 5
                 self.quem_fugiu = 2
@@ -169,7 +197,7 @@ class Envido():
             return False
 
         else:
-            print('Aceitou Falta envido!')
+            self.saida.emitir('mensagem', texto='Aceitou Falta envido!')
             self.avaliar_vencedor_falta_envido(quem_pediu, jogador1, jogador2)
 
     
@@ -185,12 +213,10 @@ class Envido():
 
     def avaliar_vencedor_falta_envido(self, quem_pediu, jogador1, jogador2):
         if self.jogador1_pontos >= self.jogador2_pontos:
-            print(3)
             jogador1.pontos += self.valor_envido
             self.quem_venceu_envido = 1
 
         else:
-            print(4)
             jogador2.pontos += self.valor_envido
             self.quem_venceu_envido = 2
 
@@ -0,0 +1,245 @@
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+from .compartilhado import BaseCompartilhada, cbr_trabalhador
+from .sessao import SessaoJogo
+
+DECISOES = ('jogar_carta', 'truco', 'envido')
+# Pontuações possíveis das cartas (ver truco.pontos), usadas para sortear as mãos do jogar_carta
+PONTUACOES = [52, 50, 42, 40, 24, 16, 12, 8, 7, 6, 4, 3, 2, 1]
+MAX_DIVERGENCIAS = 20
+
+# Motores candidatos já construídos no processo atual, por especificação
+_CANDIDATOS = {}
+
+
+def referencia(cbr):
+    """Candidato trivial (o próprio Cbr), útil para validar o harness: a concordância deve ser total."""
+    return cbr
+
+
+def carregar_candidato(especificacao, cbr):
+    """Constrói o motor candidato a partir de 'modulo:fabrica'; a fabrica recebe o Cbr de referência."""
+    if (especificacao not in _CANDIDATOS):
+        modulo, _, nome = especificacao.partition(':')
+        if not (nome):
+            raise ValueError(f'Candidato inválido: {especificacao!r} (use modulo:fabrica).')
+
+        _CANDIDATOS[especificacao] = getattr(importlib.import_module(modulo), nome)(cbr)
+
+    return _CANDIDATOS[especificacao]
+
+
+def sortear_parametros(decisao, sorteio):
+    """Parâmetros plausíveis para uma decisão, como o jogo os passaria ao Cbr."""
+    if (decisao == 'jogar_carta'):
+        return [sorteio.randint(1, 3), sorteio.sample(PONTUACOES, 3)]
+
+    if (decisao == 'truco'):
+        return [sorteio.choice(['truco', 'retruco', 'vale_quatro']), sorteio.randint(1, 2), sorteio.randint(1, 150)]
+
+    return [sorteio.choice([6, 7, 8]), sorteio.randint(1, 2), sorteio.randint(0, 33), sorteio.choice([False, True])]
+
+
+def amostrar_base(cbr, quantidade, semente=0):
+    """Itens do corpus a partir de registros sorteados da base de casos, um por decisão e registro."""
+    sorteio = random.Random(semente)
+    posicoes = sorteio.sample(range(len(cbr.dataset)), min(quantidade, len(cbr.dataset)))
+    linhas = cbr.dataset.to_numpy()
+    return [(decisao, 'base', linhas[i].tolist(), sortear_parametros(decisao, sorteio)) for i in posicoes for decisao in DECISOES]
+
+
+class Descartar():
+    """Gravador que descarta os registros das partidas simuladas."""
+    def adicionar(self, registro):
+        pass
+
+    def fechar(self):
+        pass
+
+
+class _CbrGravado():
+    """Repassa as decisões da sessão ao Cbr e guarda o registro e os parâmetros de cada uma no corpus."""
+    def __init__(self, cbr_sessao, corpus):
+        self.cbr_sessao = cbr_sessao
+        self.corpus = corpus
+
+
+    def _guardar(self, decisao, parametros):
+        self.corpus.append((decisao, 'simulacao', self.cbr_sessao.dados.retornar_registro().to_numpy()[0].tolist(), parametros))
+
+
+    def jogar_carta(self, rodada, pontuacao_cartas):
+        self._guardar('jogar_carta', [rodada, list(pontuacao_cartas)])
+        return self.cbr_sessao.jogar_carta(rodada, pontuacao_cartas)
+
+
+    def truco(self, tipo, quem_pediu, qualidade_mao_bot):
+        self._guardar('truco', [tipo, quem_pediu, qualidade_mao_bot])
+        return self.cbr_sessao.truco(tipo, quem_pediu, qualidade_mao_bot)
+
+
+    def envido(self, tipo, quem_pediu, pontos_envido_robo, robo_perdendo=None):
+        self._guardar('envido', [tipo, quem_pediu, pontos_envido_robo, robo_perdendo])
+        return self.cbr_sessao.envido(tipo, quem_pediu, pontos_envido_robo, robo_perdendo)
+
+
+def simular_partidas(cbr, partidas, semente=0, max_passos=500):
+    """Itens do corpus gravados nas decisões do bot em partidas simuladas, com o humano escolhendo ao acaso.
+
+    A `semente` define as escolhas do humano e o embaralhamento de cada partida, então o corpus é reproduzível.
+    """
+    sorteio = random.Random(semente)
+    corpus = []
+    for _ in range(partidas):
+        sessao = SessaoJogo(cbr, gravador=Descartar(), sorteio=random.Random(sorteio.getrandbits(32)))
+        sessao.cbr = _CbrGravado(sessao.cbr, corpus)
+        pendente = sessao.iniciar()
+        for _ in range(max_passos):
+            if (sessao.terminada):
+                break
+
+            pendente = sessao.jogar(sorteio.choice(pendente.opcoes))
+
+    return corpus
+
+
+def decidir(motor, decisao, parametros, **argumentos):
+    """Chama a decisão do motor com os parâmetros do corpus; `argumentos` leva o registro ou os vizinhos já calculados."""
+    if (decisao == 'jogar_carta'):
+        rodada, pontuacao_cartas = parametros
+        return motor.jogar_carta(rodada, list(pontuacao_cartas), **argumentos)
+
+    if (decisao == 'truco'):
+        return motor.truco(*parametros, **argumentos)
+
+    tipo, quem_pediu, pontos_envido_robo, robo_perdendo = parametros
+    return motor.envido(tipo, quem_pediu, pontos_envido_robo, robo_perdendo, **argumentos)
+
+
+def _chamar(motor, decisao, registro, parametros):
+    """Decisão e tempo gasto; uma exceção vira a resposta, para ser contada como divergência."""
+    inicio = time.perf_counter()
+    try:
+        resposta = decidir(motor, decisao, parametros, registro=registro)
+    except Exception as erro:
+        resposta = f'{type(erro).__name__}: {erro}'
+
+    return resposta, time.perf_counter() - inicio
+
+
+def comparar_itens(cbr, candidato, itens):
+    """Passa cada item pelos dois motores e acumula concordância e tempos por tipo de decisão."""
+    import pandas as pd
+
+    resumo = {decisao: {'total': 0, 'iguais': 0, 'tempo_referencia': 0.0, 'tempo_candidato': 0.0} for decisao in DECISOES}
+    divergencias = []
+    for decisao, origem, linha, parametros in itens:
+        registro = pd.DataFrame([linha], columns=cbr.dataset.columns)
+        esperada, tempo_referencia = _chamar(cbr, decisao, registro, parametros)
+        obtida, tempo_candidato = _chamar(candidato, decisao, registro, parametros)
+        contagem = resumo[decisao]
+        contagem['total'] += 1
+        contagem['tempo_referencia'] += tempo_referencia
+        contagem['tempo_candidato'] += tempo_candidato
+        if (obtida == esperada):
+            contagem['iguais'] += 1
+
+        elif (len(divergencias) < MAX_DIVERGENCIAS):
+            divergencias.append({'decisao': decisao, 'origem': origem, 'registro': linha, 'parametros': parametros, 'referencia': esperada, 'candidato': obtida})
+
+    return resumo, divergencias
+
+
+def _comparar_no_trabalhador(especificacao, itens):
+    cbr = cbr_trabalhador()
+    return comparar_itens(cbr, carregar_candidato(especificacao, cbr), itens)
+
+
+def juntar(parciais):
+    """Soma os resultados parciais de `comparar_itens` no relatório por decisão e geral, com a concordância e a aceleração."""
+    resumo = {decisao: {'total': 0, 'iguais': 0, 'tempo_referencia': 0.0, 'tempo_candidato': 0.0} for decisao in DECISOES}
+    divergencias = []
+    for parcial, encontradas in parciais:
+        for decisao, contagem in parcial.items():
+            for chave, valor in contagem.items():
+                resumo[decisao][chave] += valor
+
+        divergencias.extend(encontradas[:MAX_DIVERGENCIAS - len(divergencias)])
+
+    geral = {chave: sum(contagem[chave] for contagem in resumo.values()) for chave in ('total', 'iguais', 'tempo_referencia', 'tempo_candidato')}
+    for contagem in list(resumo.values()) + [geral]:
+        contagem['concordancia'] = contagem['iguais'] / contagem['total'] if contagem['total'] else 1.0
+        contagem['aceleracao'] = contagem['tempo_referencia'] / contagem['tempo_candidato'] if contagem['tempo_candidato'] else 0.0
+
+    return {'decisoes': resumo, 'geral': geral, 'divergencias': divergencias}
+
+
+def verificar_equivalencia(candidato='truco.equivalencia:referencia', cbr=None, casos=1000, partidas=20, processos=None, semente=0):
+    """Compara as decisões do candidato ('modulo:fabrica') com as do Cbr de referência.
+
+    O corpus junta `casos` registros sorteados da base (cada um com as três decisões) e os estados das decisões do
+    bot em `partidas` simuladas. Com `processos` diferente de 0, os itens são divididos entre processos que anexam
+    a base e o índice por memória compartilhada; cada processo constrói o seu candidato uma vez.
+    """
+    from .cbr import Cbr
+
+    if (cbr is None):
+        cbr = Cbr()
+
+    corpus = amostrar_base(cbr, casos, semente) + simular_partidas(cbr, partidas, semente)
+    inicio = time.perf_counter()
+    if (processos == 0):
+        parciais = [comparar_itens(cbr, carregar_candidato(candidato, cbr), corpus)]
+
+    else:
+        base = BaseCompartilhada(cbr)
+        try:
+            with base.criar_pool(processos) as pool:
+                blocos = (processos or os.cpu_count() or 1) * 4
+                tamanho = -(-len(corpus) // blocos)
+                parciais = list(pool.map(_comparar_no_trabalhador, [candidato] * blocos, [corpus[i:i + tamanho] for i in range(0, len(corpus), tamanho)]))
+        finally:
+            base.fechar()
+
+    relatorio = juntar(parciais)
+    relatorio.update({'candidato': candidato, 'itens': len(corpus), 'duracao': time.perf_counter() - inicio,
+                      'origens': {origem: sum(1 for item in corpus if item[1] == origem) for origem in ('base', 'simulacao')}})
+    return relatorio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compara as decisões de um motor candidato com as do Cbr de referência.')
+    parser.add_argument('--candidato', default='truco.equivalencia:referencia', help='fábrica do motor, como modulo:funcao (recebe o Cbr)')
+    parser.add_argument('--casos', type=int, default=1000, help='registros sorteados da base de casos')
+    parser.add_argument('--partidas', type=int, default=20, help='partidas simuladas para gravar estados reais de decisão')
+    parser.add_argument('--processos', type=int, default=None, help='processos trabalhadores (0 roda no próprio processo)')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--minimo', type=float, default=1.0, help='concordância mínima por decisão; abaixo dela o comando falha')
+    parser.add_argument('--json', action='store_true', help='imprime o relatório em JSON')
+    args = parser.parse_args(argv)
+
+    relatorio = verificar_equivalencia(args.candidato, casos=args.casos, partidas=args.partidas, processos=args.processos, semente=args.semente)
+    if (args.json):
+        print(json.dumps(relatorio, indent=2))
+
+    else:
+        print(f"Candidato {relatorio['candidato']}: {relatorio['itens']} itens ({relatorio['origens']['base']} da base, "
+              f"{relatorio['origens']['simulacao']} de partidas simuladas) em {relatorio['duracao']:.1f} s")
+        for nome, contagem in list(relatorio['decisoes'].items()) + [('geral', relatorio['geral'])]:
+            print(f"  {nome:<12} {contagem['iguais']:>6}/{contagem['total']:<6} {contagem['concordancia']:8.2%}  aceleração {contagem['aceleracao']:.2f}x")
+
+        for divergencia in relatorio['divergencias']:
+            print(f"  divergência em {divergencia['decisao']} ({divergencia['origem']}, {divergencia['parametros']}): "
+                  f"referência {divergencia['referencia']!r}, candidato {divergencia['candidato']!r}")
+
+    if (min(contagem['concordancia'] for contagem in relatorio['decisoes'].values()) < args.minimo):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,11 @@
+from .entrada import DecisaoPendente, EntradaConsole
+
 class Flor():
-    def __init__(self):
+    def __init__(self, entrada=None):
+        if (entrada is None):
+            entrada = EntradaConsole()
+
+        self.entrada = entrada
         self.valor_flor = 3
         self.quem_pediu_flor = 0
         self.quem_pediu_contraflor = 0
@@ -25,19 +31,17 @@ class Flor():
         if (jogador1.flor and jogador2.flor):
             if (jogador2.pontos < int((jogador1.pontos/1.5))):
                 self.estado_atual = "Contraflor e Resto"
-                if self.decisao_jogador(): 
-                    self.contraflor_resto(2, jogador1, jogador2)
-
-                else:
-                    jogador2.pontos += 4
 
             else: 
                 self.estado_atual = "Contraflor"
-                if self.decisao_jogador(): 
-                    self.contraflor(2, jogador1, jogador2)
 
-                else:
-                    jogador2.pontos += 4
+            try:
+                aceitou = self.decisao_jogador(lambda aceitou: self.responder_contraflor(aceitou, jogador1, jogador2))
+            except DecisaoPendente as pendente:
+                pendente.depois(lambda _: interface.mostrar_vencedor_flor(self.quem_venceu_flor, jogador1.nome, jogador2.nome, self.valor_flor))
+                raise
+
+            self.responder_contraflor(aceitou, jogador1, jogador2)
             
         elif (jogador1.flor):
             jogador1.pontos += self.valor_flor
@@ -89,10 +93,25 @@ class Flor():
             self.quem_venceu_flor = 2
 
 
-    def decisao_jogador(self):
-        escolha = -1
-        while (escolha not in [0, 1]):
-            escolha = int(input(f"Jogador 1, você aceita o pedido de {self.estado_atual}?\n[0] Não\n[1] Sim"))
+    def responder_contraflor(self, aceitou, jogador1, jogador2):
+        """Aplica a resposta do jogador 1 à contraflor (ou contraflor e resto) pedida pelo bot."""
+        if (aceitou):
+            if (self.estado_atual == "Contraflor e Resto"):
+                self.contraflor_resto(2, jogador1, jogador2)
+
+            else:
+                self.contraflor(2, jogador1, jogador2)
+
+        else:
+            jogador2.pontos += 4
+
+
+    def decisao_jogador(self, continuar=None):
+        continuacao = None
+        if (continuar is not None):
+            continuacao = lambda escolha: continuar(escolha != 0)
+
+        escolha = self.entrada.escolher(f"Jogador 1, você aceita o pedido de {self.estado_atual}?\n[0] Não\n[1] Sim", [0, 1], continuacao)
         
         if (escolha == 0):
             return False
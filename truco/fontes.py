@@ -0,0 +1,266 @@
+import os
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from .colunas import COLUNAS, COLUNAS_NAIPE
+
+
+# Quantidade de linhas processadas por vez na leitura dos arquivos; o pico de memória fica limitado a poucos blocos
+TAMANHO_BLOCO = 50000
+MAPA_NAIPES = {'ESPADAS': 1, 'OURO': 2, 'BASTOS': 3, 'COPAS': 4}
+# Coluna com o peso de cada linha nas bases condensadas
+COLUNA_PESO = 'peso'
+
+
+class EspacoInsuficiente(ValueError):
+    """O arquivo tem mais linhas do que a matriz reservada para ele."""
+
+
+def contar_linhas(caminho):
+    """Conta as linhas de dados do arquivo (sem o cabeçalho), lendo em blocos binários."""
+    linhas = 0
+    ultimo = b'\n'
+    with open(caminho, 'rb') as arquivo:
+        while True:
+            bloco = arquivo.read(1 << 20)
+            if not (bloco):
+                break
+
+            linhas += bloco.count(b'\n')
+            ultimo = bloco[-1:]
+
+    if (ultimo != b'\n'):
+        linhas += 1
+
+    return max(linhas - 1, 0)
+
+
+def _tratar_bloco(bloco, colunas_caso, saida):
+    """Converte um bloco lido do csv para int16, escrevendo direto na fatia correspondente da matriz de saída."""
+    for j, coluna in enumerate(colunas_caso):
+        if (coluna not in bloco.columns):
+            # coluna ausente na fonte: sentinel de valor ausente
+            saida[:, j] = -100
+            continue
+
+        s = bloco[coluna]
+        if (coluna in COLUNAS_NAIPE):
+            # naipes conhecidos viram códigos, valores ausentes -100 e valores desconhecidos -66
+            mapped = s.map(MAPA_NAIPES)
+            combined = pd.to_numeric(mapped.where(mapped.notna(), s), errors='coerce')
+            saida[:, j] = combined.mask(s.isna(), -100).fillna(-66).to_numpy()
+
+        elif (s.dtype == object or pd.api.types.is_string_dtype(s.dtype)):
+            saida[:, j] = pd.to_numeric(s, errors='coerce').fillna(-100).to_numpy()
+
+        else:
+            saida[:, j] = s.fillna(-100).to_numpy()
+
+
+def _ler_blocos(caminho, colunas, sep, mapeamento, na_values, encoding, tamanho_bloco, saida, tipos, pesos=None, coluna_peso=None, extras=None):
+    origem = {destino: coluna for coluna, destino in mapeamento.items()}
+    cabecalho = set(pd.read_csv(caminho, sep=sep, nrows=0, encoding=encoding).columns)
+    usar = [origem.get(c, c) for c in dict.fromkeys(colunas) if origem.get(c, c) in cabecalho]
+    colunas_caso = [c for c in dict.fromkeys(colunas) if c != 'idMao']
+    if (pesos is not None and coluna_peso in cabecalho):
+        usar.append(coluna_peso)
+
+    for coluna in (extras or {}):
+        if (origem.get(coluna, coluna) in cabecalho and origem.get(coluna, coluna) not in usar):
+            usar.append(origem.get(coluna, coluna))
+
+    dtype = None
+    if (tipos):
+        # tipos definidos antes da leitura: naipes como texto e o resto como float32 (comporta o int16 e o NaN)
+        dtype = {c: (str if mapeamento.get(c, c) in COLUNAS_NAIPE else 'float32') for c in usar if mapeamento.get(c, c) != 'idMao'}
+        if (coluna_peso in dtype):
+            dtype[coluna_peso] = 'float64'
+
+        for coluna in (extras or {}):
+            # colunas extras (como o idPartida) ficam como texto e são convertidas por quem as pediu
+            if (origem.get(coluna, coluna) in dtype and coluna not in colunas_caso):
+                dtype[origem.get(coluna, coluna)] = str
+
+    ids = []
+    escritas = 0
+    # leitura robusta: arquivo neste projeto usa separador por tab e contém 'NULL' como string para valores ausentes
+    leitor = pd.read_csv(caminho, usecols=usar, sep=sep, na_values=list(na_values), encoding=encoding, dtype=dtype, chunksize=tamanho_bloco)
+    with leitor:
+        for bloco in leitor:
+            bloco = bloco.rename(columns=mapeamento)
+            n = len(bloco)
+            if (escritas + n > len(saida)):
+                raise EspacoInsuficiente(f"O arquivo {caminho} possui mais linhas do que o espaço reservado ({len(saida)}).")
+
+            _tratar_bloco(bloco, colunas_caso, saida[escritas:escritas + n])
+            if (pesos is not None):
+                # peso ausente (ou sem a coluna de pesos) conta como uma linha da base
+                pesos[escritas:escritas + n] = pd.to_numeric(bloco[coluna_peso], errors='coerce').fillna(1).to_numpy() if coluna_peso in bloco.columns else 1
+
+            if ('idMao' in bloco.columns):
+                ids.append(bloco['idMao'].to_numpy(dtype=np.int64))
+
+            for coluna, valores in (extras or {}).items():
+                valores.append(bloco[coluna].to_numpy() if coluna in bloco.columns else np.full(n, np.nan))
+
+            escritas += n
+
+    ids = np.concatenate(ids) if ids else np.arange(escritas, dtype=np.int64)
+    return ids, escritas
+
+
+def ler_casos_em(saida, caminho, colunas=COLUNAS, sep='\t', mapeamento=None, na_values=('NULL',), encoding='utf-8', tamanho_bloco=TAMANHO_BLOCO,
+                 pesos=None, coluna_peso=None, extras=None):
+    """Lê o arquivo em blocos, escrevendo os casos já tratados na matriz int16 `saida`. Retorna os ids e o número de linhas.
+
+    O `mapeamento` renomeia colunas do arquivo para os nomes usados no caso ({coluna_arquivo: coluna_caso}).
+    Colunas que não existirem no arquivo são preenchidas com o sentinel de valor ausente.
+    Com o vetor `pesos`, o peso de cada linha (coluna `coluna_peso` do arquivo, ou 1) é escrito nele na mesma leitura.
+    Com `extras` ({coluna: lista}), os valores brutos de cada coluna (NaN se ela não existir) são acrescentados, um
+    array por bloco, à lista correspondente.
+    """
+    mapeamento = mapeamento or {}
+    try:
+        return _ler_blocos(caminho, colunas, sep, mapeamento, na_values, encoding, tamanho_bloco, saida, True, pesos, coluna_peso, extras)
+    except EspacoInsuficiente:
+        raise
+
+    except ValueError:
+        # alguma coluna numérica tem texto inesperado: relê deixando o pandas inferir e coerce por bloco
+        for valores in (extras or {}).values():
+            del valores[:]
+
+        return _ler_blocos(caminho, colunas, sep, mapeamento, na_values, encoding, tamanho_bloco, saida, False, pesos, coluna_peso, extras)
+
+
+def ler_casos_csv(caminho, colunas=COLUNAS, sep='\t', mapeamento=None, na_values=('NULL',), encoding='utf-8', tamanho_bloco=TAMANHO_BLOCO):
+    """Lê um arquivo da base de casos e converte todas as colunas para int16, codificando os naipes."""
+    colunas_caso = [c for c in dict.fromkeys(colunas) if c != 'idMao']
+    saida = np.empty((contar_linhas(caminho), len(colunas_caso)), dtype=np.int16)
+    ids, n = ler_casos_em(saida, caminho, colunas, sep, mapeamento, na_values, encoding, tamanho_bloco)
+    return pd.DataFrame(saida[:n], index=pd.Index(ids, name='idMao'), columns=colunas_caso, copy=False)
+
+
+class FonteCasos():
+    """Um arquivo da base de casos, com o seu dialeto e o mapeamento das colunas para o esquema do caso.
+
+    Com `coluna_peso`, o peso de cada linha é lido dessa coluna do arquivo (multiplicado por `peso`), como nas
+    bases condensadas gravadas por `python -m truco.prototipos`. Os pesos são float64, então `peso` pode ser
+    fracionário (por exemplo, 0.5 para dar a uma fonte metade da influência das outras).
+    """
+    def __init__(self, caminho, sep='\t', mapeamento=None, na_values=('NULL',), encoding='utf-8', peso=1, coluna_peso=None):
+        self.caminho = caminho
+        self.sep = sep
+        self.mapeamento = mapeamento
+        self.na_values = na_values
+        self.encoding = encoding
+        self.peso = peso
+        self.coluna_peso = coluna_peso
+
+
+    def ler(self, colunas=COLUNAS):
+        """Lê a fonte já tratada, no esquema de colunas informado."""
+        return ler_casos_csv(self.caminho, colunas, self.sep, self.mapeamento, self.na_values, self.encoding)
+
+
+    def ler_em(self, saida, colunas=COLUNAS, tamanho_bloco=TAMANHO_BLOCO, pesos=None, extras=None):
+        """Lê a fonte em blocos direto na matriz `saida` (e os pesos das linhas no vetor `pesos` e as colunas `extras`,
+        se informados), retornando o número de linhas escritas."""
+        _, n = ler_casos_em(saida, self.caminho, colunas, self.sep, self.mapeamento, self.na_values, self.encoding, tamanho_bloco,
+                            pesos, self.coluna_peso, extras)
+        if (pesos is not None):
+            pesos[:n] *= self.peso
+
+        return n
+
+
+def fontes_padrao():
+    """Fontes usadas quando nenhuma é informada: a base indicada em TRUCO_BASE_CASOS (com a coluna de pesos de uma base
+    condensada), a base de imitação, se existir, ou as bases distribuídas com o projeto."""
+    if (os.environ.get('TRUCO_BASE_CASOS')):
+        return [FonteCasos(os.environ['TRUCO_BASE_CASOS'], coluna_peso=COLUNA_PESO)]
+
+    base_dir = Path(__file__).resolve().parent.parent
+    imitacao = base_dir / 'dbtrucoimitacao_maos.csv'
+    if (imitacao.is_file()):
+        return [FonteCasos(imitacao)]
+
+    return [FonteCasos(base_dir / 'dbtrucocbr_maos.csv'), FonteCasos(base_dir / 'dbaprendizadoativo_maos.csv')]
+
+
+def _encolher_npy(matriz, destino, linhas, tamanho_bloco=TAMANHO_BLOCO):
+    """Regrava o .npy mapeado com só as primeiras `linhas` linhas, copiando em blocos, e retorna o novo mapeamento."""
+    temporario = f'{destino}.tmp'
+    nova = np.lib.format.open_memmap(temporario, mode='w+', dtype=matriz.dtype, shape=(linhas, matriz.shape[1]))
+    for inicio in range(0, linhas, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, linhas)
+        nova[inicio:fim] = matriz[inicio:fim]
+
+    nova.flush()
+    del nova
+    matriz.flush()
+    del matriz
+    os.replace(temporario, destino)
+    return np.load(destino, mmap_mode='r+')
+
+
+def carregar_fontes(fontes, colunas=COLUNAS, tamanho_bloco=TAMANHO_BLOCO, destino=None, extras=None):
+    """Lê todas as fontes em blocos para uma única matriz int16 pré-alocada, com idMao sequencial.
+
+    Com `destino`, a matriz é um arquivo .npy mapeado em memória, que pode ser reaberto com `np.load(destino, mmap_mode='r')`.
+    Com `extras` (nomes de colunas fora do caso, como o idPartida), retorna também uma tabela com os valores brutos
+    dessas colunas e a `origem` (posição da fonte) de cada linha, alinhada com os casos e lida na mesma passada.
+    """
+    colunas_caso = [c for c in dict.fromkeys(colunas) if c != 'idMao']
+    total = sum(contar_linhas(fonte.caminho) for fonte in fontes)
+    if (destino is None):
+        matriz = np.empty((total, len(colunas_caso)), dtype=np.int16)
+
+    else:
+        matriz = np.lib.format.open_memmap(destino, mode='w+', dtype=np.int16, shape=(total, len(colunas_caso)))
+
+    pesos = np.empty(total, dtype=np.float64)
+    valores = None if extras is None else {coluna: [] for coluna in extras}
+    origens = []
+    escritas = 0
+    for origem, fonte in enumerate(fontes):
+        n = fonte.ler_em(matriz[escritas:], colunas, tamanho_bloco, pesos[escritas:], valores)
+        origens.append(np.full(n, origem, dtype=np.int64))
+        escritas += n
+
+    if (destino is not None and escritas < total):
+        # linhas em branco contam na estimativa mas não viram casos: o arquivo é refeito só com as linhas lidas
+        matriz = _encolher_npy(matriz, destino, escritas, tamanho_bloco)
+
+    casos = pd.DataFrame(matriz[:escritas], columns=colunas_caso, copy=False)
+    casos.index.name = 'idMao'
+    if (extras is None):
+        return casos, pesos[:escritas]
+
+    tabela = pd.DataFrame({coluna: np.concatenate(partes) if partes else np.empty(0) for coluna, partes in valores.items()})
+    tabela['origem'] = np.concatenate(origens) if origens else np.empty(0, dtype=np.int64)
+    return casos, pesos[:escritas], tabela
+
+
+def deduplicar_casos(casos, pesos=None, com_inverso=False):
+    """Une casos com atributos idênticos em um único caso, cujo peso é a soma dos pesos das linhas repetidas.
+
+    A ordem da primeira ocorrência de cada caso é mantida, para preservar os desempates da busca. Com `com_inverso`,
+    retorna também a posição, nos casos únicos, de cada linha de entrada.
+    """
+    if (pesos is None):
+        pesos = np.ones(len(casos), dtype=np.float64)
+
+    matriz = np.ascontiguousarray(casos.to_numpy())
+    linhas = matriz.view(np.dtype((np.void, matriz.dtype.itemsize * matriz.shape[1]))).ravel()
+    _, primeira, inverso = np.unique(linhas, return_index=True, return_inverse=True)
+    somados = np.bincount(inverso.ravel(), weights=pesos, minlength=len(primeira))
+    ordem = np.argsort(primeira, kind='stable')
+    unicos = casos.iloc[primeira[ordem]].reset_index(drop=True)
+    unicos.index.name = 'idMao'
+    if not (com_inverso):
+        return unicos, somados[ordem]
+
+    posicao = np.empty(len(ordem), dtype=np.int64)
+    posicao[ordem] = np.arange(len(ordem))
+    return unicos, somados[ordem], posicao[inverso.ravel()]
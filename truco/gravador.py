@@ -0,0 +1,183 @@
+import atexit
+import csv
+import os
+import queue
+import threading
+import time
+
+POLITICAS_FSYNC = ('nunca', 'lote', 'fechamento')
+_PARAR = object()
+
+
+class ErroGravacao(RuntimeError):
+    """Uma ou mais gravações de lote falharam; `erros` traz todas as falhas e `pendentes`, as linhas ainda não gravadas."""
+    def __init__(self, erros, pendentes):
+        super().__init__(f'{len(erros)} falha(s) ao gravar os casos, {len(pendentes)} linha(s) pendente(s); última: {erros[-1]!r}')
+        self.erros = erros
+        self.pendentes = pendentes
+
+
+class DestinoCsv():
+    """Destino dos casos retidos em um arquivo csv, no mesmo formato gerado pelo pandas."""
+    def __init__(self, caminho='jogadas.csv'):
+        self.caminho = caminho
+        self.arquivo = None
+        self.escritor = None
+
+
+    def escrever(self, colunas, linhas):
+        """Acrescenta as linhas ao arquivo, escrevendo o cabeçalho apenas se o arquivo for novo."""
+        if (self.arquivo is None):
+            novo = not (os.path.isfile(self.caminho)) or os.path.getsize(self.caminho) == 0
+            self.arquivo = open(self.caminho, 'a', newline='', encoding='utf-8')
+            self.escritor = csv.writer(self.arquivo, lineterminator='\n')
+            if (novo):
+                self.escritor.writerow(colunas)
+
+        self.escritor.writerows(linhas)
+        self.arquivo.flush()
+
+
+    def sincronizar(self):
+        """Força a gravação em disco do que já foi escrito."""
+        if (self.arquivo is not None):
+            os.fsync(self.arquivo.fileno())
+
+
+    def fechar(self):
+        if (self.arquivo is not None):
+            self.arquivo.close()
+            self.arquivo = None
+
+
+class GravadorCasos():
+    """Grava os registros das partidas em lotes, por uma thread em segundo plano, para tirar o I/O do fluxo do jogo.
+
+    As linhas de um lote que falhou não são descartadas: ficam em `pendentes` e vão na frente do próximo lote. Todas as
+    falhas são guardadas e levantadas juntas, como `ErroGravacao`, em `descarregar()` ou `fechar()`.
+    """
+    def __init__(self, destino=None, intervalo=1.0, tamanho_lote=64, fsync='lote'):
+        if (fsync not in POLITICAS_FSYNC):
+            raise ValueError(f"Política de fsync inválida: {fsync}. Opções: {', '.join(POLITICAS_FSYNC)}")
+
+        if (destino is None):
+            destino = DestinoCsv()
+
+        self.destino = destino
+        self.intervalo = intervalo
+        self.tamanho_lote = tamanho_lote
+        self.fsync = fsync
+        self.colunas = None
+        self.erros = []
+        self.pendentes = []
+        self.fechado = False
+        self.fila = queue.Queue()
+        self.thread = threading.Thread(target=self._executar, name='gravador-casos', daemon=True)
+        self.thread.start()
+        atexit.register(self.fechar)
+
+
+    def adicionar(self, registro):
+        """Enfileira uma cópia do registro (dataframe de uma linha, indexado por idMao)."""
+        if (self.fechado):
+            raise RuntimeError('O gravador de casos já foi fechado.')
+
+        if (self.colunas is None):
+            self.colunas = [registro.index.name or ''] + registro.columns.tolist()
+
+        self.fila.put([registro.index[0]] + registro.to_numpy()[0].tolist())
+
+
+    def descarregar(self):
+        """Bloqueia até que todos os registros enfileirados tenham sido gravados."""
+        if (self.fechado):
+            return
+
+        concluido = threading.Event()
+        self.fila.put(concluido)
+        concluido.wait()
+        self._verificar_erro()
+
+
+    def fechar(self):
+        """Grava o que estiver pendente e encerra a thread do gravador."""
+        if (self.fechado):
+            return
+
+        self.fechado = True
+        atexit.unregister(self.fechar)
+        self.fila.put(_PARAR)
+        self.thread.join()
+        self._verificar_erro()
+
+
+    def _verificar_erro(self):
+        if (self.erros):
+            erros, self.erros = self.erros, []
+            raise ErroGravacao(erros, list(self.pendentes)) from erros[-1]
+
+
+    def _executar(self):
+        """Laço da thread: junta registros até completar o lote ou vencer o intervalo."""
+        lote = []
+        prazo = None
+        while True:
+            espera = None if prazo is None else max(0.0, prazo - time.monotonic())
+            try:
+                item = self.fila.get(timeout=espera)
+            except queue.Empty:
+                item = None
+
+            if (item is _PARAR):
+                self._gravar(lote)
+                self._finalizar()
+                return
+
+            if (item is None or isinstance(item, threading.Event)):
+                self._gravar(lote)
+                lote, prazo = [], None
+                if (item is not None):
+                    item.set()
+
+                continue
+
+            lote.append(item)
+            if (prazo is None):
+                prazo = time.monotonic() + self.intervalo
+
+            if (len(lote) >= self.tamanho_lote):
+                self._gravar(lote)
+                lote, prazo = [], None
+
+
+    def _gravar(self, lote):
+        linhas = self.pendentes + lote
+        if not (linhas):
+            return
+
+        try:
+            self.destino.escrever(self.colunas, linhas)
+        except Exception as erro:
+            # o lote volta para a fila de pendentes e é tentado de novo junto com o próximo
+            self.erros.append(erro)
+            self.pendentes = linhas
+            return
+
+        self.pendentes = []
+        try:
+            if (self.fsync == 'lote'):
+                self.destino.sincronizar()
+
+        except Exception as erro:
+            self.erros.append(erro)
+
+
+    def _finalizar(self):
+        try:
+            if (self.fsync != 'nunca'):
+                self.destino.sincronizar()
+
+            self.destino.fechar()
+
+        except Exception as erro:
+            self.erros.append(erro)
@@ -0,0 +1,112 @@
+import threading
+
+# Colunas que identificam a mão do bot: se alguma mudar, o registro é de outra mão e a busca é refeita do zero
+COLUNAS_MAO = ['jogadorMao', 'cartaAltaRobo', 'cartaMediaRobo', 'cartaBaixaRobo', 'naipeCartaAltaRobo', 'naipeCartaMediaRobo',
+               'naipeCartaBaixaRobo', 'qualidadeMaoRobo']
+# Candidatos guardados da busca completa, em múltiplos de k
+FATOR_CANDIDATOS = 2
+
+
+class ConsultaIncremental():
+    """Busca de vizinhos incremental entre as decisões de uma mesma mão, com a interface de decisões do `Cbr`.
+
+    A busca completa traz os `fator` x k vizinhos mais próximos (os candidatos), guarda a distância ao quadrado de
+    cada um e o raio R do último candidato. Nas consultas seguintes da mesma mão, só as colunas que mudaram no
+    registro (cartas jogadas, ganhadores das rodadas) atualizam as distâncias dos candidatos. Pela desigualdade
+    triangular, nenhum caso fora dos candidatos fica a menos de R - |q - q0| da consulta q (q0 é a consulta da busca
+    completa); se o k-ésimo candidato estiver estritamente abaixo disso, os k vizinhos são exatos. Senão, ou em outra
+    mão, a busca completa é refeita.
+
+    Vale para a distância euclidiana sobre os casos brutos (backends 'sklearn' e 'scipy' sem projeção); com outros
+    índices toda consulta é completa. Empates de distância são ordenados pela posição do caso na base.
+    """
+    def __init__(self, cbr, fator=FATOR_CANDIDATOS):
+        import numpy as np
+
+        self.cbr = cbr
+        self.dados = cbr.dados
+        self.k = cbr.configuracao['n_neighbors']
+        self.candidatos = min(fator * self.k, len(cbr.dataset))
+        self.habilitado = cbr.configuracao['backend'] in ('sklearn', 'scipy') and not cbr.configuracao.get('projecao')
+        self.casos = cbr.dataset.to_numpy(dtype=np.float64)
+        self.colunas_mao = [cbr.dataset.columns.get_loc(coluna) for coluna in COLUNAS_MAO]
+        self.trava = threading.Lock()
+        self.contagem = {'completas': 0, 'incrementais': 0, 'refeitas': 0}
+        self.ancora = None
+
+
+    def _completa(self, consulta):
+        import numpy as np
+
+        distancias, indices = self.cbr.consultar(consulta.reshape(1, -1), n_neighbors=self.candidatos)
+        self.ancora = consulta
+        self.atual = consulta
+        self.posicoes = indices[0]
+        # distâncias recalculadas aqui, na mesma aritmética usada nas atualizações incrementais
+        self.quadrados = ((self.casos[self.posicoes] - consulta) ** 2).sum(axis=1)
+        self.raio = np.inf if self.candidatos >= len(self.casos) else float(distancias[0][-1])
+        return self._melhores()
+
+
+    def _melhores(self):
+        import numpy as np
+
+        ordem = np.lexsort((self.posicoes, self.quadrados))[:self.k]
+        return self.posicoes[ordem], float(np.sqrt(self.quadrados[ordem[-1]]))
+
+
+    def vizinhos(self, registro):
+        """Posições, no dataset, dos k vizinhos mais próximos do registro."""
+        import numpy as np
+
+        consulta = np.asarray(registro.to_numpy(), dtype=np.float64).reshape(-1)
+        with self.trava:
+            if not (self.habilitado):
+                self.contagem['completas'] += 1
+                return self.cbr.vizinhos(registro)
+
+            if (self.ancora is None or (consulta[self.colunas_mao] != self.ancora[self.colunas_mao]).any()):
+                self.contagem['completas'] += 1
+                return self._completa(consulta)[0]
+
+            mudadas = np.flatnonzero(consulta != self.atual)
+            if (mudadas.size):
+                antigas = self.casos[np.ix_(self.posicoes, mudadas)]
+                self.quadrados = self.quadrados - ((antigas - self.atual[mudadas]) ** 2).sum(axis=1) + ((antigas - consulta[mudadas]) ** 2).sum(axis=1)
+                self.atual = consulta
+
+            vizinhos, distancia_k = self._melhores()
+            if (distancia_k < self.raio - float(np.sqrt(((consulta - self.ancora) ** 2).sum()))):
+                self.contagem['incrementais'] += 1
+                return vizinhos
+
+            self.contagem['refeitas'] += 1
+            return self._completa(consulta)[0]
+
+
+    def jogar_carta(self, rodada, pontuacao_cartas, registro=None):
+        registro = self._registro(registro)
+        return self.cbr.jogar_carta(rodada, pontuacao_cartas, registro, vizinhos=self.vizinhos(registro))
+
+
+    def truco(self, tipo, quem_pediu, qualidade_mao_bot, registro=None):
+        registro = self._registro(registro)
+        return self.cbr.truco(tipo, quem_pediu, qualidade_mao_bot, registro, vizinhos=self.vizinhos(registro))
+
+
+    def envido(self, tipo, quem_pediu, pontos_envido_robo, robo_perdendo=None, registro=None):
+        registro = self._registro(registro)
+        return self.cbr.envido(tipo, quem_pediu, pontos_envido_robo, robo_perdendo, registro, vizinhos=self.vizinhos(registro))
+
+
+    def contexto_partidas(self, registro=None):
+        registro = self._registro(registro)
+        vizinhos = self.cbr.ultimos_vizinhos(registro)
+        return self.cbr.contexto_partidas(registro, vizinhos=self.vizinhos(registro) if vizinhos is None else vizinhos)
+
+
+    def _registro(self, registro):
+        if (registro is None):
+            return self.dados.retornar_registro()
+
+        return registro
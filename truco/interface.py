@@ -1,25 +1,17 @@
 import os
+from .saida import SaidaConsole
 
 class Interface():
-    def __init__(self):
-        pass
+    def __init__(self, saida=None):
+        if (saida is None):
+            saida = SaidaConsole()
+
+        self.saida = saida
 
 
     def border_msg(self, msg, indent=1, width=None, title=None):
         """Exibe uma caixa em torno de determinada mensagem."""
-        lines = msg.split('\n')
-        space = " " * indent
-        if not width:
-            width = max(map(len, lines))
-        box = f'╔{"═" * (width + indent * 2)}╗\n'  # upper_border
-
-        if title:
-            box += f'║{space}{title:<{width}}{space}║\n'  # title
-            box += f'║{space}{"-" * len(title):<{width}}{space}║\n'  # underscore
-
-        box += ''.join([f'║{space}{line:<{width}}{space}║\n' for line in lines])
-        box += f'╚{"═" * (width + indent * 2)}╝'  # lower_border
-        print(box)
+        self.saida.emitir('caixa', msg=msg, indent=indent, width=width, title=title)
   
 
     def limpar_tela(self):
@@ -32,63 +24,79 @@ class Interface():
 
     def mostrar_carta_jogada(self, jogador, carta):
         """Exibe a última carta jogada."""
-        print(f"{jogador} jogou a carta: {carta.retornar_carta()}")
+        self.saida.emitir('carta_jogada', jogador=jogador, numero=carta.numero, naipe=carta.naipe)
 
 
     def mostrar_carta_ganhadora(self, carta):
         """Exibe quem ganhou a rodada."""
-        print(f"\nCarta ganhadora: {carta.retornar_carta()}\n")
+        self.saida.emitir('carta_ganhadora', numero=carta.numero, naipe=carta.naipe)
 
     def mostrar_ganhador_rodada(self, jogador):
-        print(f"{jogador} ganhou a rodada\n")
+        self.saida.emitir('ganhador_rodada', jogador=jogador)
 
 
     def mostrar_placar_total_jogador_fugiu(self, jogador_fugiu, jogador1, jogador1_pontos, jogador2, jogador2_pontos):
         """Exibe um aviso de que o jogador fugiu e o placar total,"""
-        print(f'Jogador {jogador_fugiu.nome} fugiu!')
+        self.saida.emitir('jogador_fugiu', jogador=jogador_fugiu.nome)
         # self.mostrar_placar_total(jogador1, jogador1_pontos, jogador2, jogador2_pontos)
 
 
     def mostrar_placar_total(self, jogador1, jogador1_pontos, jogador2, jogador2_pontos):
         """Exibe o placar total da partida."""
-        self.border_msg(f"Jogador 1 - {jogador1}: {jogador1_pontos} Pontos Acumulados\nJogador 2 - {jogador2}: {jogador2_pontos} Pontos Acumulados", title='Pontuação Total')
+        self.saida.emitir('placar_total', jogador1=jogador1, jogador1_pontos=jogador1_pontos, jogador2=jogador2, jogador2_pontos=jogador2_pontos)
 
 
     def mostrar_placar_rodadas(self, jogador1, jogador1_pontos, jogador2, jogador2_pontos):
         """Exibe o placar entre cada uma das rodadas."""
-        self.border_msg(f"Jogador 1 - {jogador1}: Venceu {jogador1_pontos} Rodada(s)\nJogador 2 - {jogador2}: Venceu {jogador2_pontos} Rodada(s)", title='Rodadas da Partida Atual')
+        self.saida.emitir('placar_rodadas', jogador1=jogador1, jogador1_rodadas=jogador1_pontos, jogador2=jogador2, jogador2_rodadas=jogador2_pontos)
 
     def mostrar_vencedor_flor(self, vencedor, jogador1, jogador2, pontos):
         """Exibe o placar entre cada uma das rodadas."""
-        if (vencedor == 1):
-            self.border_msg(f"Jogador 1 - {jogador1}: Venceu a flor e ganhou {pontos} pontos", title='Vencedor Flor')
-
-        else:
-            self.border_msg(f"Jogador 2 - {jogador2}: Venceu a flor e ganhou {pontos} pontos", title='Vencedor Flor')
+        self.saida.emitir('vencedor_flor', vencedor=vencedor, jogador1=jogador1, jogador2=jogador2, pontos=pontos)
 
 
     def mostrar_vencedor_envido(self, vencedor, jogador1, jogador1_pontos, jogador2, jogador2_pontos):
         """Exibe o placar entre cada uma das rodadas."""
-        if (vencedor == 1):
-            self.border_msg(f"Jogador 1 - {jogador1}: Venceu o envido com {jogador1_pontos} pontos\nJogador 2 - {jogador2}: PERDEU o envido com {jogador2_pontos} pontos", title='Jogador 1 Vencedor Envido')
-            
-        else:
-             self.border_msg(f"Jogador 2 - {jogador2}: Venceu o envido com {jogador2_pontos} pontos\nJogador 1 - {jogador1}: PERDEU o envido com {jogador1_pontos} pontos", title='Jogador 2 Vencedor Envido')
+        self.saida.emitir('vencedor_envido', vencedor=vencedor, jogador1=jogador1, jogador1_pontos=jogador1_pontos, jogador2=jogador2, jogador2_pontos=jogador2_pontos)
 
 
     def mostrar_ganhador_jogo(self, jogador):
         """Exibe o jogador que obteu a pontuação necessária para vencer o jogo."""
-        print(f"\n{jogador} ganhou o jogo")
+        self.saida.emitir('ganhador_jogo', jogador=jogador)
 
 
     def mostrar_pediu_truco(self, jogador):
         """Exibe aviso de que o pedido de truco já foi realizado."""
-        print(f'{jogador} pediu truco e o pedido já foi aceito, escolha outra jogada!')
+        self.saida.emitir('pediu_truco', jogador=jogador)
 
 
     def mostrar_jogador_opcoes(self, jogador):
         """Exibe as possibilidades de jogada para o jogador."""
-        print(f"Jogador 1 é mão")
+        self.saida.emitir('jogador_mao')
+
+
+    def mostrar_vez_jogador(self, jogador, numero):
+        """Exibe de qual jogador é a vez de jogar."""
+        self.saida.emitir('vez_jogador', jogador=jogador, numero=numero)
+
+
+    def mostrar_mao(self, mao):
+        """Exibe as cartas da mão, com o índice para jogá-las."""
+        if not (self.saida.ativa):
+            return
+
+        for i, carta in enumerate(mao):
+            self.saida.emitir('carta_opcao', indice=i, numero=carta.numero, naipe=carta.naipe)
+
+
+    def mostrar_opcoes_jogada(self, truco, flor, envido):
+        """Exibe as jogadas especiais disponíveis além das cartas."""
+        self.saida.emitir('opcoes_jogada', truco=truco, flor=flor, envido=envido)
+
+
+    def mostrar_mensagem(self, texto):
+        """Exibe uma mensagem simples do jogo."""
+        self.saida.emitir('mensagem', texto=texto)
 
 
     def desenhar_cartas(self, s):
@@ -127,7 +135,9 @@ class Interface():
 
     def exibir_cartas(self, cartas):
         """Chama o método que exibe todas as cartas da mão, fazendo um join entre toda a mão do jogador"""
-        print('\n'.join(map('  '.join, zip(*(self.desenhar_cartas(c) for c in cartas)))))
+        if (self.saida.ativa):
+            self.mostrar_mensagem('\n'.join(map('  '.join, zip(*(self.desenhar_cartas(c) for c in cartas)))))
 
     def exibir_unica_carta(self, carta):
-        print('\n'.join(map('  '.join, zip(*(self.desenhar_cartas(carta))))))
\ No newline at end of file
+        if (self.saida.ativa):
+            self.mostrar_mensagem('\n'.join(map('  '.join, zip(*(self.desenhar_cartas(carta))))))
\ No newline at end of file
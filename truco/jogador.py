@@ -17,18 +17,12 @@ class Jogador():
         """Mostrar as opções que o jogador pode jogar"""
         # print(f'pontos self.envido: {self.envido}')
         self.mostrar_mao(interface)
-        if (len(self.mao) >= 2 and self.pediu_truco is False): 
-            print('[4] Truco')
-
-        if ((len(self.mao)) == 3 and self.flor is False and (self.checa_flor())):
-            print('[5] Flor')
+        pode_truco = (len(self.mao) >= 2 and self.pediu_truco is False)
+        pode_flor = ((len(self.mao)) == 3 and self.flor is False and (self.checa_flor()))
+        if (pode_flor):
             self.flor = True
 
-        if ((len(self.mao) == 3)):
-            print(f'[6] Envido\n[7] Real Envido\n[8] Falta Envido')
-
-        print('[9] Ir ao baralho')
-        cartas = [(f"{carta.numero} de {carta.naipe}") for carta in self.mao]
+        interface.mostrar_opcoes_jogada(pode_truco, pode_flor, (len(self.mao) == 3))
         # interface.exibir_cartas(cartas)
         # interface.exibir_unica_carta(cartas[0])
 
@@ -48,10 +42,7 @@ class Jogador():
 
     def mostrar_mao(self, interface):
         """Exibe as cartas que o jogador possui na mão."""
-        i = 0
-        for carta in self.mao:
-            carta.exibir_carta(i)
-            i += 1
+        interface.mostrar_mao(self.mao)
 
 
     def adicionar_pontos(self, pontos):
@@ -2,10 +2,15 @@ from .baralho import Baralho
 from .jogador import Jogador
 from .bot import Bot
 from .pontos import MANILHA, CARTAS_VALORES
+from .saida import SaidaConsole
 import random
 
 class Jogo():
-    def __init__(self):
+    def __init__(self, saida=None):
+        if (saida is None):
+            saida = SaidaConsole()
+
+        self.saida = saida
         self.rodadas = []
         self.trucoPontos = 1
     
@@ -113,6 +118,6 @@ class Jogo():
 
     def jogador_fugiu(self, jogador, jogador1, jogador2, pontos):
         """Indicação de que o jogador fugiu, resetando a ordem de jogadas com o jogador 1 sendo mão"""
-        print(f'Jogador fugiu!')
+        self.saida.emitir('mensagem', texto='Jogador fugiu!')
         jogador1.primeiro = True
         jogador2.primeiro = False
\ No newline at end of file
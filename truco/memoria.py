@@ -0,0 +1,183 @@
+import argparse
+import gc
+import json
+import tracemalloc
+from .baralho import Baralho
+from .bot import Bot
+from .jogador import Jogador
+
+# Alocações do próprio tracemalloc e do mecanismo de import ficam fora das medições
+FILTROS = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'))
+
+
+def medir_alocacao(funcao, top=0):
+    """Executa `funcao` entre dois snapshots do tracemalloc e retorna o resultado, os bytes que continuam alocados
+    depois dela e, com `top`, as linhas de código responsáveis pelas maiores alocações."""
+    gc.collect()
+    antes = tracemalloc.take_snapshot().filter_traces(FILTROS)
+    resultado = funcao()
+    gc.collect()
+    depois = tracemalloc.take_snapshot().filter_traces(FILTROS)
+    diferencas = depois.compare_to(antes, 'lineno')
+    linhas = [{'linha': str(diferenca.traceback[0]), 'bytes': diferenca.size_diff} for diferenca in diferencas[:top] if diferenca.size_diff > 0]
+    return resultado, sum(diferenca.size_diff for diferenca in diferencas), linhas
+
+
+def _criar_maos(quantidade, classe):
+    """Jogadores (ou bots) com a mão distribuída."""
+    jogadores = []
+    for _ in range(quantidade):
+        baralho = Baralho()
+        baralho.embaralhar()
+        jogador = classe(classe.__name__)
+        jogador.criar_mao(baralho)
+        jogadores.append(jogador)
+
+    return jogadores
+
+
+def relatorio_memoria(sessoes=100, partidas=100, replicar=1, top=0):
+    """Mede, com snapshots do tracemalloc, a memória da base de casos, do índice, das sessões e dos objetos do jogo.
+
+    O índice é medido pelo snapshot em qualquer backend; a árvore e o `_fit_X` só são detalhados no NearestNeighbors.
+
+    Com `replicar`, a base de casos é repetida essa quantidade de vezes antes do ajuste do índice, para observar como
+    cada parte cresce com o tamanho da base.
+    """
+    import numpy as np
+    import pandas as pd
+    from sklearn.neighbors import NearestNeighbors
+    from .cbr import Cbr
+    from .dados import Dados
+    from .sessao import SessaoJogo
+
+    # as dependências são importadas e o scikit-learn é aquecido com um ajuste mínimo antes de ligar o tracemalloc,
+    # para que as etapas meçam os dados e não os módulos e caches carregados na primeira chamada
+    NearestNeighbors(n_neighbors=1, algorithm='ball_tree').fit(np.zeros((2, 2))).kneighbors(np.zeros((1, 2)))
+    iniciado = tracemalloc.is_tracing()
+    if not (iniciado):
+        tracemalloc.start()
+
+    try:
+        relatorio = {'etapas': {}}
+
+        def etapa(nome, funcao):
+            resultado, alocado, linhas = medir_alocacao(funcao, top)
+            relatorio['etapas'][nome] = {'bytes': alocado, 'linhas': linhas}
+            return resultado
+
+        dados = etapa('dados', Dados)
+        if (replicar > 1):
+            def replicar_casos():
+                casos = dados.retornar_casos()
+                dados.definir_casos(pd.concat([casos] * replicar), np.tile(dados.retornar_pesos(), replicar))
+
+            etapa('replicacao', replicar_casos)
+
+        casos = dados.retornar_casos()
+        cbr = etapa('indice', lambda: Cbr(dados))
+        relatorio['base'] = {
+            'casos': len(casos),
+            'colunas': casos.shape[1],
+            'frame': int(casos.memory_usage(deep=True).sum()),
+            'array': casos.to_numpy().nbytes,
+            'pesos': cbr.pesos.memory_usage(deep=True),
+            # qualquer backend: o que continuou alocado na construção do índice (snapshot do tracemalloc)
+            'indice': relatorio['etapas']['indice']['bytes'],
+            'arvore': None,
+            'fit_x': None,
+            'fit_x_compartilhado': None,
+        }
+        if (isinstance(cbr.nbrs, NearestNeighbors)):
+            relatorio['base'].update({
+                # a árvore guarda os casos convertidos para float64, além dos índices e das esferas de cada nó
+                'arvore': sum(array.nbytes for array in cbr.nbrs._tree.get_arrays()),
+                # o NearestNeighbors também guarda os casos do ajuste, que podem ser os mesmos do DataFrame (sem cópia)
+                'fit_x': cbr.nbrs._fit_X.nbytes,
+                'fit_x_compartilhado': bool(np.shares_memory(cbr.nbrs._fit_X, casos.to_numpy())),
+            })
+
+        def criar_sessoes():
+            return [SessaoJogo(cbr) for _ in range(sessoes)]
+
+        abertas = etapa('sessoes', criar_sessoes)
+        relatorio['sessao'] = {
+            'quantidade': len(abertas),
+            'bytes_por_sessao': relatorio['etapas']['sessoes']['bytes'] / max(len(abertas), 1),
+            'registro': int(abertas[0].dados.retornar_registro().memory_usage(deep=True).sum()) if abertas else 0,
+        }
+        registros = etapa('registros', lambda: [Dados(somente_registro=True) for _ in range(sessoes)])
+        relatorio['sessao']['bytes_por_registro'] = relatorio['etapas']['registros']['bytes'] / max(len(registros), 1)
+
+        baralhos = etapa('cartas', lambda: [Baralho() for _ in range(partidas)])
+        jogadores = etapa('jogadores', lambda: _criar_maos(partidas, Jogador))
+        bots = etapa('bots', lambda: _criar_maos(partidas, Bot))
+        relatorio['jogo'] = {
+            'partidas': partidas,
+            'bytes_por_carta': relatorio['etapas']['cartas']['bytes'] / max(sum(len(baralho.cartas) for baralho in baralhos), 1),
+            'bytes_por_jogador': relatorio['etapas']['jogadores']['bytes'] / max(len(jogadores), 1),
+            'bytes_por_bot': relatorio['etapas']['bots']['bytes'] / max(len(bots), 1),
+        }
+        relatorio['pico'] = tracemalloc.get_traced_memory()[1]
+        return relatorio
+
+    finally:
+        if not (iniciado):
+            tracemalloc.stop()
+
+
+def _formatar(quantidade):
+    for unidade in ('B', 'KiB', 'MiB'):
+        if (abs(quantidade) < 1024):
+            return f'{quantidade:.1f} {unidade}'
+
+        quantidade /= 1024
+
+    return f'{quantidade:.1f} GiB'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Relatório de memória da base de casos, do índice, das sessões e dos objetos do jogo.')
+    parser.add_argument('--sessoes', type=int, default=100, help='sessões abertas para medir o custo por sessão')
+    parser.add_argument('--partidas', type=int, default=100, help='baralhos e mãos criados para medir os objetos do jogo')
+    parser.add_argument('--replicar', type=int, default=1, help='repete a base de casos essa quantidade de vezes')
+    parser.add_argument('--top', type=int, default=0, help='mostra as linhas com maior alocação em cada etapa')
+    parser.add_argument('--json', action='store_true', help='imprime o relatório em JSON')
+    args = parser.parse_args(argv)
+
+    relatorio = relatorio_memoria(args.sessoes, args.partidas, args.replicar, args.top)
+    if (args.json):
+        print(json.dumps(relatorio, indent=2))
+        return
+
+    base = relatorio['base']
+    print(f"Base de casos: {base['casos']} casos x {base['colunas']} colunas")
+    print(f"  DataFrame (deep)      {_formatar(base['frame'])}")
+    print(f"  array NumPy           {_formatar(base['array'])}")
+    print(f"  pesos                 {_formatar(base['pesos'])}")
+    print(f"  índice (construção)   {_formatar(base['indice'])}")
+    if (base['arvore'] is not None):
+        print(f"  árvore do índice      {_formatar(base['arvore'])}")
+        print(f"  _fit_X do índice      {_formatar(base['fit_x'])}{' (mesma memória do DataFrame)' if base['fit_x_compartilhado'] else ''}")
+
+    sessao = relatorio['sessao']
+    print(f"Sessões: {sessao['quantidade']}")
+    print(f"  por sessão            {_formatar(sessao['bytes_por_sessao'])}")
+    print(f"  por Dados (registro)  {_formatar(sessao['bytes_por_registro'])}")
+    print(f"  registro (deep)       {_formatar(sessao['registro'])}")
+    jogo = relatorio['jogo']
+    print(f"Objetos do jogo ({jogo['partidas']} partidas)")
+    print(f"  por Carta             {_formatar(jogo['bytes_por_carta'])}")
+    print(f"  por Jogador com mão   {_formatar(jogo['bytes_por_jogador'])}")
+    print(f"  por Bot com mão       {_formatar(jogo['bytes_por_bot'])}")
+    print('Alocado por etapa (tracemalloc)')
+    for nome, etapa in relatorio['etapas'].items():
+        print(f"  {nome:<21} {_formatar(etapa['bytes'])}")
+        for linha in etapa['linhas']:
+            print(f"      {_formatar(linha['bytes']):>12}  {linha['linha']}")
+
+    print(f"Pico: {_formatar(relatorio['pico'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+import collections
+import json
+import os
+import threading
+import time
+
+# Baldes por potência de 2 nos histogramas (erro relativo máximo de 1/32, cerca de 3%)
+SUBDIVISOES = 32
+QUANTIS = (0.5, 0.9, 0.99, 0.999)
+PREFIXO = 'truco_'
+
+
+class Histograma():
+    """Histograma log-linear no estilo HDR, para valores inteiros (nanossegundos).
+
+    Valores até 2 * SUBDIVISOES são guardados exatos; acima disso cada potência de 2 é dividida em SUBDIVISOES baldes
+    de mesma largura, então o erro relativo é constante e a memória cresce só com a ordem de grandeza dos valores.
+    """
+    def __init__(self):
+        self.baldes = collections.Counter()
+        self.quantidade = 0
+        self.soma = 0
+        self.minimo = None
+        self.maximo = None
+
+
+    def _indice(self, valor):
+        deslocamento = valor.bit_length() - SUBDIVISOES.bit_length()
+        if (deslocamento <= 0):
+            return valor
+
+        return deslocamento * SUBDIVISOES + (valor >> deslocamento)
+
+
+    def _limite_superior(self, indice):
+        """Maior valor que cai no balde."""
+        if (indice < 2 * SUBDIVISOES):
+            return indice
+
+        deslocamento = indice // SUBDIVISOES - 1
+        mantissa = indice - deslocamento * SUBDIVISOES
+        return ((mantissa + 1) << deslocamento) - 1
+
+
+    def registrar(self, valor):
+        valor = max(int(valor), 0)
+        self.baldes[self._indice(valor)] += 1
+        self.quantidade += 1
+        self.soma += valor
+        self.minimo = valor if self.minimo is None else min(self.minimo, valor)
+        self.maximo = valor if self.maximo is None else max(self.maximo, valor)
+
+
+    def percentil(self, q):
+        """Valor do quantil `q` (entre 0 e 1), limitado ao maior valor registrado."""
+        if not (self.quantidade):
+            return 0
+
+        alvo = max(1, q * self.quantidade)
+        acumulado = 0
+        for indice in sorted(self.baldes):
+            acumulado += self.baldes[indice]
+            if (acumulado >= alvo):
+                return min(self._limite_superior(indice), self.maximo)
+
+        return self.maximo
+
+
+class _CronometroNulo():
+    """Cronômetro usado com as métricas desativadas: não mede nada."""
+    def marcar(self, fase):
+        pass
+
+    def encerrar(self, fase):
+        pass
+
+
+_CRONOMETRO_NULO = _CronometroNulo()
+
+
+class Cronometro():
+    """Mede as fases consecutivas de uma decisão com o relógio monotônico."""
+    def __init__(self, metricas, decisao):
+        self.metricas = metricas
+        self.decisao = decisao
+        self.inicio = self.ultimo = time.perf_counter_ns()
+
+
+    def marcar(self, fase):
+        """Encerra a fase atual, registrando o tempo desde a marca anterior."""
+        agora = time.perf_counter_ns()
+        self.metricas.registrar('decisao_fase_segundos', agora - self.ultimo, decisao=self.decisao, fase=fase)
+        self.ultimo = agora
+
+
+    def encerrar(self, fase):
+        """Encerra a última fase e registra o tempo total e a contagem da decisão."""
+        self.marcar(fase)
+        self.metricas.registrar('decisao_segundos', self.ultimo - self.inicio, decisao=self.decisao)
+        self.metricas.incrementar('decisoes_total', decisao=self.decisao)
+
+
+class Metricas():
+    """Contadores e histogramas de latência, exportáveis em texto do Prometheus ou em JSON.
+
+    Desativadas, `incrementar` e `registrar` retornam logo na primeira linha e `cronometro` devolve um cronômetro
+    que não faz nada, então a instrumentação no caminho das decisões tem custo desprezível.
+    """
+    def __init__(self, ativo=False):
+        self.ativo = ativo
+        self.trava = threading.Lock()
+        self.contadores = {}
+        self.histogramas = {}
+
+
+    def ativar(self):
+        self.ativo = True
+
+
+    def desativar(self):
+        self.ativo = False
+
+
+    def zerar(self):
+        with self.trava:
+            self.contadores = {}
+            self.histogramas = {}
+
+
+    def incrementar(self, nome, valor=1, **rotulos):
+        if not (self.ativo):
+            return
+
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self.trava:
+            self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+
+    def registrar(self, nome, nanossegundos, **rotulos):
+        """Registra uma duração (em nanossegundos) no histograma `nome`."""
+        if not (self.ativo):
+            return
+
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self.trava:
+            if (chave not in self.histogramas):
+                self.histogramas[chave] = Histograma()
+
+            self.histogramas[chave].registrar(nanossegundos)
+
+
+    def cronometro(self, decisao):
+        if not (self.ativo):
+            return _CRONOMETRO_NULO
+
+        return Cronometro(self, decisao)
+
+
+    def instantaneo(self):
+        """Cópia das métricas como dicionário pronto para JSON (tempos em segundos)."""
+        with self.trava:
+            contadores = [{'nome': nome, 'rotulos': dict(rotulos), 'valor': valor} for (nome, rotulos), valor in sorted(self.contadores.items())]
+            histogramas = []
+            for (nome, rotulos), histograma in sorted(self.histogramas.items()):
+                resumo = {'nome': nome, 'rotulos': dict(rotulos), 'quantidade': histograma.quantidade, 'soma': histograma.soma / 1e9,
+                          'minimo': histograma.minimo / 1e9, 'maximo': histograma.maximo / 1e9}
+                for q in QUANTIS:
+                    resumo['p%g' % (q * 100)] = histograma.percentil(q) / 1e9
+
+                histogramas.append(resumo)
+
+        return {'contadores': contadores, 'histogramas': histogramas}
+
+
+    def exportar_json(self):
+        return json.dumps(self.instantaneo(), indent=2)
+
+
+    def exportar_prometheus(self):
+        """Texto no formato de exposição do Prometheus: contadores como counter e histogramas como summary."""
+        instantaneo = self.instantaneo()
+        linhas = []
+        tipos = set()
+        for contador in instantaneo['contadores']:
+            nome = PREFIXO + contador['nome']
+            if (nome not in tipos):
+                tipos.add(nome)
+                linhas.append('# TYPE %s counter' % nome)
+
+            linhas.append('%s%s %d' % (nome, _rotulos(contador['rotulos']), contador['valor']))
+
+        for histograma in instantaneo['histogramas']:
+            nome = PREFIXO + histograma['nome']
+            if (nome not in tipos):
+                tipos.add(nome)
+                linhas.append('# TYPE %s summary' % nome)
+
+            for q in QUANTIS:
+                rotulos = dict(histograma['rotulos'], quantile='%g' % q)
+                linhas.append('%s%s %.9f' % (nome, _rotulos(rotulos), histograma['p%g' % (q * 100)]))
+
+            linhas.append('%s_sum%s %.9f' % (nome, _rotulos(histograma['rotulos']), histograma['soma']))
+            linhas.append('%s_count%s %d' % (nome, _rotulos(histograma['rotulos']), histograma['quantidade']))
+
+        return '\n'.join(linhas) + '\n'
+
+
+    def salvar(self, caminho):
+        """Grava as métricas em `caminho`: JSON se a extensão for .json, senão texto do Prometheus."""
+        conteudo = self.exportar_json() if str(caminho).endswith('.json') else self.exportar_prometheus()
+        # grava em um arquivo temporário e renomeia, para que um coletor nunca leia o arquivo pela metade
+        temporario = '%s.tmp' % caminho
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            arquivo.write(conteudo)
+
+        os.replace(temporario, caminho)
+
+
+def _rotulos(rotulos):
+    if not (rotulos):
+        return ''
+
+    return '{%s}' % ','.join('%s="%s"' % (chave, str(valor).replace('\\', '\\\\').replace('"', '\\"')) for chave, valor in sorted(rotulos.items()))
+
+
+# Registro usado pelo Cbr e pelo Dados; começa ativo quando a variável de ambiente TRUCO_METRICAS=1
+METRICAS = Metricas(ativo=os.environ.get('TRUCO_METRICAS') == '1')
@@ -0,0 +1,174 @@
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from .carta import Carta
+from .pontos import CARTAS_VALORES
+
+# Códigos das colunas "quem..." da base de casos
+ROBO = 1
+HUMANO = 2
+# Perfis mantidos em memória; o menos usado recentemente sai primeiro
+CAPACIDADE = 1000
+# Observações mínimas para uma taxa do perfil ser usada nas decisões do bot
+MINIMO_OBSERVACOES = 5
+# Taxa de recusa dos envidos do bot, nas partidas dos casos vizinhos, a partir da qual o bot pede o envido
+LIMIAR_FUGA_ENVIDO = 0.7
+CONTADORES = ('maos', 'trucos', 'blefes', 'envidos_recebidos', 'envidos_aceitos', 'primeiras_cartas', 'soma_primeira_carta')
+# Naipes pelo código gravado no registro (Carta.retornar_naipe_codificado)
+NAIPES = {1: 'ESPADAS', 2: 'OUROS', 3: 'BASTOS', 4: 'COPAS'}
+
+
+def _valor(registro, coluna):
+    return int(registro[coluna].iloc[0])
+
+
+def forca_carta(numero, naipe):
+    """Força de truco da carta, na escala de `Carta.retornar_pontos_carta` (a da base de casos), a partir do número e
+    do naipe codificado gravados no registro; None se não há carta. Sem o naipe, a carta não é tratada como manilha."""
+    if (str(numero) not in CARTAS_VALORES):
+        return None
+
+    carta = Carta(numero, NAIPES.get(naipe, ''))
+    return carta.retornar_pontos_carta(carta)
+
+
+class PerfilOponente():
+    """Contadores do jeito de jogar de um oponente, atualizados a cada mão a partir do registro.
+
+    - blefe no truco: o humano pediu truco e perdeu a aposta, ou fugiu quando o bot aumentou;
+    - aceite do envido: o bot pediu envido e o humano não fugiu;
+    - força da primeira carta: média da força (escala da base) da primeira carta jogada pelo humano.
+    As taxas são divisões dos contadores, então a consulta é O(1); sem observações, a taxa é None.
+    """
+    __slots__ = CONTADORES
+
+    def __init__(self, **contadores):
+        for nome in CONTADORES:
+            setattr(self, nome, contadores.get(nome, 0))
+
+
+    def atualizar(self, registro):
+        """Soma a mão do registro (dataframe de uma linha, no esquema dos casos) aos contadores."""
+        self.maos += 1
+        if (_valor(registro, 'quemTruco') == HUMANO):
+            self.trucos += 1
+            if (_valor(registro, 'quemGanhouTruco') == ROBO or _valor(registro, 'quemNegouTruco') == HUMANO):
+                self.blefes += 1
+
+        if (_valor(registro, 'quemPediuEnvido') == ROBO):
+            self.envidos_recebidos += 1
+            if (_valor(registro, 'quemNegouEnvido') != HUMANO):
+                self.envidos_aceitos += 1
+
+        # o registro guarda o número da carta: a força vem do número e do naipe
+        forca = forca_carta(_valor(registro, 'primeiraCartaHumano'), _valor(registro, 'naipePrimeiraCartaHumano'))
+        if (forca is not None):
+            self.primeiras_cartas += 1
+            self.soma_primeira_carta += forca
+
+
+    def taxa_blefe_truco(self):
+        return self.blefes / self.trucos if self.trucos else None
+
+
+    def taxa_aceite_envido(self):
+        return self.envidos_aceitos / self.envidos_recebidos if self.envidos_recebidos else None
+
+
+    def forca_primeira_carta(self):
+        return self.soma_primeira_carta / self.primeiras_cartas if self.primeiras_cartas else None
+
+
+    def blefa_no_truco(self, limiar=0.5):
+        """Se o oponente costuma pedir truco sem ganhar a aposta (com observações suficientes)."""
+        return self.trucos >= MINIMO_OBSERVACOES and self.blefes / self.trucos >= limiar
+
+
+    def foge_do_envido(self, limiar=0.3):
+        """Se o oponente costuma recusar o envido pedido pelo bot (com observações suficientes)."""
+        return self.envidos_recebidos >= MINIMO_OBSERVACOES and self.envidos_aceitos / self.envidos_recebidos <= limiar
+
+
+    def resumo(self):
+        return {'maos': self.maos, 'taxa_blefe_truco': self.taxa_blefe_truco(), 'taxa_aceite_envido': self.taxa_aceite_envido(),
+                'forca_primeira_carta': self.forca_primeira_carta()}
+
+
+    def contadores(self):
+        return {nome: getattr(self, nome) for nome in CONTADORES}
+
+
+class CacheOponentes():
+    """Perfis dos oponentes por jogador, em um LRU limitado, gravados em json.
+
+    Compartilhado entre as sessões (por exemplo, as mesas do servidor), por isso os acessos passam por uma trava.
+    Com `caminho`, os perfis gravados são lidos na criação e `salvar()` grava o arquivo de forma atômica.
+    """
+    def __init__(self, caminho=None, capacidade=CAPACIDADE):
+        self.caminho = caminho
+        self.capacidade = capacidade
+        self.perfis = OrderedDict()
+        self.trava = threading.Lock()
+        if (caminho is not None and Path(caminho).is_file()):
+            self.carregar()
+
+
+    def __len__(self):
+        return len(self.perfis)
+
+
+    def __contains__(self, jogador):
+        return jogador in self.perfis
+
+
+    def _obter(self, jogador):
+        perfil = self.perfis.get(jogador)
+        if (perfil is None):
+            perfil = self.perfis[jogador] = PerfilOponente()
+            while (len(self.perfis) > self.capacidade):
+                self.perfis.popitem(last=False)
+
+        else:
+            self.perfis.move_to_end(jogador)
+
+        return perfil
+
+
+    def perfil(self, jogador):
+        """Perfil do jogador (criado vazio se ainda não existir)."""
+        with self.trava:
+            return self._obter(jogador)
+
+
+    def atualizar(self, jogador, registro):
+        """Soma a mão do registro ao perfil do jogador e retorna o perfil."""
+        with self.trava:
+            perfil = self._obter(jogador)
+            perfil.atualizar(registro)
+            return perfil
+
+
+    def carregar(self, caminho=None):
+        with open(Path(caminho or self.caminho), encoding='utf-8') as arquivo:
+            conteudo = json.load(arquivo)
+
+        with self.trava:
+            self.perfis = OrderedDict((jogador, PerfilOponente(**contadores)) for jogador, contadores in conteudo['perfis'])
+            while (len(self.perfis) > self.capacidade):
+                self.perfis.popitem(last=False)
+
+
+    def salvar(self, caminho=None):
+        """Grava os perfis, do menos ao mais usado recentemente, em um arquivo temporário renomeado no fim."""
+        caminho = Path(caminho or self.caminho)
+        with self.trava:
+            conteudo = {'perfis': [[jogador, perfil.contadores()] for jogador, perfil in self.perfis.items()]}
+
+        descritor, temporario = tempfile.mkstemp(dir=caminho.parent, prefix=caminho.name, suffix='.tmp')
+        with os.fdopen(descritor, 'w', encoding='utf-8') as arquivo:
+            json.dump(conteudo, arquivo)
+
+        os.replace(temporario, caminho)
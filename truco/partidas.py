@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+from .colunas import COLUNAS_CASO
+
+# Colunas usadas pelo índice de partidas; as que não são atributos dos casos (idPartida, placares) são lidas como extras
+COLUNAS_PARTIDA = ['idMao', 'idPartida', 'tentosAnterioresRobo', 'tentosAnterioresHumano', 'tentosPosterioresRobo',
+                   'tentosPosterioresHumano', 'quemTruco', 'quemNegouTruco', 'quemPediuEnvido', 'quemNegouEnvido']
+COLUNAS_EXTRAS = [coluna for coluna in COLUNAS_PARTIDA if coluna not in COLUNAS_CASO]
+# Códigos do robô e do humano nas colunas "quem..." da base
+ROBO = 1
+HUMANO = 2
+# Contagens por partida usadas nas taxas de recusa e no contexto dos casos
+CONTAGENS = ('trucosRobo', 'negouTrucoHumano', 'envidosRobo', 'negouEnvidoHumano')
+
+
+def tabela_partidas(casos, extras, inverso=None):
+    """Mãos com partida, montadas com os casos lidos das fontes (antes da deduplicação) e a tabela de colunas extras
+    retornada pela mesma leitura (`carregar_fontes(..., extras=COLUNAS_EXTRAS)`).
+
+    `linha` é a posição da mão na leitura das fontes e `caso`, a posição do caso correspondente na base deduplicada
+    (`inverso`, de `deduplicar_casos`). Linhas sem idPartida (por exemplo, de bases condensadas) ficam de fora;
+    colunas ausentes viram zero.
+    """
+    tabela = pd.DataFrame({'linha': np.arange(len(casos)), 'origem': extras['origem'].to_numpy()})
+    tabela['caso'] = tabela['linha'].to_numpy() if inverso is None else np.asarray(inverso)
+    for coluna in COLUNAS_PARTIDA:
+        if (coluna == 'idPartida'):
+            tabela[coluna] = extras[coluna].to_numpy() if coluna in extras.columns else np.nan
+
+        elif (coluna in casos.columns):
+            tabela[coluna] = casos[coluna].to_numpy(dtype=np.int64)
+
+        elif (coluna in extras.columns):
+            tabela[coluna] = pd.to_numeric(extras[coluna], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+        else:
+            tabela[coluna] = 0
+
+    tabela = tabela[tabela.idPartida.notna()].reset_index(drop=True)
+    tabela['idPartida'] = tabela.idPartida.astype(str)
+    return tabela[COLUNAS_PARTIDA + ['linha', 'origem', 'caso']]
+
+
+class IndicePartidas():
+    """Agrupa as mãos das fontes por idPartida, com os agregados de cada partida já calculados.
+
+    As mãos são ordenadas uma vez por (idPartida, origem, idMao), então as mãos de uma partida ocupam as posições
+    [inicio, fim) da tabela ordenada e a partida é localizada por um acesso a dicionário. Os agregados (placar final,
+    número de mãos e os hábitos de aposta do humano) ficam numa tabela indexada pela partida. A coluna `caso` liga
+    cada mão à sua posição em `Dados.casos` (e no `Cbr.dataset`).
+    """
+    def __init__(self, tabela):
+        codigos, ids = pd.factorize(tabela['idPartida'], sort=True)
+        ordem = np.lexsort((tabela['idMao'].to_numpy(), tabela['origem'].to_numpy(), codigos))
+        self.maos = tabela.iloc[ordem].reset_index(drop=True)
+        self.grupos = codigos[ordem]
+        self.inicios = np.searchsorted(self.grupos, np.arange(len(ids) + 1))
+        self.posicao = {id_partida: i for i, id_partida in enumerate(ids)}
+        self.agregados = self._agregar(self.grupos, ids)
+        self._resumos = self.agregados.to_dict('records')
+        # somas das contagens das partidas por caso, calculadas na primeira consulta de contexto
+        self._por_caso = None
+
+
+    def _agregar(self, grupos, ids):
+        maos = self.maos
+        contagem = np.bincount(grupos, minlength=len(ids))
+        divisor = np.maximum(contagem, 1)
+
+        def somar(mascara):
+            return np.bincount(grupos, weights=mascara, minlength=len(ids))
+
+        def taxa(coluna):
+            return somar(maos[coluna].to_numpy() == HUMANO) / divisor
+
+        def recusa(pedido, negou):
+            # recusas do humano só nas mãos em que o bot pediu; sem pedidos do bot, a taxa fica indefinida (NaN)
+            pedidos = somar(maos[pedido].to_numpy() == ROBO)
+            negados = somar((maos[pedido].to_numpy() == ROBO) & (maos[negou].to_numpy() == HUMANO))
+            return pedidos, negados, np.divide(negados, pedidos, out=np.full(len(ids), np.nan), where=pedidos > 0)
+
+        def maximo(coluna):
+            # o placar só cresce ao longo da partida: o maior valor é o placar final
+            saida = np.zeros(len(ids), dtype=np.int64)
+            np.maximum.at(saida, grupos, maos[coluna].to_numpy())
+            return saida
+
+        trucos, negou_truco, taxa_negou_truco = recusa('quemTruco', 'quemNegouTruco')
+        envidos, negou_envido, taxa_negou_envido = recusa('quemPediuEnvido', 'quemNegouEnvido')
+
+        agregados = pd.DataFrame({
+            'maos': contagem,
+            'placarRobo': maximo('tentosPosterioresRobo'),
+            'placarHumano': maximo('tentosPosterioresHumano'),
+            'taxaTrucoHumano': taxa('quemTruco'),
+            'taxaNegouTrucoHumano': taxa_negou_truco,
+            'taxaEnvidoHumano': taxa('quemPediuEnvido'),
+            'taxaNegouEnvidoHumano': taxa_negou_envido,
+            'trucosRobo': trucos.astype(np.int64),
+            'negouTrucoHumano': negou_truco.astype(np.int64),
+            'envidosRobo': envidos.astype(np.int64),
+            'negouEnvidoHumano': negou_envido.astype(np.int64),
+        }, index=pd.Index(ids, name='idPartida'))
+        agregados['saldo'] = agregados.placarRobo - agregados.placarHumano
+        return agregados
+
+
+    def __len__(self):
+        return len(self.posicao)
+
+
+    def __contains__(self, id_partida):
+        return id_partida in self.posicao
+
+
+    def intervalo(self, id_partida):
+        """Posições [inicio, fim) das mãos da partida na tabela ordenada."""
+        i = self.posicao[id_partida]
+        return int(self.inicios[i]), int(self.inicios[i + 1])
+
+
+    def maos_da_partida(self, id_partida):
+        """Mãos da partida, em ordem (fatia da tabela ordenada, sem cópia)."""
+        inicio, fim = self.intervalo(id_partida)
+        return self.maos.iloc[inicio:fim]
+
+
+    def casos_da_partida(self, id_partida):
+        """Posições, em `Dados.casos`, dos casos das mãos da partida (em ordem; mãos repetidas na base dão o mesmo caso)."""
+        return self.maos_da_partida(id_partida)['caso'].to_numpy()
+
+
+    def contexto(self, casos):
+        """Hábitos de aposta do humano nas partidas de onde vieram os casos (posições em `Dados.casos`), como os
+        vizinhos de uma decisão: pedidos do bot e recusas do humano somados nas partidas de cada mão dos casos."""
+        if (self._por_caso is None):
+            caso = self.maos['caso'].to_numpy()
+            tamanho = int(caso.max()) + 1 if len(caso) else 0
+            self._por_caso = {nome: np.bincount(caso, weights=self.agregados[nome].to_numpy()[self.grupos], minlength=tamanho)
+                              for nome in CONTAGENS}
+
+        casos = np.asarray(casos)
+        casos = casos[casos < len(self._por_caso['trucosRobo'])]
+        somas = {nome: int(valores[casos].sum()) for nome, valores in self._por_caso.items()}
+        somas['taxaNegouTrucoHumano'] = somas['negouTrucoHumano'] / somas['trucosRobo'] if somas['trucosRobo'] else None
+        somas['taxaNegouEnvidoHumano'] = somas['negouEnvidoHumano'] / somas['envidosRobo'] if somas['envidosRobo'] else None
+        return somas
+
+
+    def trajetoria(self, id_partida):
+        """Placar (robô, humano) depois de cada mão da partida."""
+        return self.maos_da_partida(id_partida)[['tentosPosterioresRobo', 'tentosPosterioresHumano']].to_numpy()
+
+
+    def resumo(self, id_partida):
+        """Agregados da partida, já calculados na construção do índice."""
+        return self._resumos[self.posicao[id_partida]]
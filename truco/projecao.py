@@ -0,0 +1,154 @@
+import argparse
+import json
+import os
+import tempfile
+
+METODOS = ('pca', 'nca')
+# Coluna usada como rótulo pela NCA: o resultado do truco separa bem as mãos fortes das fracas
+ALVO_NCA = 'quemGanhouTruco'
+
+
+def ajustar_projecao(casos, metodo='pca', componentes=16, alvo=ALVO_NCA, iteracoes=50):
+    """Centro e mapa linear (colunas x componentes) da projeção, ajustados sobre a base de casos.
+
+    'pca' usa os componentes principais dos casos sem escala, que preservam melhor a distância euclidiana do
+    índice atual; 'nca' aprende o mapa com a Neighborhood Components Analysis do scikit-learn, rotulando cada
+    caso pela coluna `alvo`.
+    """
+    import numpy as np
+
+    matriz = np.asarray(casos, dtype=np.float64)
+    componentes = min(componentes, matriz.shape[1])
+    if (metodo == 'pca'):
+        centro = matriz.mean(axis=0)
+        _, _, direcoes = np.linalg.svd(matriz - centro, full_matrices=False)
+        return centro, direcoes[:componentes].T
+
+    if (metodo == 'nca'):
+        from sklearn.neighbors import NeighborhoodComponentsAnalysis
+
+        rotulos = casos[alvo].to_numpy()
+        nca = NeighborhoodComponentsAnalysis(n_components=componentes, init='pca', max_iter=iteracoes, random_state=0).fit(matriz, rotulos)
+        return np.zeros(matriz.shape[1]), nca.components_.T
+
+    raise ValueError(f'Método de projeção desconhecido: {metodo}')
+
+
+def salvar_projecao(caminho, centro, mapa):
+    import numpy as np
+
+    np.savez(caminho, centro=centro, mapa=mapa)
+
+
+def carregar_projecao(caminho):
+    import numpy as np
+
+    with np.load(caminho) as arquivo:
+        return arquivo['centro'], arquivo['mapa']
+
+
+class IndiceProjetado():
+    """Projeta os casos e as consultas com um mapa linear e busca os vizinhos no espaço reduzido.
+
+    `projecao` é 'pca' (ajustada sobre a base no fit, em poucos milissegundos) ou o caminho de um .npz gravado
+    por `python -m truco.projecao --gravar`. O centro e o mapa ficam no próprio índice, então vão junto quando ele
+    é serializado (por exemplo, na memória compartilhada dos processos trabalhadores).
+    """
+    def __init__(self, indice, projecao='pca', componentes=16):
+        if (projecao in METODOS and projecao != 'pca'):
+            # ajustar a NCA leva segundos e depende do rótulo: o mapa é ajustado uma vez e gravado
+            raise ValueError(f"A projeção '{projecao}' precisa de um mapa gravado por python -m truco.projecao --metodo {projecao} --gravar")
+
+        self.indice = indice
+        self.projecao = projecao
+        self.componentes = componentes
+
+
+    @property
+    def n_neighbors(self):
+        return self.indice.n_neighbors
+
+
+    def projetar(self, matriz):
+        import numpy as np
+
+        return (np.asarray(matriz, dtype=np.float64) - self.centro) @ self.mapa
+
+
+    def fit(self, casos):
+        if (self.projecao == 'pca'):
+            self.centro, self.mapa = ajustar_projecao(casos, 'pca', self.componentes)
+
+        else:
+            self.centro, self.mapa = carregar_projecao(self.projecao)
+
+        self.indice.fit(self.projetar(casos))
+        return self
+
+
+    def kneighbors(self, matriz, n_neighbors=None):
+        if (n_neighbors is None):
+            return self.indice.kneighbors(self.projetar(matriz))
+
+        return self.indice.kneighbors(self.projetar(matriz), n_neighbors=n_neighbors)
+
+
+def avaliar_projecoes(cbr, componentes=(8, 16, 24, 32), metodo='pca', casos=300, semente=0):
+    """Mede, para cada quantidade de componentes, a latência de consulta e quantas decisões mudam em relação ao
+    índice atual sem projeção; a aceleração é a razão entre as medianas de latência."""
+    from .autoajuste import medir_configuracao
+    from .equivalencia import amostrar_base, decidir
+
+    corpus = amostrar_base(cbr, casos, semente)
+    esperadas = [decidir(cbr, decisao, parametros, vizinhos=cbr.consultar([linha])[1][0]) for decisao, _, linha, parametros in corpus]
+    atual = dict(cbr.configuracao, projecao=None)
+    base = medir_configuracao(cbr, atual, corpus, esperadas)
+    linhas = []
+    with tempfile.TemporaryDirectory() as pasta:
+        for quantidade in componentes:
+            configuracao = dict(atual, projecao=metodo, componentes=quantidade)
+            if (metodo != 'pca'):
+                # mapas aprendidos são ajustados uma vez, fora do índice, como seriam gravados para produção
+                caminho = os.path.join(pasta, f'{metodo}_{quantidade}.npz')
+                salvar_projecao(caminho, *ajustar_projecao(cbr.dataset, metodo, quantidade))
+                configuracao['projecao'] = caminho
+
+            medicao = medir_configuracao(cbr, configuracao, corpus, esperadas)
+            linhas.append({'componentes': quantidade, 'p50_ms': medicao['p50_ms'], 'p99_ms': medicao['p99_ms'],
+                           'aceleracao': base['p50_ms'] / medicao['p50_ms'], 'decisoes_alteradas': 1 - medicao['concordancia'],
+                           'alteradas_por_decisao': {decisao: 1 - valor for decisao, valor in medicao['concordancia_decisoes'].items()}})
+
+    return {'metodo': metodo, 'itens': len(corpus), 'base': {'p50_ms': base['p50_ms'], 'p99_ms': base['p99_ms']}, 'projecoes': linhas}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Avalia (e grava) uma projeção linear na frente do índice de vizinhos do Cbr.')
+    parser.add_argument('--componentes', type=int, nargs='+', default=[8, 16, 24, 32], help='dimensões do espaço reduzido')
+    parser.add_argument('--metodo', default='pca', choices=METODOS)
+    parser.add_argument('--casos', type=int, default=300, help='registros sorteados da base para medir latência e decisões alteradas')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--gravar', help='grava o mapa ajustado (com a primeira quantidade de componentes) neste .npz')
+    parser.add_argument('--json', action='store_true', help='imprime o relatório em JSON')
+    args = parser.parse_args(argv)
+
+    from .cbr import Cbr
+
+    cbr = Cbr()
+    relatorio = avaliar_projecoes(cbr, args.componentes, args.metodo, args.casos, args.semente)
+    if (args.json):
+        print(json.dumps(relatorio, indent=2))
+
+    else:
+        base = relatorio['base']
+        print(f"Sem projeção: p50 {base['p50_ms']:.3f} ms  p99 {base['p99_ms']:.3f} ms ({relatorio['itens']} decisões)")
+        for linha in relatorio['projecoes']:
+            print(f"{args.metodo} {linha['componentes']:>3} componentes: p50 {linha['p50_ms']:.3f} ms  p99 {linha['p99_ms']:.3f} ms  "
+                  f"aceleração {linha['aceleracao']:.2f}x  decisões alteradas {linha['decisoes_alteradas']:.2%}")
+
+    if (args.gravar):
+        salvar_projecao(args.gravar, *ajustar_projecao(cbr.dataset, args.metodo, args.componentes[0]))
+        print(f"Mapa gravado em {args.gravar}; use \"projecao\": \"{args.gravar}\" na seção indice de configuracao_indice.json")
+
+
+if __name__ == '__main__':
+    main()
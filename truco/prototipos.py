@@ -0,0 +1,192 @@
+import argparse
+import copy
+import json
+import time
+from .avaliacao import ALVOS
+from .colunas import COLUNAS_CASO
+from .equivalencia import juntar, amostrar_base, comparar_itens, simular_partidas
+from .fontes import COLUNA_PESO
+
+METODOS = ('agrupamento', 'cnn')
+
+
+def _mais_proximos(prototipos, matriz):
+    """Posição, em `prototipos`, do protótipo mais próximo de cada linha de `matriz`."""
+    from sklearn.neighbors import NearestNeighbors
+
+    return NearestNeighbors(n_neighbors=1, algorithm='ball_tree').fit(prototipos).kneighbors(matriz)[1][:, 0]
+
+
+def condensar_agrupamento(casos, pesos, fracao=0.25, semente=0):
+    """Agrupa os casos com k-means (k = fração dos casos) e fica com o caso mais próximo do centro de cada grupo,
+    que recebe a soma dos pesos do grupo. Retorna as posições dos protótipos e os novos pesos."""
+    import numpy as np
+    from sklearn.cluster import MiniBatchKMeans
+
+    matriz = casos.to_numpy(dtype=np.float64)
+    grupos = max(1, min(len(matriz), int(round(fracao * len(matriz)))))
+    modelo = MiniBatchKMeans(n_clusters=grupos, n_init=3, batch_size=4096, random_state=semente).fit(matriz, sample_weight=pesos)
+    rotulos = modelo.labels_
+    distancias = ((matriz - modelo.cluster_centers_[rotulos]) ** 2).sum(axis=1)
+    # representante de cada grupo: o caso de menor distância ao centro (empates pela primeira posição)
+    ordem = np.lexsort((np.arange(len(matriz)), distancias, rotulos))
+    grupos_presentes, primeiro = np.unique(rotulos[ordem], return_index=True)
+    posicoes = ordem[primeiro]
+    novos_pesos = np.bincount(rotulos, weights=pesos, minlength=modelo.n_clusters)[grupos_presentes]
+    ordenadas = np.argsort(posicoes, kind='stable')
+    return posicoes[ordenadas], novos_pesos[ordenadas]
+
+
+def _cnn(matriz, rotulos, ordem, passadas):
+    """Posições mantidas pelo vizinho mais próximo condensado (Hart) para um rótulo, visitando os casos na `ordem`."""
+    import numpy as np
+
+    escolhidos = np.zeros(len(matriz), dtype=bool)
+    # os protótipos ficam numa matriz reservada que cresce pela contagem, sem recriar o array a cada caso
+    prototipos = np.empty_like(matriz)
+    posicoes = np.empty(len(matriz), dtype=np.int64)
+    escolhidos[ordem[0]] = True
+    prototipos[0] = matriz[ordem[0]]
+    posicoes[0] = ordem[0]
+    n = 1
+    for _ in range(passadas):
+        adicionados = 0
+        for i in ordem:
+            if (escolhidos[i]):
+                continue
+
+            mais_proximo = posicoes[int(np.argmin(((prototipos[:n] - matriz[i]) ** 2).sum(axis=1)))]
+            if (rotulos[mais_proximo] != rotulos[i]):
+                escolhidos[i] = True
+                prototipos[n] = matriz[i]
+                posicoes[n] = i
+                n += 1
+                adicionados += 1
+
+        if not (adicionados):
+            break
+
+    return escolhidos
+
+
+def condensar_cnn(casos, pesos, alvos=ALVOS, semente=0, passadas=3):
+    """Vizinho mais próximo condensado (Hart), rodado para cada coluna de `alvos`: um caso vira protótipo quando o
+    protótipo mais próximo tem outro valor naquela coluna. A base fica com a união dos protótipos de cada alvo, e os
+    casos descartados passam o peso para o protótipo mais próximo. Com alvos ruidosos, como os da base distribuída
+    (cerca de 90% dos casos ficam), o agrupamento reduz bem mais a base."""
+    import numpy as np
+
+    matriz = casos.to_numpy(dtype=np.float64)
+    ordem = np.random.default_rng(semente).permutation(len(matriz))
+    escolhidos = np.zeros(len(matriz), dtype=bool)
+    for alvo in alvos:
+        escolhidos |= _cnn(matriz, casos[alvo].to_numpy(), ordem, passadas)
+
+    posicoes = np.flatnonzero(escolhidos)
+    donos = _mais_proximos(matriz[posicoes], matriz)
+    return posicoes, np.bincount(donos, weights=pesos, minlength=len(posicoes))
+
+
+def condensar(cbr, metodo='agrupamento', fracao=0.25, semente=0):
+    """Base condensada (casos e pesos) a partir da base do Cbr, pelo método escolhido."""
+    pesos = cbr.pesos.to_numpy()
+    if (metodo == 'agrupamento'):
+        posicoes, novos_pesos = condensar_agrupamento(cbr.dataset, pesos, fracao, semente)
+
+    elif (metodo == 'cnn'):
+        posicoes, novos_pesos = condensar_cnn(cbr.dataset, pesos, semente=semente)
+
+    else:
+        raise ValueError(f'Método de condensação desconhecido: {metodo}')
+
+    casos = cbr.dataset.iloc[posicoes].reset_index(drop=True)
+    casos.index.name = 'idMao'
+    return casos, novos_pesos
+
+
+def vizinhos_condensados(cbr, casos):
+    """Vizinhos da base condensada proporcionais à fração de casos mantida, para cobrir a mesma região do espaço."""
+    return max(1, round(cbr.configuracao['n_neighbors'] * len(casos) / len(cbr.dataset)))
+
+
+def cbr_condensado(cbr, casos, pesos, vizinhos=None):
+    """Cbr com a configuração de índice do original sobre a base condensada (vizinhos proporcionais, salvo `vizinhos`)."""
+    from .cbr import Cbr
+
+    dados = copy.copy(cbr.dados)
+    dados.definir_casos(casos, pesos)
+    if (vizinhos is None):
+        vizinhos = vizinhos_condensados(cbr, casos)
+
+    return Cbr(dados, configuracao=dict(cbr.configuracao, n_neighbors=vizinhos))
+
+
+def _latencia_consulta(cbr, matrizes):
+    inicio = time.perf_counter()
+    for matriz in matrizes:
+        cbr.consultar(matriz)
+
+    return (time.perf_counter() - inicio) / max(len(matrizes), 1)
+
+
+def avaliar_condensacao(cbr, condensado, casos=1000, partidas=20, semente=0):
+    """Concordância das decisões do Cbr condensado com as do Cbr completo, com a redução de linhas, de memória e
+    de latência de consulta."""
+    import numpy as np
+
+    corpus = amostrar_base(cbr, casos, semente) + simular_partidas(cbr, partidas, semente)
+    relatorio = juntar([comparar_itens(cbr, condensado, corpus)])
+    matrizes = [np.asarray([linha], dtype=np.float64) for _, _, linha, _ in corpus[:300]]
+    completa, reduzida = _latencia_consulta(cbr, matrizes), _latencia_consulta(condensado, matrizes)
+    relatorio.update({
+        'itens': len(corpus),
+        'casos': {'completa': len(cbr.dataset), 'condensada': len(condensado.dataset)},
+        'fracao': len(condensado.dataset) / len(cbr.dataset),
+        'n_neighbors': condensado.configuracao['n_neighbors'],
+        'memoria': {'completa': int(cbr.dataset.memory_usage(deep=True).sum()), 'condensada': int(condensado.dataset.memory_usage(deep=True).sum())},
+        'latencia_ms': {'completa': completa * 1e3, 'condensada': reduzida * 1e3},
+        'aceleracao': completa / reduzida if reduzida else 0.0,
+    })
+    return relatorio
+
+
+def salvar_base(caminho, casos, pesos):
+    """Grava a base condensada no formato das fontes (separada por tab), com a coluna de pesos."""
+    tabela = casos[COLUNAS_CASO].copy()
+    tabela[COLUNA_PESO] = pesos
+    tabela.to_csv(caminho, sep='\t', index=True, index_label='idMao')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Condensa a base de casos em protótipos com pesos e mede a concordância com a base completa.')
+    parser.add_argument('--metodo', default='agrupamento', choices=METODOS)
+    parser.add_argument('--fracao', type=float, default=0.25, help='fração dos casos mantida como protótipos (agrupamento)')
+    parser.add_argument('--casos', type=int, default=1000, help='registros sorteados da base para medir a concordância')
+    parser.add_argument('--partidas', type=int, default=20, help='partidas simuladas para medir a concordância')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--vizinhos', type=int, default=None, help='vizinhos na base condensada (padrão: proporcional à fração mantida)')
+    parser.add_argument('--saida', default='base_condensada.csv', help='arquivo da base condensada (use com TRUCO_BASE_CASOS)')
+    parser.add_argument('--json', action='store_true', help='imprime o relatório em JSON')
+    args = parser.parse_args(argv)
+
+    from .cbr import Cbr
+
+    cbr = Cbr()
+    casos, pesos = condensar(cbr, args.metodo, args.fracao, args.semente)
+    relatorio = avaliar_condensacao(cbr, cbr_condensado(cbr, casos, pesos, args.vizinhos), args.casos, args.partidas, args.semente)
+    salvar_base(args.saida, casos, pesos)
+    if (args.json):
+        print(json.dumps(relatorio, indent=2))
+        return
+
+    print(f"Base condensada ({args.metodo}): {relatorio['casos']['condensada']} de {relatorio['casos']['completa']} casos "
+          f"({relatorio['fracao']:.1%}), gravada em {args.saida}")
+    print(f"  vizinhos  {relatorio['n_neighbors']} (use \"n_neighbors\": {relatorio['n_neighbors']} em configuracao_indice.json com TRUCO_BASE_CASOS={args.saida})")
+    print(f"  memória   {relatorio['memoria']['completa'] / 1024:.0f} KiB -> {relatorio['memoria']['condensada'] / 1024:.0f} KiB")
+    print(f"  consulta  {relatorio['latencia_ms']['completa']:.3f} ms -> {relatorio['latencia_ms']['condensada']:.3f} ms ({relatorio['aceleracao']:.2f}x)")
+    for nome, contagem in list(relatorio['decisoes'].items()) + [('geral', relatorio['geral'])]:
+        print(f"  {nome:<12} {contagem['iguais']:>6}/{contagem['total']:<6} {contagem['concordancia']:8.2%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+import json
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+def caixa(msg, indent=1, width=None, title=None):
+    """Monta uma caixa em torno de determinada mensagem."""
+    lines = msg.split('\n')
+    space = " " * indent
+    if not width:
+        width = max(map(len, lines))
+    box = f'╔{"═" * (width + indent * 2)}╗\n'  # upper_border
+
+    if title:
+        box += f'║{space}{title:<{width}}{space}║\n'  # title
+        box += f'║{space}{"-" * len(title):<{width}}{space}║\n'  # underscore
+
+    box += ''.join([f'║{space}{line:<{width}}{space}║\n' for line in lines])
+    box += f'╚{"═" * (width + indent * 2)}╝'  # lower_border
+    return box
+
+
+def _opcoes_jogada(truco, flor, envido):
+    linhas = []
+    if (truco):
+        linhas.append('[4] Truco')
+
+    if (flor):
+        linhas.append('[5] Flor')
+
+    if (envido):
+        linhas.append('[6] Envido\n[7] Real Envido\n[8] Falta Envido')
+
+    linhas.append('[9] Ir ao baralho')
+    return '\n'.join(linhas)
+
+
+def _vencedor_flor(vencedor, jogador1, jogador2, pontos):
+    if (vencedor == 1):
+        return caixa(f"Jogador 1 - {jogador1}: Venceu a flor e ganhou {pontos} pontos", title='Vencedor Flor')
+
+    return caixa(f"Jogador 2 - {jogador2}: Venceu a flor e ganhou {pontos} pontos", title='Vencedor Flor')
+
+
+def _vencedor_envido(vencedor, jogador1, jogador1_pontos, jogador2, jogador2_pontos):
+    if (vencedor == 1):
+        return caixa(f"Jogador 1 - {jogador1}: Venceu o envido com {jogador1_pontos} pontos\nJogador 2 - {jogador2}: PERDEU o envido com {jogador2_pontos} pontos", title='Jogador 1 Vencedor Envido')
+
+    return caixa(f"Jogador 2 - {jogador2}: Venceu o envido com {jogador2_pontos} pontos\nJogador 1 - {jogador1}: PERDEU o envido com {jogador1_pontos} pontos", title='Jogador 2 Vencedor Envido')
+
+
+# Formatação de cada tipo de evento. Só é executada pelas saídas que produzem texto,
+# de modo que as saídas nula e de eventos nunca pagam o custo de montar as mensagens.
+FORMATOS = {
+    'mensagem': lambda texto: texto,
+    'caixa': caixa,
+    'vez_jogador': lambda jogador, numero: f"\n<< {jogador} - Jogador {numero} >>",
+    'carta_opcao': lambda indice, numero, naipe: f"[{indice}] {numero} de {naipe}",
+    'opcoes_jogada': _opcoes_jogada,
+    'carta_jogada': lambda jogador, numero, naipe: f"{jogador} jogou a carta: {numero} de {naipe}",
+    'carta_ganhadora': lambda numero, naipe: f"\nCarta ganhadora: {numero} de {naipe}\n",
+    'ganhador_rodada': lambda jogador: f"{jogador} ganhou a rodada\n",
+    'jogador_fugiu': lambda jogador: f'Jogador {jogador} fugiu!',
+    'placar_total': lambda jogador1, jogador1_pontos, jogador2, jogador2_pontos: caixa(f"Jogador 1 - {jogador1}: {jogador1_pontos} Pontos Acumulados\nJogador 2 - {jogador2}: {jogador2_pontos} Pontos Acumulados", title='Pontuação Total'),
+    'placar_rodadas': lambda jogador1, jogador1_rodadas, jogador2, jogador2_rodadas: caixa(f"Jogador 1 - {jogador1}: Venceu {jogador1_rodadas} Rodada(s)\nJogador 2 - {jogador2}: Venceu {jogador2_rodadas} Rodada(s)", title='Rodadas da Partida Atual'),
+    'vencedor_flor': _vencedor_flor,
+    'vencedor_envido': _vencedor_envido,
+    'ganhador_jogo': lambda jogador: f"\n{jogador} ganhou o jogo",
+    'pediu_truco': lambda jogador: f'{jogador} pediu truco e o pedido já foi aceito, escolha outra jogada!',
+    'jogador_mao': lambda: "Jogador 1 é mão",
+    'aposta_aceita': lambda quem_pediu: f"Jogador {quem_pediu} aceitou o pedido.",
+    'aposta_aumentada': lambda quem_pediu: f"Jogador {quem_pediu} pediu Retruco.",
+    'valor_aposta': lambda valor: f"pontos truco {valor}",
+}
+
+
+def formatar_evento(tipo, campos):
+    """Converte um evento em texto legível."""
+    return FORMATOS[tipo](**campos)
+
+
+class Saida(ABC):
+    """Destino de todas as mensagens do jogo. As implementações decidem se formatam, guardam ou descartam os eventos."""
+    ativa = True
+
+    @abstractmethod
+    def emitir(self, tipo, **campos):
+        """Recebe um evento do jogo, identificado pelo tipo e pelos seus campos."""
+
+
+class SaidaConsole(Saida):
+    """Formata os eventos e exibe no terminal, como o jogo sempre fez."""
+    def __init__(self, arquivo=None):
+        self.arquivo = arquivo
+
+
+    def emitir(self, tipo, **campos):
+        print(formatar_evento(tipo, campos), file=self.arquivo)
+
+
+class SaidaNula(Saida):
+    """Descarta os eventos sem formatá-los, para simulações e servidores."""
+    ativa = False
+
+    def emitir(self, tipo, **campos):
+        pass
+
+
+class SaidaBuffer(Saida):
+    """Guarda os últimos eventos em memória e só formata o texto quando ele for lido."""
+    def __init__(self, capacidade=None):
+        self.eventos = deque(maxlen=capacidade)
+
+
+    def emitir(self, tipo, **campos):
+        self.eventos.append((tipo, campos))
+
+
+    def retornar_texto(self):
+        """Retorna o texto acumulado, no mesmo formato exibido no console."""
+        return '\n'.join(formatar_evento(tipo, campos) for tipo, campos in self.eventos)
+
+
+    def limpar(self):
+        """Descarta o conteúdo acumulado."""
+        self.eventos.clear()
+
+
+class SaidaEventos(Saida):
+    """Grava os eventos estruturados, permitindo exportá-los e reproduzi-los depois."""
+    def __init__(self):
+        self.eventos = []
+
+
+    def emitir(self, tipo, **campos):
+        self.eventos.append((tipo, campos))
+
+
+    def retirar(self):
+        """Retorna os eventos gravados até agora, esvaziando a lista."""
+        eventos, self.eventos = self.eventos, []
+        return eventos
+
+
+    def reproduzir(self, saida):
+        """Reenvia os eventos gravados para outra saída."""
+        for tipo, campos in self.eventos:
+            saida.emitir(tipo, **campos)
+
+
+    def salvar(self, caminho):
+        """Salva os eventos em um arquivo JSON, um evento por linha."""
+        with open(caminho, 'w', encoding='utf-8') as arquivo:
+            for tipo, campos in self.eventos:
+                arquivo.write(json.dumps({'tipo': tipo, 'campos': campos}, ensure_ascii=False) + '\n')
+
+
+    @classmethod
+    def carregar(cls, caminho):
+        """Carrega os eventos salvos por `salvar`."""
+        saida = cls()
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                if linha.strip():
+                    evento = json.loads(linha)
+                    saida.eventos.append((evento['tipo'], evento['campos']))
+
+        return saida
@@ -0,0 +1,156 @@
+# Ordem das jogadas na mão: as cartas do bot e do humano e o ganhador de cada rodada
+COLUNAS_SEQUENCIA = ['primeiraCartaRobo', 'primeiraCartaHumano', 'ganhadorPrimeiraRodada',
+                     'segundaCartaRobo', 'segundaCartaHumano', 'ganhadorSegundaRodada',
+                     'terceiraCartaRobo', 'terceiraCartaHumano', 'ganhadorTerceiraRodada']
+
+
+class _No():
+    """Nó da trie: os casos com o prefixo do nó ocupam as posições [inicio, fim) da ordem da trie."""
+    __slots__ = ('inicio', 'fim', 'filhos')
+
+    def __init__(self, inicio, fim):
+        self.inicio = inicio
+        self.fim = fim
+        self.filhos = {}
+
+
+class TrieJogadas():
+    """Trie sobre a sequência de jogadas dos casos.
+
+    Os casos são ordenados uma vez pela sequência (ordem lexicográfica), então todos os casos com um mesmo prefixo
+    ficam contíguos e cada nó guarda só o intervalo deles; descer a trie é um acesso a dicionário por jogada.
+    """
+    def __init__(self, sequencias):
+        import numpy as np
+
+        sequencias = np.asarray(sequencias)
+        self.ordem = np.lexsort(sequencias.T[::-1])
+        ordenadas = sequencias[self.ordem]
+        self.raiz = _No(0, len(ordenadas))
+        pendentes = [(self.raiz, 0)]
+        while (pendentes):
+            no, nivel = pendentes.pop()
+            if (nivel == ordenadas.shape[1] or no.fim - no.inicio == 0):
+                continue
+
+            valores = ordenadas[no.inicio:no.fim, nivel]
+            cortes = np.flatnonzero(valores[1:] != valores[:-1]) + 1
+            limites = np.concatenate(([0], cortes, [len(valores)])) + no.inicio
+            for inicio, fim in zip(limites[:-1], limites[1:]):
+                filho = _No(int(inicio), int(fim))
+                no.filhos[int(ordenadas[inicio, nivel])] = filho
+                pendentes.append((filho, nivel + 1))
+
+
+    def caminho(self, prefixo):
+        """Nós da raiz até o mais profundo que casa com o prefixo."""
+        nos = [self.raiz]
+        for valor in prefixo:
+            filho = nos[-1].filhos.get(int(valor))
+            if (filho is None):
+                break
+
+            nos.append(filho)
+
+        return nos
+
+
+    def casos(self, no):
+        """Posições, na base, dos casos com o prefixo do nó."""
+        return self.ordem[no.inicio:no.fim]
+
+
+def prefixo_conhecido(sequencia):
+    """Jogadas iniciais já feitas no registro: para na primeira sentinela ou ainda não preenchida (zero).
+
+    Nos ganhadores de rodada, zero também é o empate: conta como jogada quando a carta seguinte já foi jogada, o
+    que mostra que a rodada terminou; sem a carta seguinte, não há como distinguir o empate da rodada em andamento.
+    """
+    prefixo = []
+    for i, valor in enumerate(sequencia):
+        ganhador = (i % 3 == 2)
+        if (valor < 0 or (valor == 0 and not (ganhador and i + 1 < len(sequencia) and sequencia[i + 1] > 0))):
+            break
+
+        prefixo.append(valor)
+
+    return prefixo
+
+
+class IndiceSequencial():
+    """Índice que primeiro restringe os candidatos aos casos com o mesmo prefixo de jogadas e depois ordena pela distância.
+
+    Os vizinhos são os casos do nó mais profundo da trie que casa com as jogadas do registro, do mais próximo ao mais
+    distante; se forem menos de k, completa com os casos do nó pai que ainda não entraram, e assim até a raiz, onde
+    o restante vem de uma ball tree sobre a base inteira. Sem jogadas no registro (primeira decisão da mão), a busca
+    é a mesma do kNN exato. Nos nós, empates de distância ficam pela posição do caso na base.
+    """
+    def __init__(self, n_neighbors=100):
+        self.n_neighbors = n_neighbors
+
+
+    def fit(self, casos):
+        import numpy as np
+        from sklearn.neighbors import NearestNeighbors
+
+        colunas = list(casos.columns)
+        self.colunas_sequencia = [colunas.index(coluna) for coluna in COLUNAS_SEQUENCIA]
+        self.casos = np.asarray(casos, dtype=np.float64)
+        self.trie = TrieJogadas(self.casos[:, self.colunas_sequencia].astype(np.int64))
+        # na raiz os candidatos são a base inteira: a ball tree evita calcular a distância a todos os casos
+        self.arvore = NearestNeighbors(n_neighbors=self.n_neighbors, algorithm='ball_tree').fit(self.casos)
+        return self
+
+
+    def _completar_pela_raiz(self, consulta, escolhidos, faltam):
+        import numpy as np
+
+        quantidade = min(len(self.casos), faltam + len(escolhidos))
+        distancias, indices = self.arvore.kneighbors(consulta.reshape(1, -1), n_neighbors=quantidade)
+        novos = ~np.isin(indices[0], escolhidos)
+        return distancias[0][novos][:faltam], indices[0][novos][:faltam]
+
+
+    def _vizinhos(self, consulta, k):
+        import numpy as np
+
+        nos = self.trie.caminho(prefixo_conhecido(consulta[self.colunas_sequencia]))
+        distancias, indices = [], []
+        anterior = None
+        for no in reversed(nos):
+            if (no is self.trie.raiz):
+                escolhidos = np.concatenate(indices) if indices else np.empty(0, dtype=np.intp)
+                restantes, posicoes = self._completar_pela_raiz(consulta, escolhidos, k - len(escolhidos))
+                distancias.append(restantes)
+                indices.append(posicoes)
+                break
+
+            if (anterior is None):
+                posicoes = self.trie.casos(no)
+
+            else:
+                # casos do nó que não estão no filho já percorrido (o filho é um intervalo dentro do pai)
+                posicoes = np.concatenate((self.trie.ordem[no.inicio:anterior.inicio], self.trie.ordem[anterior.fim:no.fim]))
+
+            quadrados = ((self.casos[posicoes] - consulta) ** 2).sum(axis=1)
+            ordem = np.lexsort((posicoes, quadrados))[:k - sum(len(parte) for parte in indices)]
+            distancias.append(np.sqrt(quadrados[ordem]))
+            indices.append(posicoes[ordem])
+            anterior = no
+            if (sum(len(parte) for parte in indices) >= k):
+                break
+
+        return np.concatenate(distancias), np.concatenate(indices)
+
+
+    def kneighbors(self, matriz, n_neighbors=None):
+        import numpy as np
+
+        matriz = np.asarray(matriz, dtype=np.float64)
+        k = min(self.n_neighbors if n_neighbors is None else n_neighbors, len(self.casos))
+        distancias = np.empty((len(matriz), k))
+        indices = np.empty((len(matriz), k), dtype=np.intp)
+        for linha, consulta in enumerate(matriz):
+            distancias[linha], indices[linha] = self._vizinhos(consulta, k)
+
+        return distancias, indices
@@ -0,0 +1,468 @@
+import argparse
+import asyncio
+import collections
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+import numpy as np
+from .cbr import Cbr
+from .corretor import percentil
+from .metricas import METRICAS
+
+# Limites de uma requisição; acima deles a conexão é respondida com erro e encerrada
+LIMITE_CABECALHO = 16 * 1024
+LIMITE_CORPO = 8 * 1024 * 1024
+MAX_CABECALHOS = 100
+AMOSTRAS_LATENCIA = 10000
+BACKLOG = 1024
+
+MOTIVOS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 411: 'Length Required', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+DECISOES = ('jogar_carta', 'truco', 'envido')
+TIPO_BINARIO = 'application/octet-stream'
+
+
+class ErroHttp(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _valor(texto):
+    """Converte um parâmetro da query string: inteiro, número, lista separada por vírgula, booleano ou texto."""
+    if (',' in texto):
+        return [_valor(parte) for parte in texto.split(',')]
+
+    if (texto.lower() in ('true', 'sim')):
+        return True
+
+    if (texto.lower() in ('false', 'nao', 'não')):
+        return False
+
+    for tipo in (int, float):
+        try:
+            return tipo(texto)
+        except ValueError:
+            pass
+
+    return texto
+
+
+class ServicoDecisoes():
+    """Serviço HTTP/1.1 (asyncio, sem dependências externas) que expõe as decisões do Cbr.
+
+    Rotas:
+      POST /jogar_carta, /truco, /envido  -- um registro, em JSON ({"registro": [...], parâmetros}) ou binário
+                                             (int16 little-endian na ordem de /saude["colunas"], parâmetros na query string)
+      POST /lote                          -- vários registros com uma única busca de vizinhos
+      GET  /saude, /metricas
+      GET  /metricas/cbr                  -- latência por fase e contadores do Cbr, em texto do Prometheus (?formato=json para JSON)
+    As conexões são mantidas abertas (keep-alive) até `tempo_ocioso` segundos sem requisições.
+    """
+    def __init__(self, cbr=None, trabalhadores=None, tempo_ocioso=15.0):
+        self.cbr = cbr
+        self.tempo_ocioso = tempo_ocioso
+        self.executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='truco-servico')
+        self.servidor = None
+        self.escritores = set()
+        self.rotas = collections.defaultdict(lambda: {'pedidos': 0, 'erros': 0, 'tempo_total': 0.0})
+        self.latencias = collections.deque(maxlen=AMOSTRAS_LATENCIA)
+        self.conexoes_total = 0
+        self.inicio = time.monotonic()
+
+
+    async def iniciar(self, host='127.0.0.1', porta=8080):
+        """Carrega o Cbr (se necessário) e começa a aceitar conexões."""
+        if (self.cbr is None):
+            self.cbr = await asyncio.get_running_loop().run_in_executor(self.executor, Cbr)
+
+        self.colunas = list(self.cbr.dataset.columns)
+        self.servidor = await asyncio.start_server(self.atender, host, porta, limit=LIMITE_CABECALHO, backlog=BACKLOG)
+        return self.servidor
+
+
+    def endereco(self):
+        return self.servidor.sockets[0].getsockname()
+
+
+    async def encerrar(self):
+        if (self.servidor is not None):
+            self.servidor.close()
+            for escritor in list(self.escritores):
+                escritor.close()
+
+            await self.servidor.wait_closed()
+
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+
+    def metricas(self):
+        """Pedidos, erros e tempo médio por rota, latência geral e uso das conexões."""
+        latencias = sorted(self.latencias)
+        pedidos = sum(rota['pedidos'] for rota in self.rotas.values())
+        return {
+            'rotas': {caminho: dict(rota, tempo_medio=rota['tempo_total'] / rota['pedidos'] if rota['pedidos'] else 0.0) for caminho, rota in self.rotas.items()},
+            'pedidos': pedidos,
+            'latencia_p50': percentil(latencias, 0.5),
+            'latencia_p99': percentil(latencias, 0.99),
+            'conexoes_abertas': len(self.escritores),
+            'conexoes_total': self.conexoes_total,
+            'pedidos_por_conexao': pedidos / self.conexoes_total if self.conexoes_total else 0.0,
+            'tempo_ativo': time.monotonic() - self.inicio,
+        }
+
+
+    async def atender(self, leitor, escritor):
+        self.escritores.add(escritor)
+        self.conexoes_total += 1
+        try:
+            manter = True
+            while (manter):
+                try:
+                    pedido = await asyncio.wait_for(self._ler_pedido(leitor), self.tempo_ocioso)
+                except asyncio.TimeoutError:
+                    break
+
+                except ErroHttp as erro:
+                    await self._responder(escritor, erro.status, {'erro': str(erro)}, False)
+                    break
+
+                if (pedido is None):
+                    break
+
+                metodo, alvo, versao, cabecalhos, corpo = pedido
+                conexao = cabecalhos.get('connection', '').lower()
+                manter = (conexao == 'keep-alive') if versao == 'HTTP/1.0' else (conexao != 'close')
+                inicio = time.perf_counter()
+                caminho = urlsplit(alvo).path
+                try:
+                    status, resposta = 200, await self.rotear(metodo, alvo, cabecalhos, corpo)
+                except ErroHttp as erro:
+                    status, resposta = erro.status, {'erro': str(erro)}
+                except Exception as erro:
+                    status, resposta = 500, {'erro': f'{type(erro).__name__}: {erro}'}
+
+                duracao = time.perf_counter() - inicio
+                # caminhos inexistentes são agrupados, para não criar uma métrica por URL recebida
+                rota = self.rotas[caminho if status != 404 else 'desconhecida']
+                rota['pedidos'] += 1
+                rota['tempo_total'] += duracao
+                if (status != 200):
+                    rota['erros'] += 1
+
+                self.latencias.append(duracao)
+                await self._responder(escritor, status, resposta, manter)
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+        finally:
+            self.escritores.discard(escritor)
+            escritor.close()
+            try:
+                await escritor.wait_closed()
+            except ConnectionError:
+                pass
+
+
+    async def _ler_pedido(self, leitor):
+        """Lê uma requisição HTTP/1.x com corpo delimitado por Content-Length. Retorna None se o cliente fechou a conexão."""
+        try:
+            linha = await leitor.readline()
+        except ValueError:
+            raise ErroHttp(413, 'Linha de requisição muito longa.')
+
+        if not (linha):
+            return None
+
+        partes = linha.decode('latin-1').rstrip('\r\n').split(' ')
+        if (len(partes) != 3 or not partes[2].startswith('HTTP/1.')):
+            raise ErroHttp(400, 'Linha de requisição inválida.')
+
+        metodo, alvo, versao = partes
+        cabecalhos = {}
+        while True:
+            try:
+                linha = await leitor.readline()
+            except ValueError:
+                raise ErroHttp(413, 'Cabeçalho muito longo.')
+
+            if (linha in (b'\r\n', b'\n', b'')):
+                break
+
+            if (len(cabecalhos) >= MAX_CABECALHOS):
+                raise ErroHttp(413, 'Cabeçalhos demais.')
+
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        if ('chunked' in cabecalhos.get('transfer-encoding', '').lower()):
+            raise ErroHttp(411, 'Envie o corpo com Content-Length.')
+
+        try:
+            tamanho = int(cabecalhos.get('content-length', 0))
+        except ValueError:
+            raise ErroHttp(400, 'Content-Length inválido.')
+
+        if (tamanho < 0 or tamanho > LIMITE_CORPO):
+            raise ErroHttp(413, f'Corpo maior que {LIMITE_CORPO} bytes.')
+
+        corpo = await leitor.readexactly(tamanho)
+        return metodo, alvo, versao, cabecalhos, corpo
+
+
+    async def _responder(self, escritor, status, resposta, manter):
+        # respostas em texto (exportação do Prometheus) vão sem conversão para JSON
+        if (isinstance(resposta, str)):
+            corpo, tipo = resposta.encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+
+        else:
+            corpo, tipo = json.dumps(resposta, ensure_ascii=False).encode('utf-8'), 'application/json; charset=utf-8'
+
+        cabecalho = (f'HTTP/1.1 {status} {MOTIVOS[status]}\r\nContent-Type: {tipo}\r\n'
+                     f'Content-Length: {len(corpo)}\r\nConnection: {"keep-alive" if manter else "close"}\r\n\r\n')
+        escritor.write(cabecalho.encode('latin-1') + corpo)
+        await escritor.drain()
+
+
+    async def rotear(self, metodo, alvo, cabecalhos, corpo):
+        """Resolve a rota e retorna o corpo (dict) da resposta."""
+        url = urlsplit(alvo)
+        caminho = url.path.rstrip('/') or '/'
+        if (caminho == '/saude'):
+            self._exigir_metodo(metodo, 'GET')
+            return {'status': 'ok', 'casos': len(self.cbr.dataset), 'colunas': self.colunas}
+
+        if (caminho == '/metricas'):
+            self._exigir_metodo(metodo, 'GET')
+            return self.metricas()
+
+        if (caminho == '/metricas/cbr'):
+            self._exigir_metodo(metodo, 'GET')
+            if (parse_qs(url.query).get('formato', [''])[-1] == 'json'):
+                return self.cbr.metricas.instantaneo()
+
+            return self.cbr.metricas.exportar_prometheus()
+
+        nome = caminho[1:]
+        if (nome not in DECISOES and nome != 'lote'):
+            raise ErroHttp(404, f'Rota inexistente: {caminho}')
+
+        self._exigir_metodo(metodo, 'POST')
+        binario = cabecalhos.get('content-type', '').split(';')[0].strip() == TIPO_BINARIO
+        if (binario):
+            parametros = {chave: _valor(valores[-1]) for chave, valores in parse_qs(url.query).items()}
+            matriz = self._matriz_binaria(corpo)
+            decisao = parametros.pop('decisao', nome)
+            pedidos = [dict(parametros, decisao=decisao) for _ in range(len(matriz))]
+
+        else:
+            try:
+                mensagem = json.loads(corpo or b'{}')
+            except ValueError:
+                raise ErroHttp(400, 'Corpo JSON inválido.')
+
+            pedidos = mensagem.get('pedidos') if nome == 'lote' else [dict(mensagem, decisao=nome)]
+            if not (isinstance(pedidos, list) and pedidos and all(isinstance(pedido, dict) for pedido in pedidos)):
+                raise ErroHttp(400, 'Informe os pedidos como uma lista de objetos.')
+
+            matriz = self._matriz_json([pedido.get('registro') for pedido in pedidos])
+
+        if (nome != 'lote' and len(matriz) != 1):
+            raise ErroHttp(400, 'Esta rota recebe exatamente um registro; use /lote para vários.')
+
+        respostas = await asyncio.get_running_loop().run_in_executor(self.executor, self.decidir, pedidos, matriz)
+        return {'respostas': respostas} if nome == 'lote' else respostas[0]
+
+
+    def decidir(self, pedidos, matriz):
+        """Uma busca de vizinhos para todos os registros e a decisão de cada pedido sobre os seus vizinhos."""
+        distancias, indices = self.cbr.consultar(matriz)
+        respostas = []
+        for pedido, vizinhos, distancia in zip(pedidos, indices, distancias):
+            try:
+                respostas.append({'decisao': int(self._aplicar(pedido, vizinhos)), 'distancias': distancia.tolist()})
+            except (KeyError, TypeError, ValueError) as erro:
+                if (len(pedidos) == 1):
+                    raise ErroHttp(400, f'Parâmetros inválidos: {erro}')
+
+                respostas.append({'erro': f'Parâmetros inválidos: {erro}'})
+
+        return respostas
+
+
+    def _aplicar(self, pedido, vizinhos):
+        decisao = pedido.get('decisao')
+        if (decisao == 'jogar_carta'):
+            return self.cbr.jogar_carta(int(pedido['rodada']), [int(p) for p in pedido['pontuacao_cartas']], vizinhos=vizinhos)
+
+        if (decisao == 'truco'):
+            return self.cbr.truco(pedido.get('tipo', 'truco'), int(pedido.get('quem_pediu', 1)), float(pedido['qualidade_mao_bot']), vizinhos=vizinhos)
+
+        if (decisao == 'envido'):
+            return self.cbr.envido(int(pedido.get('tipo', 6)), int(pedido.get('quem_pediu', 1)), int(pedido['pontos_envido_robo']), pedido.get('robo_perdendo'), vizinhos=vizinhos)
+
+        raise ValueError(f'decisão desconhecida: {decisao}')
+
+
+    def _matriz_binaria(self, corpo):
+        largura = 2 * len(self.colunas)
+        if (not corpo or len(corpo) % largura):
+            raise ErroHttp(400, f'O corpo binário deve ter múltiplos de {largura} bytes (int16 por coluna).')
+
+        return np.frombuffer(corpo, dtype='<i2').reshape(-1, len(self.colunas))
+
+
+    def _matriz_json(self, registros):
+        try:
+            matriz = np.array(registros, dtype=np.int16)
+        except (TypeError, ValueError, OverflowError):
+            raise ErroHttp(400, 'Os registros devem ser listas de inteiros.')
+
+        if (matriz.ndim != 2 or matriz.shape[1] != len(self.colunas)):
+            raise ErroHttp(400, f'Cada registro deve ter {len(self.colunas)} valores, na ordem de /saude["colunas"].')
+
+        return matriz
+
+
+    def _exigir_metodo(self, metodo, esperado):
+        if (metodo != esperado):
+            raise ErroHttp(405, f'Use {esperado} nesta rota.')
+
+
+async def requisitar(leitor, escritor, metodo, alvo, corpo=b'', tipo='application/json'):
+    """Cliente HTTP mínimo sobre uma conexão já aberta (mantida viva entre as requisições). Retorna status e JSON (ou texto)."""
+    escritor.write(f'{metodo} {alvo} HTTP/1.1\r\nHost: truco\r\nContent-Type: {tipo}\r\nContent-Length: {len(corpo)}\r\n\r\n'.encode('latin-1') + corpo)
+    await escritor.drain()
+    status = int((await leitor.readline()).split(b' ', 2)[1])
+    tamanho = 0
+    texto = False
+    while True:
+        linha = await leitor.readline()
+        if (linha in (b'\r\n', b'')):
+            break
+
+        nome, _, valor = linha.decode('latin-1').partition(':')
+        if (nome.strip().lower() == 'content-length'):
+            tamanho = int(valor)
+
+        elif (nome.strip().lower() == 'content-type'):
+            texto = valor.strip().startswith('text/')
+
+    corpo = await leitor.readexactly(tamanho)
+    return status, corpo.decode('utf-8') if texto else json.loads(corpo)
+
+
+async def teste_carga(registros, host='127.0.0.1', porta=8080, pedidos=1000, conexoes=10, binario=False, lote=1):
+    """Envia `pedidos` decisões de truco por `conexoes` conexões keep-alive e resume vazão e latências."""
+    registros = np.asarray(registros, dtype=np.int16)
+
+    async def conexao(numero):
+        leitor, escritor = await asyncio.open_connection(host, porta)
+        latencias, erros = [], 0
+        try:
+            for i in range(numero, pedidos, conexoes):
+                linhas = registros[[(i * lote + j) % len(registros) for j in range(lote)]]
+                if (binario):
+                    alvo = '/lote?decisao=truco&qualidade_mao_bot=30' if lote > 1 else '/truco?qualidade_mao_bot=30'
+                    argumentos = ('POST', alvo, linhas.astype('<i2').tobytes(), TIPO_BINARIO)
+
+                elif (lote > 1):
+                    corpo = {'pedidos': [{'decisao': 'truco', 'registro': linha.tolist(), 'qualidade_mao_bot': 30} for linha in linhas]}
+                    argumentos = ('POST', '/lote', json.dumps(corpo).encode('utf-8'))
+
+                else:
+                    argumentos = ('POST', '/truco', json.dumps({'registro': linhas[0].tolist(), 'qualidade_mao_bot': 30}).encode('utf-8'))
+
+                inicio = time.perf_counter()
+                status, _ = await requisitar(leitor, escritor, *argumentos)
+                latencias.append(time.perf_counter() - inicio)
+                erros += status != 200
+
+        finally:
+            escritor.close()
+            await escritor.wait_closed()
+
+        return latencias, erros
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(conexao(numero) for numero in range(conexoes)))
+    duracao = time.perf_counter() - inicio
+    latencias = sorted(l for lista, _ in resultados for l in lista)
+    return {
+        'pedidos': len(latencias),
+        'decisoes': len(latencias) * lote,
+        'erros': sum(erros for _, erros in resultados),
+        'duracao': duracao,
+        'decisoes_por_segundo': len(latencias) * lote / duracao if duracao else 0.0,
+        'latencia_p50': percentil(latencias, 0.5),
+        'latencia_p99': percentil(latencias, 0.99),
+    }
+
+
+async def _servir(args):
+    if (args.metricas):
+        METRICAS.ativar()
+
+    servico = ServicoDecisoes(trabalhadores=args.trabalhadores, tempo_ocioso=args.tempo_ocioso)
+    await servico.iniciar(args.host, args.porta)
+    print(f'Serviço de decisões em http://{args.host}:{servico.endereco()[1]}')
+    try:
+        await servico.servidor.serve_forever()
+    finally:
+        await servico.encerrar()
+
+
+async def _carga(args):
+    servico = None
+    host, porta = args.host, args.porta
+    if (args.local):
+        servico = ServicoDecisoes(trabalhadores=args.trabalhadores)
+        await servico.iniciar(args.host, 0)
+        host, porta = servico.endereco()[:2]
+        registros = servico.cbr.dataset.to_numpy()
+
+    else:
+        leitor, escritor = await asyncio.open_connection(host, porta)
+        _, saude = await requisitar(leitor, escritor, 'GET', '/saude')
+        escritor.close()
+        # sem acesso à base, usa registros zerados com a quantidade de colunas informada pelo serviço
+        registros = np.zeros((1, len(saude['colunas'])), dtype=np.int16)
+
+    try:
+        resumo = await teste_carga(registros, host, porta, args.pedidos, args.conexoes, args.binario, args.lote)
+    finally:
+        if (servico is not None):
+            await servico.encerrar()
+
+    for chave, valor in resumo.items():
+        print(f'{chave}: {valor:.4f}' if isinstance(valor, float) else f'{chave}: {valor}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serviço HTTP de decisões do CBR e cliente para teste de carga.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8080)
+    parser.add_argument('--trabalhadores', type=int, default=None, help='threads para as buscas de vizinhos')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    servir = comandos.add_parser('servir', help='inicia o serviço')
+    servir.add_argument('--tempo-ocioso', type=float, default=15.0, help='segundos até fechar uma conexão keep-alive parada')
+    servir.add_argument('--metricas', action='store_true', help='ativa a instrumentação das decisões do Cbr (GET /metricas/cbr)')
+
+    carga = comandos.add_parser('carga', help='envia decisões de truco ao serviço')
+    carga.add_argument('--pedidos', type=int, default=1000)
+    carga.add_argument('--conexoes', type=int, default=10)
+    carga.add_argument('--lote', type=int, default=1, help='registros por requisição (usa /lote quando maior que 1)')
+    carga.add_argument('--binario', action='store_true', help='envia os registros como int16 em vez de JSON')
+    carga.add_argument('--local', action='store_true', help='sobe o serviço no próprio processo para o teste')
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(_servir(args) if args.comando == 'servir' else _carga(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
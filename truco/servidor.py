@@ -0,0 +1,466 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .cbr import Cbr
+from .corretor import CorretorDecisoes, percentil
+from .gravador import DestinoCsv, GravadorCasos
+from .oponentes import CacheOponentes
+from .saida import SaidaEventos
+from .sessao import SessaoJogo
+
+# Tamanho máximo de uma mensagem (uma linha JSON); linhas maiores encerram a conexão
+LIMITE_LINHA = 64 * 1024
+# Fila de conexões aguardando o accept; o padrão do asyncio (100) descarta conexões em rajadas de clientes
+BACKLOG = 1024
+
+
+class ErroMesa(Exception):
+    """Erro de protocolo ou de uma mesa, devolvido ao cliente como {"erro": ...}."""
+
+
+class Conexao():
+    """Conexão de um cliente, que pode hospedar várias mesas."""
+    def __init__(self, escritor):
+        self.escritor = escritor
+        self.trava = asyncio.Lock()
+        self.mesas = set()
+        self.aberta = True
+
+
+    async def enviar(self, mensagem):
+        """Escreve uma mensagem JSON por linha, esperando o buffer de saída esvaziar (backpressure do cliente)."""
+        if not (self.aberta):
+            return
+
+        async with self.trava:
+            self.escritor.write((json.dumps(mensagem, ensure_ascii=False) + '\n').encode('utf-8'))
+            await self.escritor.drain()
+
+
+class Mesa():
+    """Mesa hospedada pelo servidor: a sessão de jogo, os eventos ainda não enviados e a conexão dona."""
+    def __init__(self, numero, sessao, eventos, conexao):
+        self.numero = numero
+        self.sessao = sessao
+        self.eventos = eventos
+        self.conexao = conexao
+        self.ultimo_acesso = time.monotonic()
+        self.ocupada = False
+
+
+    def resposta(self):
+        """Eventos gerados desde a última resposta e a decisão pendente do humano."""
+        estado = self.sessao.estado()
+        return {
+            'mesa': self.numero,
+            'eventos': [{'tipo': tipo, 'campos': campos} for tipo, campos in self.eventos.retirar()],
+            'pergunta': estado['pergunta'],
+            'opcoes': estado['opcoes'],
+            'pontos': estado['pontos'],
+            'terminada': estado['terminada'],
+            'vencedor': estado['vencedor'],
+        }
+
+
+class ServidorTruco():
+    """Servidor asyncio de mesas humano contra bot, com mensagens JSON delimitadas por linha (TCP ou socket Unix).
+
+    Todas as mesas compartilham o mesmo `Cbr`. As jogadas do bot (consultas kNN) rodam em um pool de threads, para não
+    bloquear o laço de eventos; `max_pendentes` limita quantas jogadas ficam em execução ao mesmo tempo e cada conexão
+    só lê a próxima mensagem depois de responder a anterior, o que propaga a pressão até o cliente pelo TCP.
+    Com `tamanho_lote` maior que 1, as consultas das mesas passam por um `CorretorDecisoes`, que as agrupa em lotes.
+    Com `oponentes` (um `CacheOponentes`), as mesas atualizam o perfil de cada jogador, gravado no encerramento.
+    """
+    def __init__(self, cbr=None, max_mesas=1000, max_pendentes=64, tempo_limite=300.0, tempo_jogada=10.0, trabalhadores=None, gravador=None,
+                 tamanho_lote=1, espera_lote=0.0003, oponentes=None):
+        self.cbr = cbr
+        self.oponentes = oponentes
+        self.tamanho_lote = tamanho_lote
+        self.espera_lote = espera_lote
+        self.corretor = None
+        self.max_mesas = max_mesas
+        self.max_pendentes = max_pendentes
+        self.tempo_limite = tempo_limite
+        self.tempo_jogada = tempo_jogada
+        self.gravador = gravador
+        self.gravador_proprio = gravador is None
+        self.executor = ThreadPoolExecutor(max_workers=trabalhadores, thread_name_prefix='truco-bot')
+        self.mesas = {}
+        self.conexoes = set()
+        self.numeros = itertools.count(1)
+        self.contadores = {'mesas_criadas': 0, 'jogadas': 0, 'mesas_expiradas': 0, 'erros': 0}
+        self.pendentes = None
+        self.servidor = None
+        self.vigia = None
+
+
+    async def iniciar(self, host='127.0.0.1', porta=8765, caminho_unix=None):
+        """Carrega o Cbr (se necessário) e começa a aceitar conexões."""
+        loop = asyncio.get_running_loop()
+        if (self.cbr is None):
+            self.cbr = await loop.run_in_executor(self.executor, Cbr)
+
+        if (self.tamanho_lote > 1):
+            self.corretor = CorretorDecisoes(self.cbr, self.tamanho_lote, self.espera_lote)
+
+        if (self.gravador is None):
+            self.gravador = GravadorCasos()
+
+        self.pendentes = asyncio.Semaphore(self.max_pendentes)
+        if (caminho_unix is not None):
+            self.servidor = await asyncio.start_unix_server(self.atender, path=caminho_unix, limit=LIMITE_LINHA, backlog=BACKLOG)
+
+        else:
+            self.servidor = await asyncio.start_server(self.atender, host, porta, limit=LIMITE_LINHA, backlog=BACKLOG)
+
+        self.vigia = asyncio.create_task(self._vigiar())
+        return self.servidor
+
+
+    def endereco(self):
+        """Endereço em que o servidor está escutando (útil com porta 0)."""
+        return self.servidor.sockets[0].getsockname()
+
+
+    async def encerrar(self):
+        """Para de aceitar conexões, encerra as mesas e grava os registros pendentes."""
+        if (self.vigia is not None):
+            self.vigia.cancel()
+
+        if (self.servidor is not None):
+            self.servidor.close()
+            for conexao in list(self.conexoes):
+                conexao.escritor.close()
+
+            await self.servidor.wait_closed()
+
+        for numero in list(self.mesas):
+            self._fechar_mesa(numero)
+
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+        if (self.corretor is not None):
+            self.corretor.fechar()
+
+        if (self.gravador_proprio and self.gravador is not None):
+            self.gravador.fechar()
+
+        if (self.oponentes is not None and self.oponentes.caminho is not None):
+            self.oponentes.salvar()
+
+
+    def estatisticas(self):
+        """Contadores do servidor."""
+        estatisticas = dict(self.contadores, mesas=len(self.mesas), conexoes=len(self.conexoes))
+        if (self.corretor is not None):
+            estatisticas['corretor'] = self.corretor.metricas()
+
+        return estatisticas
+
+
+    async def atender(self, leitor, escritor):
+        conexao = Conexao(escritor)
+        self.conexoes.add(conexao)
+        try:
+            while True:
+                try:
+                    linha = await leitor.readline()
+                except ValueError:
+                    await conexao.enviar({'erro': f'Mensagem maior que o limite de {LIMITE_LINHA} bytes.'})
+                    break
+
+                if not (linha):
+                    break
+
+                await conexao.enviar(await self.processar(linha, conexao))
+
+        except ConnectionError:
+            pass
+
+        finally:
+            conexao.aberta = False
+            for numero in list(conexao.mesas):
+                self._fechar_mesa(numero)
+
+            self.conexoes.discard(conexao)
+            escritor.close()
+            try:
+                await escritor.wait_closed()
+            except ConnectionError:
+                pass
+
+
+    async def processar(self, linha, conexao):
+        """Trata uma mensagem do cliente e retorna a resposta."""
+        try:
+            mensagem = json.loads(linha)
+        except ValueError:
+            return {'erro': 'Mensagem JSON inválida.'}
+
+        if not (isinstance(mensagem, dict)):
+            return {'erro': 'A mensagem deve ser um objeto JSON.'}
+
+        acao = mensagem.get('acao')
+        try:
+            numero = mensagem.get('mesa')
+            if (acao in ('jogar', 'estado', 'encerrar') and (isinstance(numero, bool) or not isinstance(numero, int))):
+                # o número da mesa é chave de dicionário: um valor não inteiro (como uma lista) nem chega a ser procurado
+                raise ErroMesa('A mesa deve ser um número inteiro.')
+
+            if (acao == 'nova_mesa'):
+                resposta = await self.nova_mesa(conexao, str(mensagem.get('jogador', 'Jogador')), str(mensagem.get('bot', 'Bot')))
+
+            elif (acao == 'jogar'):
+                resposta = await self.jogar(self._mesa(conexao, mensagem.get('mesa')), mensagem.get('escolha'))
+
+            elif (acao == 'estado'):
+                resposta = self._mesa(conexao, mensagem.get('mesa')).resposta()
+
+            elif (acao == 'encerrar'):
+                mesa = self._mesa(conexao, mensagem.get('mesa'))
+                self._fechar_mesa(mesa.numero)
+                resposta = {'mesa': mesa.numero, 'encerrada': True}
+
+            elif (acao == 'estatisticas'):
+                resposta = self.estatisticas()
+
+            else:
+                raise ErroMesa(f'Ação desconhecida: {acao}')
+
+        except ErroMesa as erro:
+            self.contadores['erros'] += 1
+            resposta = {'erro': str(erro)}
+            if (mensagem.get('mesa') is not None):
+                resposta['mesa'] = mensagem.get('mesa')
+
+        if ('id' in mensagem):
+            resposta['id'] = mensagem['id']
+
+        return resposta
+
+
+    async def nova_mesa(self, conexao, jogador, bot):
+        if (len(self.mesas) >= self.max_mesas):
+            raise ErroMesa('Servidor cheio: limite de mesas atingido.')
+
+        eventos = SaidaEventos()
+        try:
+            sessao = SessaoJogo(self.corretor or self.cbr, jogador, bot, saida=eventos, gravador=self.gravador, oponentes=self.oponentes)
+        except Exception as erro:
+            raise ErroMesa(f'Erro ao criar a mesa: {erro}')
+
+        mesa = Mesa(next(self.numeros), sessao, eventos, conexao)
+        self.mesas[mesa.numero] = mesa
+        conexao.mesas.add(mesa.numero)
+        self.contadores['mesas_criadas'] += 1
+        await self._executar(mesa, mesa.sessao.iniciar)
+        return mesa.resposta()
+
+
+    async def jogar(self, mesa, escolha):
+        if (isinstance(escolha, bool) or not isinstance(escolha, int)):
+            raise ErroMesa('A escolha deve ser um número inteiro.')
+
+        await self._executar(mesa, mesa.sessao.jogar, escolha)
+        self.contadores['jogadas'] += 1
+        resposta = mesa.resposta()
+        if (mesa.sessao.terminada):
+            self._fechar_mesa(mesa.numero)
+
+        return resposta
+
+
+    async def _executar(self, mesa, funcao, *args):
+        """Roda o passo da sessão no pool de threads, respeitando o limite de jogadas simultâneas e o tempo da jogada."""
+        loop = asyncio.get_running_loop()
+        async with self.pendentes:
+            mesa.ocupada = True
+            try:
+                await asyncio.wait_for(loop.run_in_executor(self.executor, funcao, *args), self.tempo_jogada)
+            except asyncio.TimeoutError:
+                # a thread não pode ser interrompida: a mesa é descartada e continua marcada como ocupada
+                self._fechar_mesa(mesa.numero)
+                raise ErroMesa(f'Tempo da jogada esgotado; mesa {mesa.numero} encerrada.')
+            except Exception as erro:
+                mesa.ocupada = False
+                self._fechar_mesa(mesa.numero)
+                raise ErroMesa(f'Erro na mesa {mesa.numero}: {erro}')
+
+            mesa.ocupada = False
+            mesa.ultimo_acesso = time.monotonic()
+
+
+    def _mesa(self, conexao, numero):
+        mesa = self.mesas.get(numero)
+        if (mesa is None or mesa.conexao is not conexao):
+            raise ErroMesa(f'Mesa inexistente: {numero}')
+
+        return mesa
+
+
+    def _fechar_mesa(self, numero):
+        mesa = self.mesas.pop(numero, None)
+        if (mesa is None):
+            return
+
+        mesa.conexao.mesas.discard(numero)
+        if not (mesa.ocupada):
+            mesa.sessao.fechar()
+
+
+    async def _vigiar(self):
+        """Encerra as mesas paradas há mais de `tempo_limite` segundos, avisando o cliente."""
+        intervalo = min(max(self.tempo_limite / 4, 0.01), 5.0)
+        while True:
+            await asyncio.sleep(intervalo)
+            agora = time.monotonic()
+            for mesa in list(self.mesas.values()):
+                if (not mesa.ocupada and agora - mesa.ultimo_acesso > self.tempo_limite):
+                    self._fechar_mesa(mesa.numero)
+                    self.contadores['mesas_expiradas'] += 1
+                    asyncio.create_task(mesa.conexao.enviar({'mesa': mesa.numero, 'aviso': 'Mesa encerrada por inatividade.'}))
+
+
+async def _pedir(leitor, escritor, mensagem):
+    escritor.write((json.dumps(mensagem) + '\n').encode('utf-8'))
+    await escritor.drain()
+    while True:
+        linha = await leitor.readline()
+        if not (linha):
+            raise ConnectionError('Conexão encerrada pelo servidor.')
+
+        resposta = json.loads(linha)
+        # avisos (mesa expirada) chegam fora da ordem das respostas
+        if ('aviso' not in resposta):
+            return resposta
+
+
+async def jogar_mesa(host='127.0.0.1', porta=8765, caminho_unix=None, semente=None):
+    """Cliente simulado: abre uma mesa e responde com escolhas aleatórias até o fim do jogo.
+
+    Retorna a última resposta do servidor e a latência (em segundos) de cada pedido.
+    """
+    sorteio = random.Random(semente)
+    if (caminho_unix is not None):
+        leitor, escritor = await asyncio.open_unix_connection(caminho_unix, limit=LIMITE_LINHA)
+
+    else:
+        leitor, escritor = await asyncio.open_connection(host, porta, limit=LIMITE_LINHA)
+
+    latencias = []
+    try:
+        inicio = time.perf_counter()
+        resposta = await _pedir(leitor, escritor, {'acao': 'nova_mesa'})
+        latencias.append(time.perf_counter() - inicio)
+        while ('erro' not in resposta and not resposta['terminada']):
+            inicio = time.perf_counter()
+            resposta = await _pedir(leitor, escritor, {'acao': 'jogar', 'mesa': resposta['mesa'], 'escolha': sorteio.choice(resposta['opcoes'])})
+            latencias.append(time.perf_counter() - inicio)
+
+    finally:
+        escritor.close()
+        try:
+            await escritor.wait_closed()
+        except ConnectionError:
+            pass
+
+    return resposta, latencias
+
+
+async def teste_carga(mesas, host='127.0.0.1', porta=8765, caminho_unix=None, concorrencia=100, semente=0):
+    """Joga `mesas` partidas simuladas, até `concorrencia` ao mesmo tempo, e resume vazão e latências."""
+    limite = asyncio.Semaphore(concorrencia)
+
+    async def uma_mesa(i):
+        async with limite:
+            return await jogar_mesa(host, porta, caminho_unix, semente + i)
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(uma_mesa(i) for i in range(mesas)))
+    duracao = time.perf_counter() - inicio
+    latencias = sorted(l for _, lista in resultados for l in lista)
+    return {
+        'mesas': mesas,
+        'concluidas': sum(1 for resposta, _ in resultados if resposta.get('terminada')),
+        'erros': sum(1 for resposta, _ in resultados if 'erro' in resposta),
+        'pedidos': len(latencias),
+        'duracao': duracao,
+        'pedidos_por_segundo': len(latencias) / duracao if duracao else 0.0,
+        'latencia_p50': percentil(latencias, 0.5),
+        'latencia_p99': percentil(latencias, 0.99),
+    }
+
+
+async def _servir(args):
+    gravador = GravadorCasos(DestinoCsv(args.jogadas))
+    servidor = ServidorTruco(max_mesas=args.max_mesas, max_pendentes=args.max_pendentes, tempo_limite=args.tempo_limite,
+                             tempo_jogada=args.tempo_jogada, trabalhadores=args.trabalhadores, gravador=gravador,
+                             tamanho_lote=args.tamanho_lote, espera_lote=args.espera_lote / 1e6,
+                             oponentes=CacheOponentes(args.perfis) if args.perfis else None)
+    await servidor.iniciar(args.host, args.porta, args.unix)
+    print(f'Servidor de truco escutando em {args.unix or servidor.endereco()}')
+    try:
+        await servidor.servidor.serve_forever()
+    finally:
+        await servidor.encerrar()
+        gravador.fechar()
+
+
+async def _carga(args):
+    servidor = None
+    host, porta = args.host, args.porta
+    if (args.local):
+        servidor = ServidorTruco(gravador=GravadorCasos(DestinoCsv(args.jogadas)), tamanho_lote=args.tamanho_lote, espera_lote=args.espera_lote / 1e6)
+        await servidor.iniciar(args.host, 0, args.unix)
+        if (args.unix is None):
+            host, porta = servidor.endereco()[:2]
+
+    try:
+        resumo = await teste_carga(args.mesas, host, porta, args.unix, args.concorrencia)
+        if (servidor is not None and servidor.corretor is not None):
+            resumo.update({f'lote_{chave}': valor for chave, valor in servidor.corretor.metricas().items()})
+
+    finally:
+        if (servidor is not None):
+            await servidor.encerrar()
+            servidor.gravador.fechar()
+
+    for chave, valor in resumo.items():
+        print(f'{chave}: {valor:.4f}' if isinstance(valor, float) else f'{chave}: {valor}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servidor de mesas de truco (JSON por linha) e cliente simulado para teste de carga.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help='caminho do socket Unix (no lugar de host/porta)')
+    parser.add_argument('--jogadas', default='jogadas.csv', help='arquivo onde as mãos jogadas são gravadas')
+    parser.add_argument('--tamanho-lote', type=int, default=1, help='consultas de vizinhos agrupadas por busca (1 desliga o agrupamento)')
+    parser.add_argument('--espera-lote', type=float, default=300.0, help='microssegundos que uma consulta espera o lote encher')
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    servir = comandos.add_parser('servir', help='inicia o servidor')
+    servir.add_argument('--max-mesas', type=int, default=1000)
+    servir.add_argument('--max-pendentes', type=int, default=64, help='jogadas do bot em execução ao mesmo tempo')
+    servir.add_argument('--tempo-limite', type=float, default=300.0, help='segundos sem jogadas até a mesa ser encerrada')
+    servir.add_argument('--tempo-jogada', type=float, default=10.0, help='tempo máximo de uma jogada do bot')
+    servir.add_argument('--trabalhadores', type=int, default=None, help='threads para as jogadas do bot')
+    servir.add_argument('--perfis', default=None, help='arquivo json dos perfis dos oponentes (lido ao iniciar e gravado ao encerrar)')
+
+    carga = comandos.add_parser('carga', help='joga partidas simuladas contra o servidor')
+    carga.add_argument('--mesas', type=int, default=100)
+    carga.add_argument('--concorrencia', type=int, default=100)
+    carga.add_argument('--local', action='store_true', help='sobe um servidor no próprio processo para o teste')
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(_servir(args) if args.comando == 'servir' else _carga(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
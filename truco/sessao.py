@@ -0,0 +1,384 @@
+from .baralho import Baralho
+from .carta import Carta
+from .dados import Dados
+from .entrada import DecisaoPendente, EntradaSessao
+from .envido import Envido
+from .flor import Flor
+from .interface import Interface
+from .jogo import Jogo
+from .oponentes import HUMANO, ROBO
+from .saida import SaidaNula
+from .truco import Truco
+
+
+class CbrSessao():
+    """Liga o Cbr compartilhado ao registro de uma sessão, para que cada mesa consulte a base com o seu próprio estado."""
+    def __init__(self, cbr, dados, oponente=None):
+        self.cbr = cbr
+        self.dados = dados
+        # perfil do humano da mesa (truco.oponentes), consultado pelo bot nas respostas de truco e no pedido de envido
+        self.oponente = oponente
+
+
+    def jogar_carta(self, rodada, pontuacao_cartas):
+        return self.cbr.jogar_carta(rodada, pontuacao_cartas, registro=self.dados.retornar_registro())
+
+
+    def truco(self, tipo, quem_pediu, qualidade_mao_bot):
+        return self.cbr.truco(tipo, quem_pediu, qualidade_mao_bot, registro=self.dados.retornar_registro())
+
+
+    def envido(self, tipo, quem_pediu, pontos_envido_robo, robo_perdendo=None):
+        return self.cbr.envido(tipo, quem_pediu, pontos_envido_robo, robo_perdendo, registro=self.dados.retornar_registro())
+
+
+    def contexto_partidas(self):
+        """Hábitos do humano nas partidas dos casos vizinhos do registro da sessão (None sem o índice de partidas)."""
+        return self.cbr.contexto_partidas(registro=self.dados.retornar_registro())
+
+
+class SessaoJogo():
+    """Estado de uma mesa (humano contra o bot), avançado por passos.
+
+    Todas as sessões compartilham o mesmo `Cbr` (e a base de casos carregada por ele); cada uma tem seus jogadores,
+    baralho, apostas e registro. `iniciar()` joga até a primeira decisão do humano, exposta em `pendente`
+    (pergunta e opções), e `jogar(escolha)` responde a decisão e avança até a próxima, ou até o fim do jogo.
+    Com `oponentes` (um `CacheOponentes`), o perfil do humano (chave `id_oponente`, ou o nome do jogador) é
+    atualizado com o registro ao fim de cada mão. Com `sorteio` (um random.Random), o baralho é embaralhado por ele.
+    """
+    def __init__(self, cbr, nome_jogador='Jogador', nome_bot='Bot', saida=None, pontos_vitoria=12, gravador=None, incremental=False,
+                 oponentes=None, id_oponente=None, sorteio=None):
+        if (saida is None):
+            saida = SaidaNula()
+
+        if (incremental):
+            # a busca de vizinhos aproveita os candidatos da decisão anterior da mesma mão (ver truco.incremental)
+            from .incremental import ConsultaIncremental
+            cbr = ConsultaIncremental(cbr)
+
+        self.pontos_vitoria = pontos_vitoria
+        self.interface = Interface(saida)
+        self.entrada = EntradaSessao()
+        self.dados = Dados(somente_registro=True, gravador=gravador)
+        self.oponentes = oponentes
+        self.id_oponente = nome_jogador if id_oponente is None else id_oponente
+        self.cbr = CbrSessao(cbr, self.dados, None if oponentes is None else oponentes.perfil(self.id_oponente))
+        self.jogo = Jogo(saida)
+        self.baralho = Baralho(sorteio)
+        self.baralho.embaralhar()
+        self.truco = Truco(saida, self.entrada)
+        self.envido = Envido(saida, self.entrada)
+        self.flor = Flor(self.entrada)
+        self.jogador1 = self.jogo.criar_jogador(nome_jogador, self.baralho)
+        self.jogador2 = self.jogo.criar_bot(nome_bot, self.baralho)
+        self.jogador1.primeiro = True
+        self.jogador2.ultimo = True
+        self.pendente = None
+        self.terminada = False
+        self.vencedor = None
+        self.partida = None
+
+
+    def iniciar(self):
+        """Começa o jogo e avança até a primeira decisão do humano."""
+        if (self.partida is not None):
+            raise RuntimeError('A sessão já foi iniciada.')
+
+        self.partida = self._partida()
+        self._avancar(None)
+        return self.pendente
+
+
+    def jogar(self, escolha):
+        """Responde a decisão pendente do humano e avança até a próxima."""
+        if (self.partida is None):
+            raise RuntimeError('A sessão ainda não foi iniciada.')
+
+        if (self.terminada):
+            raise RuntimeError('O jogo desta sessão já terminou.')
+
+        self._avancar(escolha)
+        return self.pendente
+
+
+    def estado(self):
+        """Resumo do estado da mesa."""
+        return {
+            'jogador1': self.jogador1.nome,
+            'jogador2': self.jogador2.nome,
+            'pontos': [self.jogador1.pontos, self.jogador2.pontos],
+            'rodadas': [self.jogador1.rodadas, self.jogador2.rodadas],
+            'valor_aposta': self.truco.retornar_valor_aposta(),
+            'pergunta': None if self.pendente is None else self.pendente.pergunta,
+            'opcoes': None if self.pendente is None else self.pendente.opcoes,
+            'terminada': self.terminada,
+            'vencedor': self.vencedor,
+        }
+
+
+    def fechar(self):
+        """Encerra a partida em andamento e grava os registros pendentes da sessão."""
+        if (self.partida is not None):
+            self.partida.close()
+
+        self.dados.fechar()
+
+
+    def _avancar(self, escolha):
+        try:
+            if (escolha is None):
+                self.pendente = next(self.partida)
+
+            else:
+                self.pendente = self.partida.send(escolha)
+
+        except StopIteration:
+            self.pendente = None
+            self.terminada = True
+
+
+    def _aguardar(self, funcao, *args):
+        """Executa `funcao`; enquanto ela depender do humano, repassa a decisão pendente e continua com a resposta."""
+        try:
+            return funcao(*args)
+        except DecisaoPendente as pendente:
+            atual = pendente
+
+        while True:
+            escolha = yield atual
+            while (escolha not in atual.opcoes):
+                self.interface.mostrar_mensagem('Selecione um valor válido!')
+                escolha = yield atual
+
+            try:
+                return atual.continuar(escolha)
+            except DecisaoPendente as outra:
+                atual = outra
+
+
+    def _perguntar(self, pergunta, opcoes):
+        escolha = yield from self._aguardar(self.entrada.escolher, pergunta, opcoes, lambda escolha: escolha)
+        return escolha
+
+
+    def _opcoes_humano(self):
+        """Opções exibidas ao humano na sua vez: cartas, truco, flor, envido e ir ao baralho."""
+        jogador1 = self.jogador1
+        opcoes = list(range(len(jogador1.checa_mao())))
+        if (len(jogador1.mao) >= 2 and jogador1.pediu_truco is False):
+            opcoes.append(4)
+
+        if (len(jogador1.mao) == 3):
+            if (jogador1.flor):
+                opcoes.append(5)
+
+            opcoes.extend([6, 7, 8])
+
+        opcoes.append(9)
+        return opcoes
+
+
+    def _registrar_apostas(self):
+        """Adiciona no registro o truco e o envido da mão, com os códigos da base (1 robô, 2 humano)."""
+        codigo = {1: HUMANO, 2: ROBO}
+        truco, envido = self.truco, self.envido
+        if (truco.jogador_fugiu):
+            ganhador_truco = 2 if truco.jogador_fugiu == 1 else 1
+
+        elif (truco.jogador_pediu and self.jogador1.rodadas != self.jogador2.rodadas):
+            ganhador_truco = 1 if self.jogador1.rodadas > self.jogador2.rodadas else 2
+
+        else:
+            ganhador_truco = 0
+
+        self.dados.truco(codigo.get(truco.jogador_pediu, 0), codigo.get(truco.jogador_retruco, 0), codigo.get(truco.jogador_vale_quatro, 0),
+                         codigo.get(truco.jogador_fugiu, 0), codigo.get(ganhador_truco, 0))
+        self.dados.pedido_envido(codigo.get(envido.jogador_pediu_envido, 0))
+        self.dados.vencedor_envido(codigo.get(envido.quem_venceu_envido, 0), codigo.get(envido.quem_fugiu, 0))
+
+
+    def _reiniciar(self):
+        """Reseta todos os parâmetros do jogo, referente as rodadas"""
+        self._registrar_apostas()
+        if (self.oponentes is not None):
+            self.cbr.oponente = self.oponentes.atualizar(self.id_oponente, self.dados.retornar_registro())
+
+        self.dados.finalizar_partida()
+        self.dados.resetar_registro()
+        self.jogador1.resetar()
+        self.jogador2.resetar()
+        self.baralho.resetar()
+        self.baralho.criar_baralho()
+        self.baralho.embaralhar()
+        self.jogador1.criar_mao(self.baralho)
+        self.jogador2.criar_mao(self.baralho)
+        self.envido.resetar()
+        self.truco.resetar()
+        self.flor.resetar_flor()
+
+
+    def _turno_humano(self):
+        """Turno de jogadas do humano, para selecionar o que ele gostaria de jogar."""
+        jogador1, jogador2, interface = self.jogador1, self.jogador2, self.interface
+        if (len(jogador1.checa_mao()) == 3 and jogador2.envido):
+            envido_jogador2 = jogador2.avaliar_envido(self.cbr, 'Envido', 2, jogador1.pontos)
+            if (envido_jogador2):
+                jogador1.mostrar_opcoes(interface)
+                yield from self._aguardar(self.envido.controlador_envido, self.cbr, self.dados, 6, 2, jogador1, jogador2, interface)
+
+        while True:
+            interface.mostrar_vez_jogador(jogador1.nome, 1)
+            jogador1.mostrar_opcoes(interface)
+            carta_escolhida = yield from self._perguntar(f"\n{jogador1.nome} Qual carta você quer jogar? ", self._opcoes_humano())
+
+            # Chama a flor antes do jogador1 jogar envido
+            if ((len(jogador1.checa_mao()) == 3) and (carta_escolhida in [6, 7, 8]) and (jogador2.flor is True)):
+                interface.mostrar_mensagem('Bloqueou o envido com a flor')
+                yield from self._aguardar(self.flor.pedir_flor, 1, jogador1, jogador2, interface)
+
+            elif (carta_escolhida < len(jogador1.checa_mao())):
+                carta_jogador_01 = jogador1.jogar_carta(carta_escolhida)
+                return Carta(carta_jogador_01.retornar_numero(), carta_jogador_01.retornar_naipe())
+
+            elif (carta_escolhida == 4):
+                chamou_truco = yield from self._aguardar(self.truco.controlador_truco, self.cbr, self.dados, 1, jogador1, jogador2)
+                if (chamou_truco is False):
+                    interface.saida.emitir('valor_aposta', valor=self.truco.retornar_valor_aposta())
+                    return -1
+
+            elif (carta_escolhida == 5):
+                interface.mostrar_mensagem('flor')
+                yield from self._aguardar(self.flor.pedir_flor, 1, jogador1, jogador2, interface)
+                interface.border_msg(f"Jogador 1 - {jogador1.nome}: {jogador1.pontos} Pontos Acumulados\nJogador 2 - {jogador2.nome}: {jogador2.pontos} Pontos Acumulados")
+
+            elif (carta_escolhida in [6, 7, 8] and jogador2.pediu_flor is False):
+                # print('envido')
+                yield from self._aguardar(self.envido.controlador_envido, self.cbr, self.dados, carta_escolhida, 1, jogador1, jogador2, interface)
+
+            elif (carta_escolhida == 9):
+                jogador2.adicionar_pontos(self.truco.retornar_valor_aposta())
+                return -1
+
+            else:
+                interface.mostrar_mensagem('Selecione um valor válido!')
+
+
+    def _turno_bot(self, carta_jogador_01):
+        """Turno do Bot, para avaliar o estado atual do jogo e jogar suas cartas."""
+        jogador1, jogador2, interface = self.jogador1, self.jogador2, self.interface
+        if (len(jogador2.checa_mao()) == 3 and carta_jogador_01):
+            jogador2.enriquecer_bot(dados=self.dados, carta_jogador_01=carta_jogador_01)
+
+        while True:
+            interface.mostrar_vez_jogador(jogador2.nome, 2)
+            carta_escolhida = jogador2.jogar_carta(self.cbr, self.truco)
+
+            if (jogador2.pediu_flor is False and (carta_escolhida == 5 and (len(jogador1.mao) == 3))):
+                interface.mostrar_mensagem('flor do Bot')
+                yield from self._aguardar(self.flor.pedir_flor, 2, jogador1, jogador2, interface)
+                interface.border_msg(f"Jogador 1 - {jogador1.nome}: {jogador1.pontos} Pontos Acumulados\nJogador 2 - {jogador2.nome}: {jogador2.pontos} Pontos Acumulados")
+
+            elif (carta_escolhida == -1):
+                # o Cbr não encontrou referência: o bot já descartou a última carta do ranking, joga a última da mão
+                carta_jogador_02 = jogador2.mao.pop()
+                break
+
+            elif (0 <= carta_escolhida < len(jogador2.checa_mao())):
+                carta_jogador_02 = jogador2.mao.pop(carta_escolhida)
+                break
+
+            elif (carta_escolhida == 4):
+                chamou_truco = yield from self._aguardar(self.truco.controlador_truco, self.cbr, self.dados, 2, jogador1, jogador2)
+                if (chamou_truco is False):
+                    # print('pontos truco', truco.retornar_valor_aposta())
+                    return -1
+
+            elif ((jogador1.pediu_flor or jogador2.pediu_flor) is False and carta_escolhida in [6, 7, 8]):
+                interface.mostrar_mensagem('envido')
+                yield from self._aguardar(self.envido.controlador_envido, self.cbr, self.dados, carta_escolhida, 2, jogador1, jogador2, interface)
+
+        return Carta(carta_jogador_02.retornar_numero(), carta_jogador_02.retornar_naipe())
+
+
+    def _partida(self):
+        """Laço principal do jogo, até um dos jogadores alcançar os pontos de vitória."""
+        jogador1, jogador2, interface, jogo = self.jogador1, self.jogador2, self.interface, self.jogo
+        carta_jogador_01 = 0
+        carta_jogador_02 = 0
+        while True:
+            truco_fugiu = False
+            ocultar_pontos_ac = False
+
+            if (jogador1.primeiro == True):
+                carta_jogador_01 = yield from self._turno_humano()
+                if (carta_jogador_01 != -1):
+                    interface.mostrar_carta_jogada(jogador1.nome, carta_jogador_01)
+                    carta_jogador_02 = yield from self._turno_bot(carta_jogador_01)
+                    if (carta_jogador_02 != -1):
+                        interface.mostrar_carta_jogada(jogador2.nome, carta_jogador_02)
+
+            elif (jogador2.primeiro == True):
+                carta_jogador_02 = yield from self._turno_bot(None)
+                if (carta_jogador_02 != -1):
+                    interface.mostrar_carta_jogada(jogador2.nome, carta_jogador_02)
+                    carta_jogador_01 = yield from self._turno_humano()
+                    if (carta_jogador_01 != -1):
+                        interface.mostrar_carta_jogada(jogador1.nome, carta_jogador_01)
+
+            if (carta_jogador_01 == -1 or carta_jogador_02 == -1):
+                truco_fugiu = True
+                if (carta_jogador_01 == -1 or carta_jogador_01 is None):
+                    interface.mostrar_placar_total_jogador_fugiu(jogador1, jogador1.nome, jogador1.pontos, jogador2.nome, jogador2.pontos)
+
+                else:
+                    interface.mostrar_placar_total_jogador_fugiu(jogador2, jogador1.nome, jogador1.pontos, jogador2.nome, jogador2.pontos)
+
+            else:
+                ganhador = jogo.verificar_ganhador(carta_jogador_01, carta_jogador_02, interface)
+                jogo.quem_joga_primeiro(jogador1, jogador2, carta_jogador_01, carta_jogador_02, ganhador)
+                jogador_ganhou = jogo.adicionar_rodada(jogador1, jogador2, carta_jogador_01, carta_jogador_02, ganhador)
+                if (carta_jogador_01 and carta_jogador_02):
+                    jogador2.enriquecer_bot(self.dados, carta_jogador_01, carta_jogador_02, jogador_ganhou)
+
+            if (jogador1.rodadas == 2 or jogador2.rodadas == 2):
+                ocultar_pontos_ac = True
+                if (jogador1.rodadas == 2):
+                    jogador1.adicionar_pontos(self.truco.retornar_valor_aposta())
+                    interface.mostrar_ganhador_rodada(jogador1.nome)
+                    jogador2.enriquecer_bot(self.dados, carta_jogador_01, carta_jogador_02, 2)
+
+                else:
+                    jogador2.adicionar_pontos(self.truco.retornar_valor_aposta())
+                    jogador2.enriquecer_bot(self.dados, carta_jogador_01, carta_jogador_02, 1)
+                    interface.mostrar_ganhador_rodada(jogador2.nome)
+
+                self._reiniciar()
+                interface.mostrar_placar_total(jogador1.nome, jogador1.pontos, jogador2.nome, jogador2.pontos)
+
+            # Caso acabem as cartas nas mãos dos jogadores, ou houve fuga, finaliza as jogadas
+            elif (not (jogador1.checa_mao()) and not (jogador2.checa_mao()) or truco_fugiu is True):
+                ocultar_pontos_ac = True
+                if (truco_fugiu is False):
+                    if (jogador1.rodadas > jogador2.rodadas):
+                        jogador1.adicionar_pontos(self.truco.retornar_valor_aposta())
+                        interface.mostrar_ganhador_rodada(jogador1.nome)
+
+                    elif (jogador2.rodadas > jogador1.rodadas):
+                        jogador2.adicionar_pontos(self.truco.retornar_valor_aposta())
+                        interface.mostrar_ganhador_rodada(jogador2.nome)
+
+                self._reiniciar()
+                interface.mostrar_placar_total(jogador1.nome, jogador1.pontos, jogador2.nome, jogador2.pontos)
+
+            if (ocultar_pontos_ac is False):
+                interface.mostrar_placar_rodadas(jogador1.nome, jogador1.rodadas, jogador2.nome, jogador2.rodadas)
+
+            if (jogador1.pontos >= self.pontos_vitoria):
+                self.vencedor = 1
+                interface.mostrar_ganhador_jogo(jogador1.nome)
+                return
+
+            elif (jogador2.pontos >= self.pontos_vitoria):
+                self.vencedor = 2
+                interface.mostrar_ganhador_jogo(jogador2.nome)
+                return
@@ -1,5 +1,16 @@
+from .entrada import EntradaConsole
+from .saida import SaidaConsole
+
 class Truco():
-    def __init__(self):
+    def __init__(self, saida=None, entrada=None):
+        if (saida is None):
+            saida = SaidaConsole()
+
+        if (entrada is None):
+            entrada = EntradaConsole()
+
+        self.saida = saida
+        self.entrada = entrada
         self.valor_aposta = 1
         self.jogador_bloqueado = 0
         self.jogador_pediu = 0
@@ -50,21 +61,26 @@ class Truco():
 
     def pedir_truco(self, cbr, quem_pediu, jogador1, jogador2):
         """Aumenta a aposta inicial do jogo, que passa a valer 2 pontos."""
-        print("Truco")
+        self.saida.emitir('mensagem', texto="Truco")
         self.estado_atual = "truco"
+        self.jogador_pediu = quem_pediu
 
         if (quem_pediu == 1):
             escolha = jogador2.avaliar_truco(cbr, self.estado_atual, quem_pediu)
             self.jogador_bloqueado = 1
 
         else:
-            escolha = -1
-            while(escolha not in [0, 1, 2]):
-                escolha = int(input(f"{quem_pediu}, você aceita o pedido (a mão passa a valer {(self.valor_aposta)} pontos)\n[0] Recusar\n[1] Aceitar\n[2] Aumentar Aposta"))
             self.jogador_bloqueado = 2
-        
+            escolha = self.entrada.escolher(f"{quem_pediu}, você aceita o pedido (a mão passa a valer {(self.valor_aposta)} pontos)\n[0] Recusar\n[1] Aceitar\n[2] Aumentar Aposta", [0, 1, 2],
+                                            lambda escolha: self.responder_truco(escolha, cbr, quem_pediu, jogador1, jogador2))
 
+        return self.responder_truco(escolha, cbr, quem_pediu, jogador1, jogador2)
+
+
+    def responder_truco(self, escolha, cbr, quem_pediu, jogador1, jogador2):
+        """Aplica a resposta ao pedido de truco: recusar, aceitar ou aumentar a aposta."""
         if escolha == 0:
+            self.jogador_fugiu = 2 if quem_pediu == 1 else 1
             if (quem_pediu == 1):
                 jogador1.pontos += 1
 
@@ -74,12 +90,12 @@ class Truco():
             return False
 
         elif escolha == 1:
-            print(f"Jogador {quem_pediu} aceitou o pedido.")
+            self.saida.emitir('aposta_aceita', quem_pediu=quem_pediu)
             # self.valor_aposta += self.valor_aposta
             return True
                 
         elif escolha == 2:
-            print(f"Jogador {quem_pediu} pediu Retruco.")
+            self.saida.emitir('aposta_aumentada', quem_pediu=quem_pediu)
             self.inverter_jogador_bloqueado()
             return self.pedir_retruco(cbr, self.jogador_bloqueado, jogador1, jogador2)
 
@@ -88,20 +104,25 @@ class Truco():
         """Aumenta a aposta, que passa a valer 3 pontos."""
         self.valor_aposta = 3
         self.estado_atual = "retruco"
-        print("Retruco")
+        self.jogador_retruco = quem_pediu
+        self.saida.emitir('mensagem', texto="Retruco")
 
         if (quem_pediu == 1):
             escolha = jogador2.avaliar_truco(cbr, self.estado_atual, quem_pediu)
             self.jogador_bloqueado = 1
 
         else:
-            escolha = -1
-            while(escolha not in [0, 1, 2]):
-                escolha = int(input(f"Jogador {quem_pediu}, você aceita o pedido (a mão passa a valer {(self.valor_aposta)} pontos)\n[0] Recusar\n[1] Aceitar\n[2] Aumentar Aposta"))
             self.jogador_bloqueado = 2
-        
+            escolha = self.entrada.escolher(f"Jogador {quem_pediu}, você aceita o pedido (a mão passa a valer {(self.valor_aposta)} pontos)\n[0] Recusar\n[1] Aceitar\n[2] Aumentar Aposta", [0, 1, 2],
+                                            lambda escolha: self.responder_retruco(escolha, cbr, quem_pediu, jogador1, jogador2))
 
+        return self.responder_retruco(escolha, cbr, quem_pediu, jogador1, jogador2)
+
+
+    def responder_retruco(self, escolha, cbr, quem_pediu, jogador1, jogador2):
+        """Aplica a resposta ao pedido de retruco: recusar, aceitar ou pedir vale quatro."""
         if escolha == 0:
+            self.jogador_fugiu = 2 if quem_pediu == 1 else 1
             if (quem_pediu == 1):
                 jogador1.pontos += 2
 
@@ -111,12 +132,12 @@ class Truco():
             return False
 
         elif escolha == 1:
-            print(f"Jogador {quem_pediu} aceitou o pedido.")
+            self.saida.emitir('aposta_aceita', quem_pediu=quem_pediu)
             # self.valor_aposta += self.valor_aposta
             return True
                 
         elif escolha == 2:
-            print(f"Jogador {quem_pediu} pediu Retruco.")
+            self.saida.emitir('aposta_aumentada', quem_pediu=quem_pediu)
             self.inverter_jogador_bloqueado()
             return self.pedir_vale_quatro(cbr, self.jogador_bloqueado, jogador1, jogador2)
 
@@ -124,20 +145,25 @@ class Truco():
     def pedir_vale_quatro(self, cbr, quem_pediu, jogador1, jogador2):
         """Aumenta a aposta, que passa a valer 4 pontos"""
         self.valor_aposta = 4
-        print("Vale 4")
+        self.jogador_vale_quatro = quem_pediu
+        self.saida.emitir('mensagem', texto="Vale 4")
 
         if (quem_pediu == 1):
             escolha = jogador2.avaliar_truco(cbr, self.estado_atual, quem_pediu)
             self.jogador_bloqueado = 1
 
         else:
-            escolha = -1
-            while(escolha not in [0, 1]):
-                escolha = int(input(f"Jogador {quem_pediu}, você aceita o pedido (a mão passa a valer {(self.valor_aposta)} pontos)\n[0] Recusar\n[1] Aceitar"))
             self.jogador_bloqueado = 2
-        
+            escolha = self.entrada.escolher(f"Jogador {quem_pediu}, você aceita o pedido (a mão passa a valer {(self.valor_aposta)} pontos)\n[0] Recusar\n[1] Aceitar", [0, 1],
+                                            lambda escolha: self.responder_vale_quatro(escolha, quem_pediu, jogador1, jogador2))
+
+        return self.responder_vale_quatro(escolha, quem_pediu, jogador1, jogador2)
 
+
+    def responder_vale_quatro(self, escolha, quem_pediu, jogador1, jogador2):
+        """Aplica a resposta ao pedido de vale quatro."""
         if escolha == 0:
+            self.jogador_fugiu = 2 if quem_pediu == 1 else 1
             if (quem_pediu == 1):
                 jogador1.pontos += 3
 
@@ -147,7 +173,7 @@ class Truco():
             return False
 
         else:
-            print(f"Jogador {quem_pediu} aceitou o pedido.")
+            self.saida.emitir('aposta_aceita', quem_pediu=quem_pediu)
             jogador1.pediu_truco = True
             jogador2.pediu_truco = True
             # self.valor_aposta += self.valor_aposta
@@ -169,7 +195,7 @@ class Truco():
         self.valor_aposta = 1
         self.jogador_bloqueado = 0
         self.jogador_pediu = 0
-        self.jogador_aumentou2 = 0
-        self.jogador_aumentou4 = 0
+        self.jogador_retruco = 0
+        self.jogador_vale_quatro = 0
         self.jogador_fugiu = 0
         self.estado_atual = ""